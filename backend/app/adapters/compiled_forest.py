@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import sklearn
+
+# A partir de scikit-learn 1.4 `tree_.value` ya guarda proporciones por clase y
+# DecisionTreeClassifier.predict_proba no vuelve a normalizar.
+_SKLEARN_STORES_FRACTIONS = tuple(int(part) for part in sklearn.__version__.split(".")[:2]) >= (1, 4)
+
+DEFAULT_CHUNK_ROWS = 4096
+SIDECAR_FORMAT_VERSION = 1
+SIDECAR_META_FILE = "meta.json"
+_ARRAY_FIELDS = (
+    "feature",
+    "threshold",
+    "left",
+    "right",
+    "missing_go_to_left",
+    "leaf_values",
+    "roots",
+)
+
+
+class CompiledForest:
+    """
+    Versión aplanada de un RandomForest de scikit-learn evaluada solo con NumPy.
+
+    Todos los árboles se concatenan en arreglos contiguos (feature, threshold,
+    hijos izquierdo/derecho y distribución de clases por hoja) y se recorren en
+    paralelo para todas las filas, evitando la validación de entrada y el
+    despacho de joblib de `predict_proba`. La salida es bit a bit igual a la del
+    estimador original (misma conversión a float32 y mismo orden de suma).
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        missing_go_to_left: np.ndarray,
+        leaf_values: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_go_to_left = missing_go_to_left
+        self.leaf_values = leaf_values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.chunk_rows = max(1, chunk_rows)
+        self.is_leaf = left == np.arange(left.shape[0])
+
+    @property
+    def n_trees(self) -> int:
+        return int(self.roots.shape[0])
+
+    @property
+    def n_classes(self) -> int:
+        return int(self.leaf_values.shape[1])
+
+    @property
+    def n_nodes(self) -> int:
+        return int(self.feature.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, name).nbytes for name in _ARRAY_FIELDS))
+
+    @property
+    def memory_mapped(self) -> bool:
+        return isinstance(self.leaf_values, np.memmap)
+
+    def save(self, directory: Path, extra_meta: Dict[str, Any] | None = None) -> None:
+        """Guarda cada arreglo como .npy sin comprimir para poder abrirlo con mmap."""
+
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAY_FIELDS:
+            np.save(directory / f"{name}.npy", getattr(self, name), allow_pickle=False)
+        meta = {
+            "format": SIDECAR_FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            **(extra_meta or {}),
+        }
+        (directory / SIDECAR_META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    @staticmethod
+    def read_meta(directory: Path) -> Dict[str, Any] | None:
+        meta_path = directory / SIDECAR_META_FILE
+        if not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("format") != SIDECAR_FORMAT_VERSION:
+            return None
+        return meta
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        mmap_mode: str | None = "r",
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ) -> "CompiledForest":
+        """Abre un bosque guardado con `save`; con mmap_mode las páginas se comparten entre procesos."""
+
+        meta = cls.read_meta(directory)
+        if meta is None:
+            raise ValueError(f"Bosque compilado inválido en {directory}")
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            for name in _ARRAY_FIELDS
+        }
+        return cls(
+            max_depth=int(meta["max_depth"]),
+            n_features=int(meta["n_features"]),
+            chunk_rows=chunk_rows,
+            **arrays,
+        )
+
+    @classmethod
+    def from_estimator(cls, estimator, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> "CompiledForest":
+        trees = getattr(estimator, "estimators_", None)
+        if (
+            not isinstance(trees, list)
+            or not trees
+            or not hasattr(estimator, "classes_")
+            or not all(hasattr(tree, "tree_") for tree in trees)
+        ):
+            raise ValueError("Solo se pueden compilar clasificadores de tipo bosque de scikit-learn.")
+        if getattr(estimator, "n_outputs_", 1) != 1:
+            raise ValueError("El motor compilado solo soporta modelos de una salida.")
+        n_classes = int(np.atleast_1d(estimator.n_classes_)[0])
+        n_features = int(getattr(estimator, "n_features_in_", trees[0].tree_.n_features))
+
+        features: List[np.ndarray] = []
+        thresholds: List[np.ndarray] = []
+        lefts: List[np.ndarray] = []
+        rights: List[np.ndarray] = []
+        missing: List[np.ndarray] = []
+        values: List[np.ndarray] = []
+        roots: List[int] = []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            raw = tree.tree_
+            node_ids = np.arange(raw.node_count, dtype=np.intp)
+            leaf_mask = raw.children_left == -1
+            # Las hojas apuntan a sí mismas: recorrer de más no cambia el resultado.
+            left = np.where(leaf_mask, node_ids, raw.children_left).astype(np.intp) + offset
+            right = np.where(leaf_mask, node_ids, raw.children_right).astype(np.intp) + offset
+            feature = np.where(leaf_mask, 0, raw.feature).astype(np.intp)
+            go_left = getattr(raw, "missing_go_to_left", None)
+            if go_left is None:
+                go_left = np.zeros(raw.node_count, dtype=bool)
+            proba = np.array(raw.value[:, 0, :n_classes], dtype=np.float64)
+            if not _SKLEARN_STORES_FRACTIONS:
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+
+            features.append(feature)
+            thresholds.append(np.asarray(raw.threshold, dtype=np.float64))
+            lefts.append(left)
+            rights.append(right)
+            missing.append(np.asarray(go_left, dtype=bool))
+            values.append(proba)
+            roots.append(offset)
+            max_depth = max(max_depth, int(raw.max_depth))
+            offset += raw.node_count
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features)),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+            left=np.ascontiguousarray(np.concatenate(lefts)),
+            right=np.ascontiguousarray(np.concatenate(rights)),
+            missing_go_to_left=np.ascontiguousarray(np.concatenate(missing)),
+            leaf_values=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            n_features=n_features,
+            chunk_rows=chunk_rows,
+        )
+
+    def apply(self, matrix: np.ndarray) -> np.ndarray:
+        """Devuelve el índice global de hoja (N×T) alcanzado por cada fila en cada árbol."""
+
+        X = self.validate_input(matrix)
+        leaves = np.empty((X.shape[0], self.n_trees), dtype=np.intp)
+        for start in range(0, X.shape[0], self.chunk_rows):
+            stop = start + self.chunk_rows
+            leaves[start:stop] = self._apply_chunk(X[start:stop])
+        return leaves
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        X = self.validate_input(matrix)
+        proba = np.zeros((X.shape[0], self.n_classes), dtype=np.float64)
+        for start in range(0, X.shape[0], self.chunk_rows):
+            stop = start + self.chunk_rows
+            nodes = self._apply_chunk(X[start:stop])
+            out = proba[start:stop]
+            # Mismo orden de acumulación que ForestClassifier.predict_proba.
+            for tree_idx in range(self.n_trees):
+                out += self.leaf_values[nodes[:, tree_idx]]
+        proba /= self.n_trees
+        return proba
+
+    def accumulate(self, X: np.ndarray, tree_start: int, tree_stop: int, out: np.ndarray) -> None:
+        """
+        Suma en `out` (N×C) las hojas de los árboles [tree_start, tree_stop) para
+        una entrada ya validada, en el mismo orden que `predict_proba`.
+        """
+
+        roots = self.roots[tree_start:tree_stop]
+        for start in range(0, X.shape[0], self.chunk_rows):
+            stop = start + self.chunk_rows
+            nodes = self._apply_chunk(X[start:stop], roots)
+            chunk_out = out[start:stop]
+            for tree_idx in range(roots.shape[0]):
+                chunk_out += self.leaf_values[nodes[:, tree_idx]]
+
+    def validate_input(self, matrix: np.ndarray) -> np.ndarray:
+        # Los árboles de scikit-learn comparan siempre sobre float32.
+        X = np.asarray(matrix, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Se esperaba una matriz N×{self.n_features}, se recibió {X.shape}")
+        return X
+
+    def _apply_chunk(self, X: np.ndarray, roots: np.ndarray | None = None) -> np.ndarray:
+        roots = self.roots if roots is None else roots
+        nodes = np.broadcast_to(roots, (X.shape[0], roots.shape[0])).copy()
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        for _ in range(self.max_depth):
+            if self.is_leaf[nodes].all():
+                break
+            values = X[rows, self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            go_left |= np.isnan(values) & self.missing_go_to_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
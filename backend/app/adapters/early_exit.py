@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Protocol
+
+import numpy as np
+
+
+class TreeEnsemble(Protocol):
+    """Bosque que puede acumular un rango de árboles (CompiledForest o SklearnForestView)."""
+
+    n_trees: int
+    n_classes: int
+
+    def validate_input(self, matrix: np.ndarray) -> np.ndarray: ...
+
+    def accumulate(self, X: np.ndarray, tree_start: int, tree_stop: int, out: np.ndarray) -> None: ...
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray: ...
+
+
+class SklearnForestView:
+    """
+    Recorre un RandomForest de scikit-learn árbol a árbol con su traversal nativo.
+    Suma en el mismo orden que ForestClassifier.predict_proba, así que el bosque
+    completo da exactamente el mismo resultado.
+    """
+
+    def __init__(self, estimator):
+        trees = getattr(estimator, "estimators_", None)
+        if not isinstance(trees, list) or not trees or not hasattr(estimator, "classes_"):
+            raise ValueError("Solo se pueden recorrer por bloques clasificadores de tipo bosque.")
+        if getattr(estimator, "n_outputs_", 1) != 1:
+            raise ValueError("La salida temprana solo soporta modelos de una salida.")
+        self.trees = trees
+        self.n_trees = len(trees)
+        self.n_classes = int(np.atleast_1d(estimator.n_classes_)[0])
+
+    def validate_input(self, matrix: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(matrix, dtype=np.float32)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def accumulate(self, X: np.ndarray, tree_start: int, tree_stop: int, out: np.ndarray) -> None:
+        for tree in self.trees[tree_start:tree_stop]:
+            out += tree.predict_proba(X, check_input=False)
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        X = self.validate_input(matrix)
+        proba = np.zeros((X.shape[0], self.n_classes), dtype=np.float64)
+        self.accumulate(X, 0, self.n_trees, proba)
+        proba /= self.n_trees
+        return proba
+
+
+class EarlyExitEvaluator:
+    """
+    Evaluación adaptativa de un bosque para vaciar backlogs de ingesta.
+
+    Los árboles se recorren en bloques de `chunk_trees`. Tras cada bloque, una
+    fila deja de evaluarse cuando la ventaja de su clase líder sobre la segunda
+    supera el número de árboles restantes (cada árbol aporta como mucho 1 a una
+    clase, así que la clase ya no puede cambiar). Si se agota `budget_ms`, las
+    filas pendientes se cierran con los árboles evaluados hasta ese momento.
+
+    Las probabilidades de una fila cortada son la media de los árboles que sí
+    se evaluaron; las filas que recorren el bosque completo son idénticas a
+    `predict_proba` del bosque. Cada `audit_every` batches se puntúa el
+    bosque completo para medir el acuerdo real con el modo rápido.
+    """
+
+    def __init__(
+        self,
+        chunk_trees: int = 16,
+        budget_ms: float = 0.0,
+        audit_every: int = 50,
+        score_column: int = 0,
+    ):
+        self.chunk_trees = max(1, chunk_trees)
+        self.budget_ms = max(0.0, budget_ms)
+        self.audit_every = max(0, audit_every)
+        self.score_column = score_column
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        self.margin_exit_rows = 0
+        self.budget_exit_rows = 0
+        self.budget_exhausted_batches = 0
+        self.trees_evaluated = 0
+        self.trees_total = 0
+        self.audited_batches = 0
+        self.audited_rows = 0
+        self.audit_agreements = 0
+        self.audit_score_diff_total = 0.0
+
+    def predict_proba(self, forest: TreeEnsemble, matrix: np.ndarray) -> np.ndarray:
+        X = forest.validate_input(matrix)
+        n_rows, n_trees = X.shape[0], forest.n_trees
+        sums = np.zeros((n_rows, forest.n_classes), dtype=np.float64)
+        trees_used = np.zeros(n_rows, dtype=np.int64)
+        active = np.arange(n_rows)
+        deadline = time.perf_counter() + self.budget_ms / 1000.0 if self.budget_ms else None
+        margin_exits = 0
+        budget_exits = 0
+        for tree_start in range(0, n_trees, self.chunk_trees):
+            tree_stop = min(n_trees, tree_start + self.chunk_trees)
+            partial = sums[active]
+            forest.accumulate(X[active], tree_start, tree_stop, partial)
+            sums[active] = partial
+            trees_used[active] = tree_stop
+            remaining = n_trees - tree_stop
+            if remaining == 0:
+                break
+            if forest.n_classes > 1:
+                top_two = np.partition(partial, -2, axis=1)[:, -2:]
+                decided = (top_two[:, 1] - top_two[:, 0]) > remaining
+                margin_exits += int(decided.sum())
+                active = active[~decided]
+                if active.size == 0:
+                    break
+            if deadline is not None and time.perf_counter() >= deadline:
+                budget_exits = int(active.size)
+                break
+        proba = sums / trees_used[:, np.newaxis]
+
+        with self._lock:
+            self.batches += 1
+            self.rows += n_rows
+            self.margin_exit_rows += margin_exits
+            self.budget_exit_rows += budget_exits
+            self.budget_exhausted_batches += int(budget_exits > 0)
+            self.trees_evaluated += int(trees_used.sum())
+            self.trees_total += n_rows * n_trees
+            audit = bool(self.audit_every) and self.batches % self.audit_every == 0
+        if audit and (margin_exits or budget_exits):
+            self._audit(forest, X, proba)
+        return proba
+
+    def _audit(self, forest: TreeEnsemble, X: np.ndarray, proba: np.ndarray) -> None:
+        full = forest.predict_proba(X)
+        agreements = int((np.argmax(full, axis=1) == np.argmax(proba, axis=1)).sum())
+        score_diff = 0.0
+        if self.score_column < full.shape[1]:
+            score_diff = float(
+                np.abs(full[:, self.score_column] - proba[:, self.score_column]).sum()
+            )
+        with self._lock:
+            self.audited_batches += 1
+            self.audited_rows += X.shape[0]
+            self.audit_agreements += agreements
+            self.audit_score_diff_total += score_diff
+
+    def stats(self) -> Dict[str, float | int]:
+        with self._lock:
+            exits = self.margin_exit_rows + self.budget_exit_rows
+            return {
+                "chunk_trees": self.chunk_trees,
+                "budget_ms": self.budget_ms,
+                "audit_every": self.audit_every,
+                "batches": self.batches,
+                "rows": self.rows,
+                "margin_exit_rows": self.margin_exit_rows,
+                "budget_exit_rows": self.budget_exit_rows,
+                "budget_exhausted_batches": self.budget_exhausted_batches,
+                "early_exit_rate": (exits / self.rows) if self.rows else 0.0,
+                "trees_evaluated_fraction": (
+                    self.trees_evaluated / self.trees_total if self.trees_total else 0.0
+                ),
+                "audited_batches": self.audited_batches,
+                "audited_rows": self.audited_rows,
+                "audit_agreement_rate": (
+                    self.audit_agreements / self.audited_rows if self.audited_rows else 0.0
+                ),
+                "audit_mean_abs_score_diff": (
+                    self.audit_score_diff_total / self.audited_rows if self.audited_rows else 0.0
+                ),
+            }
@@ -4,14 +4,27 @@ import csv
 import io
 import uuid
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from ..models import AttackTypeEnum, ProtocolEnum, SeverityEnum
 from ..schemas import AlertCreate
 from ..services.generators.synthetic_generator import SEVERITY_FLOOR, SEVERITY_WEIGHT
 from ..services.cicids_converter import LABEL_TO_CLASS
-from .model_adapter import ModelAdapter, ModelPrediction, TOP_FEATURES
+from .feature_schema import FeatureSchema
+from .model_adapter import (
+    DEFAULT_BATCH_SIZE,
+    ModelAdapter,
+    ModelPrediction,
+    TOP_FEATURES,
+    align_columns,
+    iter_chunks,
+    select_rows,
+    take_rows,
+)
 
 TIMESTAMP_FORMATS: List[str] = [
     "%Y-%m-%d %H:%M:%S",
@@ -71,6 +84,20 @@ def _safe_float(value: Optional[str], default: float = 0.0) -> float:
             return default
 
 
+def _parse_feature_column(values: np.ndarray) -> np.ndarray:
+    """Versión columnar de `_safe_float(value, 0.0)` sobre una columna de texto."""
+
+    try:
+        # astype sobre objetos aplica float() a cada celda (tolera espacios).
+        parsed = values.astype(np.float64)
+    except (TypeError, ValueError):
+        return np.fromiter((_safe_float(value, 0.0) for value in values), dtype=np.float64, count=len(values))
+    # nan/inf se descartan como en la versión fila a fila; el resto de no finitos se respeta.
+    for idx in np.flatnonzero(~np.isfinite(parsed)):
+        parsed[idx] = _safe_float(values[idx], 0.0)
+    return parsed
+
+
 def _safe_int(value: Optional[str], default: int = 0) -> int:
     return int(_safe_float(value, float(default)))
 
@@ -111,11 +138,26 @@ def _map_protocol(raw: Optional[str]) -> ProtocolEnum:
 class FeatureCSVAdapter:
     """Lee un CSV que ya contiene las TOP-20 features y genera AlertCreate."""
 
-    def __init__(self, csv_path: str | Path, model_adapter: ModelAdapter):
+    def __init__(
+        self,
+        csv_path: str | Path,
+        model_adapter: ModelAdapter,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        feature_matrix: np.ndarray | None = None,
+        feature_dtype=None,
+        row_offsets: np.ndarray | None = None,
+    ):
         self.csv_path = self._resolve_path(csv_path)
         if not self.csv_path.exists():
             raise FileNotFoundError(f"Archivo CSV no encontrado: {self.csv_path}")
         self.model_adapter = model_adapter
+        self.batch_size = max(1, batch_size)
+        # Matriz precalculada (sidecar .npy mapeado) alineada con las filas válidas del CSV.
+        self.feature_matrix = feature_matrix
+        # Por defecto el tipo validado del modelo (float32 o float64).
+        self.feature_dtype = np.dtype(feature_dtype or getattr(model_adapter, "feature_dtype", np.float64))
+        # Offset en bytes de cada fila válida (índice de clases): lectura de filas sueltas.
+        self.row_offsets = row_offsets
 
     def _resolve_path(self, raw_path: str | Path) -> Path:
         path = Path(raw_path)
@@ -135,20 +177,93 @@ class FeatureCSVAdapter:
         self,
         limit: int | None = None,
         attack_type: AttackTypeEnum | None = None,
+        rows: Sequence[int] | None = None,
     ) -> Iterator[AlertCreate]:
+        """
+        Con `rows` (posiciones crecientes del índice de clases) solo se leen esas
+        filas; si al repuntuarlas alguna ya no es del tipo pedido, se completa con
+        un recorrido filtrado tras la última de `rows`.
+        """
+
         emitted = 0
-        for row in self._iter_rows():
-            features = self._build_features(row)
-            prediction = self.model_adapter.predict(features)
-            alert = self._build_alert(row, features, prediction)
-            if attack_type and alert.attack_type != attack_type:
-                continue
+        for alert in self._iterate_alerts(limit, attack_type, rows):
             yield alert
             emitted += 1
-            if limit and emitted >= limit:
-                break
+        # El índice puede discrepar del modelo actual (salida temprana, float32, recarga).
+        if rows is not None and attack_type and limit and emitted < min(limit, len(rows)):
+            yield from self._iterate_alerts(limit - emitted, attack_type, start_row=int(rows[-1]) + 1)
 
-    def _iter_rows(self) -> Iterator[Dict[str, str]]:
+    def _iterate_alerts(
+        self,
+        limit: int | None,
+        attack_type: AttackTypeEnum | None,
+        rows: Sequence[int] | None = None,
+        start_row: int = 0,
+    ) -> Iterator[AlertCreate]:
+        emitted = 0
+        # Sin filtro por tipo basta con puntuar las filas que se van a emitir.
+        chunk_size = self.batch_size
+        if limit and (not attack_type or rows is not None):
+            chunk_size = min(chunk_size, limit)
+        for schema, chunk, matrix, _ in self._iter_feature_chunks(chunk_size, rows, start_row):
+            batch = self.model_adapter.predict_batch(
+                align_columns(matrix, TOP_FEATURES, self.model_adapter.feature_names)
+            )
+            for idx, row in enumerate(chunk):
+                if attack_type and batch.attack_type(idx) != attack_type:
+                    continue
+                feature_values = dict(zip(TOP_FEATURES, matrix[idx].tolist()))
+                yield self._build_alert(schema.record(row), feature_values, batch.prediction(idx))
+                emitted += 1
+                if limit and emitted >= limit:
+                    return
+
+    def iter_feature_matrices(self, chunk_size: int | None = None) -> Iterator[np.ndarray]:
+        """
+        Matrices de features (orden TOP_FEATURES) de todas las filas válidas, por
+        bloques. El buffer se reutiliza entre bloques: copiarlo si hay que guardarlo.
+        """
+
+        for _, _, matrix, _ in self._iter_feature_chunks(chunk_size or self.batch_size):
+            yield matrix
+
+    def iter_model_inputs(
+        self, chunk_size: int | None = None
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], np.ndarray, None]]:
+        """Por bloque: esquema, filas y entrada del modelo (sin features de ventana)."""
+
+        for schema, rows, matrix, _ in self._iter_feature_chunks(chunk_size or self.batch_size):
+            yield schema, rows, align_columns(matrix, TOP_FEATURES, self.model_adapter.feature_names), None
+
+    def _iter_feature_chunks(
+        self, chunk_size: int, selected: Sequence[int] | None = None, start_row: int = 0
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], np.ndarray, slice | np.ndarray]]:
+        raw_columns: np.ndarray | None = None
+        features = np.empty((chunk_size, len(TOP_FEATURES)), dtype=self.feature_dtype)
+        for schema, rows, positions in self._iter_row_chunks(chunk_size, selected, start_row):
+            precomputed = take_rows(self.feature_matrix, positions, len(rows))
+            if precomputed is not None:
+                matrix = np.asarray(precomputed, dtype=self.feature_dtype)
+            else:
+                if raw_columns is None:
+                    raw_columns = schema.allocate(chunk_size)
+                # Buffers reutilizados entre bloques: las alertas solo guardan copias.
+                matrix = self._build_feature_matrix(schema.fill(rows, raw_columns), features[: len(rows)])
+            yield schema, rows, matrix, positions
+
+    def _iter_row_chunks(
+        self, chunk_size: int, selected: Sequence[int] | None = None, start_row: int = 0
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], slice | np.ndarray]]:
+        """
+        Bloques de filas válidas con sus posiciones (slice contiguo o array de
+        `selected`). Sin `selected`, el recorrido empieza en la fila `start_row`.
+        """
+
+        positions = None if selected is None else np.asarray(selected, dtype=np.int64)
+        offsets = self.row_offsets
+        if positions is not None and offsets is not None and (not positions.size or positions[-1] < len(offsets)):
+            yield from self._iter_rows_at(chunk_size, positions, offsets)
+            return
         with self.csv_path.open("r", encoding="utf-8", errors="ignore", newline="") as handle:
             buffer = io.StringIO(handle.read(), newline="")
             first_line = buffer.readline()
@@ -161,21 +276,69 @@ class FeatureCSVAdapter:
             if not raw_header:
                 return
             header = _normalize_header(raw_header)
-            for row in reader:
-                if not row:
-                    continue
-                normalized = row
-                if len(row) > len(header):
-                    normalized = row[: len(header)]
-                if len(normalized) < len(header):
-                    continue
-                yield dict(zip(header, normalized))
-
-    def _build_features(self, row: Dict[str, str]) -> Dict[str, float]:
-        features: Dict[str, float] = {}
-        for name in TOP_FEATURES:
-            features[name] = _safe_float(row.get(name), 0.0)
-        return features
+            schema = FeatureSchema(header, TOP_FEATURES)
+            width = len(header)
+            rows = (row for row in reader if row and len(row) >= width)
+            if positions is not None:
+                for chunk in iter_chunks(select_rows(rows, positions.tolist()), chunk_size):
+                    yield schema, [row for _, row in chunk], np.asarray([pos for pos, _ in chunk], dtype=np.int64)
+                return
+            if start_row:
+                rows = islice(rows, start_row, None)
+            offset = start_row
+            for chunk in iter_chunks(rows, chunk_size):
+                yield schema, chunk, slice(offset, offset + len(chunk))
+                offset += len(chunk)
+
+    def _read_header(self, handle) -> Tuple[bytes, str, List[str]]:
+        first_line = handle.readline()
+        text = first_line.decode("utf-8", errors="ignore")
+        delimiter = _detect_delimiter(text)
+        return first_line, delimiter, _normalize_header(next(csv.reader([text], delimiter=delimiter), []))
+
+    def _iter_rows_at(
+        self, chunk_size: int, positions: np.ndarray, offsets: np.ndarray
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], np.ndarray]]:
+        # Salto directo a cada fila: coste proporcional a las filas pedidas.
+        with self.csv_path.open("rb") as handle:
+            _, delimiter, header = self._read_header(handle)
+            if not header:
+                return
+            schema = FeatureSchema(header, TOP_FEATURES)
+            width = len(header)
+            for start in range(0, len(positions), chunk_size):
+                rows: List[List[str]] = []
+                kept: List[int] = []
+                for position in positions[start : start + chunk_size].tolist():
+                    handle.seek(int(offsets[position]))
+                    line = handle.readline().decode("utf-8", errors="ignore")
+                    row = next(csv.reader([line], delimiter=delimiter), None)
+                    if row and len(row) >= width:
+                        rows.append(row)
+                        kept.append(position)
+                if rows:
+                    yield schema, rows, np.asarray(kept, dtype=np.int64)
+
+    def scan_row_offsets(self) -> np.ndarray | None:
+        """Offset en bytes de cada fila válida, en el orden en que se leen."""
+
+        offsets: List[int] = []
+        with self.csv_path.open("rb") as handle:
+            first_line, delimiter, header = self._read_header(handle)
+            width = len(header)
+            position = len(first_line)
+            for raw in handle:
+                row = next(csv.reader([raw.decode("utf-8", errors="ignore")], delimiter=delimiter), None)
+                if row and len(row) >= width:
+                    offsets.append(position)
+                position += len(raw)
+        return np.asarray(offsets, dtype=np.int64)
+
+    def _build_feature_matrix(self, columns: Dict[str, np.ndarray], out: np.ndarray) -> np.ndarray:
+        for col_idx, name in enumerate(TOP_FEATURES):
+            values = columns.get(name)
+            out[:, col_idx] = 0.0 if values is None else _parse_feature_column(values)
+        return out
 
     def _build_alert(
         self,
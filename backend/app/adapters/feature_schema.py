@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Collection, Dict, List, Sequence
+
+import numpy as np
+
+
+class FeatureSchema:
+    """
+    Posiciones de las columnas de interés resueltas una sola vez por cabecera.
+
+    Las filas del CSV se leen como listas y `fill` copia solo esas columnas a
+    un buffer de objetos preasignado, sin crear un dict por fila. Con cabeceras
+    duplicadas gana la última aparición, igual que `dict(zip(header, row))`.
+    Las columnas de `numeric` (ya tipadas por el lector, None si no hay valor)
+    se devuelven como float64 con NaN, que el cálculo de features trata como vacío.
+    """
+
+    def __init__(self, header: Sequence[str], columns: Sequence[str], numeric: Collection[str] = ()):
+        self.header = list(header)
+        positions = {name: idx for idx, name in enumerate(self.header)}
+        self.columns: List[str] = [name for name in columns if name in positions]
+        self.indices: List[int] = [positions[name] for name in self.columns]
+        self._getter = itemgetter(*self.indices) if len(self.indices) > 1 else None
+        self.numeric = {name for name in self.columns if name in numeric}
+
+    def allocate(self, rows: int) -> np.ndarray:
+        return np.empty((max(1, rows), len(self.columns)), dtype=object)
+
+    def fill(self, rows: Sequence[Sequence], buffer: np.ndarray) -> Dict[str, np.ndarray]:
+        """Copia las columnas de `rows` a `buffer` y devuelve una vista por columna."""
+
+        view = buffer[: len(rows)]
+        if rows and self._getter is not None:
+            view[:] = [self._getter(row) for row in rows]
+        elif rows and self.indices:
+            view[:, 0] = [row[self.indices[0]] for row in rows]
+        return {
+            name: view[:, col_idx].astype(np.float64) if name in self.numeric else view[:, col_idx]
+            for col_idx, name in enumerate(self.columns)
+        }
+
+    def record(self, row: Sequence[str]) -> Dict[str, str]:
+        """Fila completa como dict; solo para las alertas que realmente se emiten."""
+
+        return dict(zip(self.header, row))
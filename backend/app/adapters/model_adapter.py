@@ -1,15 +1,36 @@
 from __future__ import annotations
 
+import logging
+import os
+import shutil
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple, TypeVar
 
 import joblib
 import numpy as np
 import pandas as pd
 
 from ..models import AttackTypeEnum, ModelLabelEnum
+from .compiled_forest import CompiledForest
+from .early_exit import EarlyExitEvaluator, SklearnForestView, TreeEnsemble
+from .prediction_cache import PredictionCache
 
+logger = logging.getLogger(__name__)
+
+
+T = TypeVar("T")
+
+DEFAULT_BATCH_SIZE = 256
+
+ENGINE_SKLEARN = "sklearn"
+ENGINE_COMPILED = "compiled"
+# Por encima de este tamaño el recorrido Cython de sklearn vuelve a ser más rápido.
+COMPILED_MAX_ROWS = 128
+
+# Tipos admitidos para las matrices de features; los árboles comparan en float32.
+FEATURE_DTYPES = {"float64": np.float64, "float32": np.float32}
 
 TOP_FEATURES: List[str] = [
     "duration",
@@ -38,6 +59,8 @@ CLASS_ID_TO_NAME = {
     5: "PORTSCAN",
 }
 
+BENIGN_CLASS_INDEX = 0
+
 
 CLASS_NAME_TO_ATTACK = {
     "BENIGN": AttackTypeEnum.benign,
@@ -49,25 +72,244 @@ CLASS_NAME_TO_ATTACK = {
 }
 
 
-@dataclass
 class ModelPrediction:
-    attack_type: AttackTypeEnum
-    model_label: ModelLabelEnum
-    model_score: float
-    class_index: int
-    class_name: str
-    probabilities: Dict[str, float]
+    """
+    Predicción de una fila.
+
+    Usa `__slots__` y conserva la fila de probabilidades como vista NumPy del
+    batch; el diccionario `probabilities` solo se construye al acceder a él
+    (al serializar a `meta` o JSON).
+    """
+
+    __slots__ = (
+        "attack_type",
+        "model_label",
+        "model_score",
+        "class_index",
+        "class_name",
+        "probability_row",
+    )
+
+    def __init__(
+        self,
+        class_index: int,
+        class_name: str,
+        model_score: float,
+        probability_row: np.ndarray,
+    ):
+        self.class_index = class_index
+        self.class_name = class_name
+        self.model_score = model_score
+        self.probability_row = probability_row
+        self.attack_type = CLASS_NAME_TO_ATTACK.get(class_name, AttackTypeEnum.dos)
+        self.model_label = (
+            ModelLabelEnum.benign if class_name == "BENIGN" else ModelLabelEnum.malicious
+        )
+
+    @property
+    def probabilities(self) -> Dict[str, float]:
+        return {
+            CLASS_ID_TO_NAME.get(col, str(col)): prob
+            for col, prob in enumerate(self.probability_row.tolist())
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ModelPrediction):
+            return NotImplemented
+        return (
+            self.class_index == other.class_index
+            and self.class_name == other.class_name
+            and self.model_score == other.model_score
+            and np.array_equal(self.probability_row, other.probability_row)
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return (
+            f"ModelPrediction(class_name={self.class_name!r}, "
+            f"model_score={self.model_score!r}, class_index={self.class_index!r})"
+        )
+
+
+@dataclass
+class BatchPrediction:
+    """Resultado columnar de `ModelAdapter.predict_batch` (una posición por fila)."""
+
+    class_indices: np.ndarray
+    scores: np.ndarray
+    class_names: List[str]
+    probabilities: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.class_names)
+
+    def __iter__(self) -> Iterator[ModelPrediction]:
+        for idx in range(len(self)):
+            yield self.prediction(idx)
+
+    @classmethod
+    def concat(cls, parts: Sequence["BatchPrediction"]) -> "BatchPrediction":
+        if len(parts) == 1:
+            return parts[0]
+        return cls(
+            class_indices=np.concatenate([part.class_indices for part in parts]),
+            scores=np.concatenate([part.scores for part in parts]),
+            class_names=[name for part in parts for name in part.class_names],
+            probabilities=np.concatenate([part.probabilities for part in parts]),
+        )
+
+    def slice(self, start: int, stop: int) -> "BatchPrediction":
+        return BatchPrediction(
+            class_indices=self.class_indices[start:stop],
+            scores=self.scores[start:stop],
+            class_names=self.class_names[start:stop],
+            probabilities=self.probabilities[start:stop],
+        )
+
+    def attack_type(self, idx: int) -> AttackTypeEnum:
+        """Tipo de ataque de la fila sin materializar la predicción completa."""
+
+        return CLASS_NAME_TO_ATTACK.get(self.class_names[idx], AttackTypeEnum.dos)
+
+    def prediction(self, idx: int) -> ModelPrediction:
+        return ModelPrediction(
+            class_index=int(self.class_indices[idx]),
+            class_name=self.class_names[idx],
+            model_score=float(self.scores[idx]),
+            probability_row=self.probabilities[idx],
+        )
+
+
+def iter_chunks(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Agrupa un iterable en listas de hasta `size` elementos."""
+
+    size = max(1, int(size))
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def select_rows(items: Iterable[T], positions: Sequence[int]) -> Iterator[Tuple[int, T]]:
+    """(posición, elemento) solo para `positions` (crecientes); deja de leer tras la última."""
+
+    wanted = iter(positions)
+    target = next(wanted, None)
+    if target is None:
+        return
+    for idx, item in enumerate(items):
+        if idx == target:
+            yield idx, item
+            target = next(wanted, None)
+            if target is None:
+                return
+
+
+def take_rows(source: np.ndarray | None, positions: slice | np.ndarray, n_rows: int) -> np.ndarray | None:
+    """Filas `positions` de una matriz por fila válida (sidecar); None si no está alineada."""
+
+    if source is None:
+        return None
+    if isinstance(positions, np.ndarray) and positions.size and positions[-1] >= source.shape[0]:
+        return None
+    taken = source[positions]
+    return taken if taken.shape[0] == n_rows else None
+
+
+def align_columns(matrix: np.ndarray, columns: Sequence[str], feature_names: Sequence[str]) -> np.ndarray:
+    """Reordena una matriz con `columns` al orden `feature_names` (0 en las ausentes)."""
+
+    if list(columns) == list(feature_names):
+        return matrix
+    positions = {name: idx for idx, name in enumerate(columns)}
+    aligned = np.zeros((matrix.shape[0], len(feature_names)), dtype=matrix.dtype)
+    for col_idx, name in enumerate(feature_names):
+        if name in positions:
+            aligned[:, col_idx] = matrix[:, positions[name]]
+    return aligned
+
+
+def _describe_process_rss() -> str:
+    """Resume VmRSS separando memoria anónima (privada) y mapeada a archivos (compartible)."""
+
+    try:
+        lines = Path("/proc/self/status").read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return "no disponible"
+    values = {}
+    for line in lines:
+        key, _, rest = line.partition(":")
+        if key in ("VmRSS", "RssAnon", "RssFile"):
+            values[key] = int(rest.split()[0]) / 1024
+    if "VmRSS" not in values:
+        return "no disponible"
+    return (
+        f"{values['VmRSS']:.1f} MB (anónima {values.get('RssAnon', 0.0):.1f} MB, "
+        f"archivos {values.get('RssFile', 0.0):.1f} MB)"
+    )
 
 
 class ModelAdapter:
     """Carga el modelo multiclase entrenado para CICIDS/Zeek y expone predict."""
 
-    def __init__(self, artifact_path: str | Path):
+    def __init__(
+        self,
+        artifact_path: str | Path,
+        engine: str = ENGINE_SKLEARN,
+        mmap: bool = False,
+    ):
         self.artifact_path = self._resolve_path(artifact_path)
         if not self.artifact_path.exists():
             raise FileNotFoundError(f"Modelo ML no encontrado: {self.artifact_path}")
-        loaded = joblib.load(self.artifact_path)
+        if engine.lower() not in (ENGINE_SKLEARN, ENGINE_COMPILED):
+            raise ValueError(f"Motor de inferencia desconocido: {engine}")
         self.feature_names = TOP_FEATURES.copy()
+        # float32 solo tras validar el artefacto con validate_feature_dtype.
+        self.feature_dtype = np.float64
+        self.model = None
+        self.compiled: CompiledForest | None = None
+        self.engine = ENGINE_SKLEARN
+        self.mmap = mmap
+        self.cache: PredictionCache | None = None
+        self.early_exit: EarlyExitEvaluator | None = None
+        self._early_exit_forest: TreeEnsemble | None = None
+        # Evaluador sombra opcional (services.shadow_model.ShadowEvaluator).
+        self.shadow = None
+        self.artifact_fingerprint = self._artifact_fingerprint()
+        self.version = "{}:{}:{}".format(
+            self.artifact_path.name,
+            self.artifact_fingerprint["source_size"],
+            self.artifact_fingerprint["source_mtime_ns"],
+        )
+        if not (mmap and self._load_mmap_sidecar()):
+            self._load_estimator()
+            if mmap:
+                self._build_mmap_sidecar()
+            elif engine.lower() == ENGINE_COMPILED:
+                self._compile()
+        footprint = self.footprint()
+        logger.info(
+            "Modelo %s cargado (motor=%s): %.1f MB %s; RSS del proceso %s",
+            self.artifact_path.name,
+            self.engine,
+            footprint["bytes"] / (1024 * 1024),
+            "mapeados en memoria compartida" if footprint["shared"] else "privados del proceso",
+            _describe_process_rss(),
+        )
+
+    @property
+    def mmap_sidecar_path(self) -> Path:
+        return self.artifact_path.with_name(f"{self.artifact_path.name}.mmap")
+
+    def _artifact_fingerprint(self) -> Dict[str, int]:
+        stat = self.artifact_path.stat()
+        return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+    def _load_estimator(self) -> None:
+        loaded = joblib.load(self.artifact_path)
         if isinstance(loaded, dict):
             estimator = loaded.get("model")
             if estimator is None:
@@ -81,6 +323,86 @@ class ModelAdapter:
             raise ValueError("El modelo cargado no implementa predict_proba().")
         self.model = estimator
 
+    def _load_mmap_sidecar(self) -> bool:
+        sidecar = self.mmap_sidecar_path
+        meta = CompiledForest.read_meta(sidecar)
+        if not meta:
+            return False
+        fingerprint = self._artifact_fingerprint()
+        if any(meta.get(key) != value for key, value in fingerprint.items()):
+            logger.info("Sidecar mmap desactualizado para %s; se regenera", self.artifact_path.name)
+            return False
+        try:
+            self.compiled = CompiledForest.load(sidecar, mmap_mode="r")
+        except (OSError, ValueError) as exc:
+            logger.warning("No se pudo abrir el sidecar mmap %s: %s", sidecar, exc)
+            return False
+        self.feature_names = [str(name) for name in meta.get("feature_names") or self.feature_names]
+        self.engine = ENGINE_COMPILED
+        return True
+
+    def _build_mmap_sidecar(self) -> None:
+        """Vuelca el bosque aplanado a .npy y lo reabre con mmap, liberando el estimador."""
+
+        self._compile()
+        if self.compiled is None:
+            return
+        sidecar = self.mmap_sidecar_path
+        staging = sidecar.with_name(f"{sidecar.name}.tmp-{os.getpid()}")
+        try:
+            self.compiled.save(
+                staging,
+                extra_meta={"feature_names": self.feature_names, **self._artifact_fingerprint()},
+            )
+            if sidecar.exists():
+                shutil.rmtree(sidecar, ignore_errors=True)
+            os.replace(staging, sidecar)
+        except OSError as exc:
+            # Otro worker pudo publicarlo primero, o el directorio es de solo lectura.
+            shutil.rmtree(staging, ignore_errors=True)
+            if not sidecar.exists():
+                logger.warning("No se pudo escribir el sidecar mmap %s: %s", sidecar, exc)
+                return
+        if self._load_mmap_sidecar():
+            # Las predicciones salen del bosque mapeado; no conservamos la copia privada.
+            self.model = None
+
+    def footprint(self) -> Dict[str, int | bool]:
+        """Bytes de los arreglos del modelo y si están compartidos vía mmap."""
+
+        if self.compiled is not None and self.model is None:
+            return {"bytes": self.compiled.nbytes, "shared": self.compiled.memory_mapped}
+        total = self.compiled.nbytes if self.compiled is not None else 0
+        trees = getattr(self.model, "estimators_", None)
+        for tree in trees if isinstance(trees, list) else []:
+            state = tree.tree_.__getstate__() if hasattr(tree, "tree_") else {}
+            total += sum(
+                getattr(state.get(key), "nbytes", 0) for key in ("nodes", "values")
+            )
+        return {"bytes": int(total), "shared": False}
+
+    def _compile(self) -> None:
+        try:
+            compiled = CompiledForest.from_estimator(self.model)
+        except ValueError as exc:
+            logger.warning("Motor compilado no disponible (%s); se usa predict_proba de sklearn", exc)
+            return
+        if compiled.n_features != len(self.feature_names):
+            logger.warning(
+                "El bosque espera %s features pero el artefacto declara %s; se usa sklearn",
+                compiled.n_features,
+                len(self.feature_names),
+            )
+            return
+        self.compiled = compiled
+        self.engine = ENGINE_COMPILED
+        logger.info(
+            "Bosque compilado: %s árboles, %s nodos, profundidad máxima %s",
+            compiled.n_trees,
+            compiled.n_nodes,
+            compiled.max_depth,
+        )
+
     def _resolve_path(self, raw_path: str | Path) -> Path:
         path = Path(raw_path)
         if path.is_absolute() and path.exists():
@@ -100,30 +422,132 @@ class ModelAdapter:
 
         return path.resolve()
 
-    def _vectorize(self, features: Dict[str, float]):
-        row = {name: float(features.get(name, 0.0) or 0.0) for name in self.feature_names}
-        return pd.DataFrame([row], columns=self.feature_names)
+    def _vectorize(self, features: Mapping[str, float]) -> np.ndarray:
+        row = np.empty((1, len(self.feature_names)), dtype=self.feature_dtype)
+        for col_idx, name in enumerate(self.feature_names):
+            row[0, col_idx] = float(features.get(name, 0.0) or 0.0)
+        return row
 
-    def predict(self, features: Dict[str, float]) -> ModelPrediction:
-        vector = self._vectorize(features)
-        probabilities = self.model.predict_proba(vector)[0]
-        predicted_idx = int(np.argmax(probabilities))
-        class_name = CLASS_ID_TO_NAME.get(predicted_idx, str(predicted_idx))
-        attack_type = CLASS_NAME_TO_ATTACK.get(class_name, AttackTypeEnum.dos)
-        prob_map = {
-            CLASS_ID_TO_NAME.get(idx, str(idx)): float(prob)
-            for idx, prob in enumerate(probabilities)
+    def vectorize_batch(self, rows: Sequence[Mapping[str, float]]) -> pd.DataFrame:
+        """Ordena varias filas de features en una matriz N×F con las columnas del modelo."""
+
+        matrix = np.zeros((len(rows), len(self.feature_names)), dtype=self.feature_dtype)
+        for row_idx, features in enumerate(rows):
+            for col_idx, name in enumerate(self.feature_names):
+                matrix[row_idx, col_idx] = float(features.get(name, 0.0) or 0.0)
+        return pd.DataFrame(matrix, columns=self.feature_names)
+
+    def to_matrix(self, matrix: np.ndarray | pd.DataFrame) -> np.ndarray:
+        """Normaliza un bloque de entrada a un ndarray N×F en el orden del modelo."""
+
+        if isinstance(matrix, pd.DataFrame):
+            frame = matrix.reindex(columns=self.feature_names, fill_value=0.0)
+            return frame.fillna(0.0).to_numpy(dtype=self.feature_dtype)
+        array = np.asarray(matrix, dtype=self.feature_dtype)
+        if array.ndim == 1:
+            array = array.reshape(1, -1)
+        if array.ndim != 2 or array.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Se esperaba una matriz N×{len(self.feature_names)}, se recibió {array.shape}"
+            )
+        return array
+
+    def predict_batch(self, matrix: np.ndarray | pd.DataFrame) -> BatchPrediction:
+        """Puntúa un bloque de filas en una sola llamada a predict_proba."""
+
+        array = self.to_matrix(matrix)
+        if array.shape[0] == 0:
+            return BatchPrediction(
+                class_indices=np.zeros(0, dtype=np.int64),
+                scores=np.zeros(0, dtype=float),
+                class_names=[],
+                probabilities=np.zeros((0, len(CLASS_ID_TO_NAME)), dtype=float),
+            )
+        # La salida temprana da probabilidades aproximadas: no se mezclan con las exactas en la cache.
+        # Los lotes grandes (seed, ingesta, pool) no la usan: pagarían claves y búsquedas por fila.
+        if self.cache is not None and self.early_exit is None and array.shape[0] <= COMPILED_MAX_ROWS:
+            probabilities = self.cache.get_or_compute(self.version, array, self.predict_proba)
+        else:
+            probabilities = self.predict_proba(array)
+        batch = self.batch_from_probabilities(probabilities)
+        if self.shadow is not None:
+            self.shadow.submit(array, self.feature_names, batch, self.version)
+        return batch
+
+    def validate_feature_dtype(
+        self,
+        matrix: np.ndarray,
+        dtype=np.float32,
+        tolerance: float = 0.0,
+    ) -> Dict[str, float | int | bool | str]:
+        """
+        Compara las probabilidades de `matrix` convertida a `dtype` con las de
+        float64. Solo es válida si coinciden todas las clases, la diferencia
+        máxima no supera `tolerance` y ningún valor finito se desborda.
+        """
+
+        reference = np.asarray(matrix, dtype=np.float64)
+        converted = reference.astype(dtype)
+        overflow = int((np.isfinite(reference) & ~np.isfinite(converted)).sum())
+        rows = reference.shape[0]
+        if rows == 0 or overflow:
+            return {"dtype": np.dtype(dtype).name, "rows": int(rows), "overflow_values": overflow, "ok": False}
+        expected = self.predict_proba(reference)
+        got = self.predict_proba(converted)
+        agreement = float((np.argmax(expected, axis=1) == np.argmax(got, axis=1)).mean())
+        max_abs_diff = float(np.abs(expected - got).max())
+        return {
+            "dtype": np.dtype(dtype).name,
+            "rows": int(rows),
+            "class_agreement": agreement,
+            "max_abs_diff": max_abs_diff,
+            "overflow_values": overflow,
+            "ok": agreement == 1.0 and max_abs_diff <= tolerance and overflow == 0,
         }
-        benign_prob = prob_map.get("BENIGN", 0.0)
-        malicious_prob = float(max(0.0, min(0.999, 1.0 - benign_prob)))
-        model_label = (
-            ModelLabelEnum.benign if class_name == "BENIGN" else ModelLabelEnum.malicious
-        )
-        return ModelPrediction(
-            attack_type=attack_type,
-            model_label=model_label,
-            model_score=malicious_prob,
-            class_index=predicted_idx,
-            class_name=class_name,
-            probabilities=prob_map,
+
+    def enable_early_exit(self, evaluator: EarlyExitEvaluator) -> bool:
+        """
+        Activa la evaluación con salida temprana. Con el estimador en memoria se
+        recorren sus árboles nativos (más rápidos en batches grandes); con solo el
+        sidecar mmap se usa el bosque compilado.
+        """
+
+        forest: TreeEnsemble | None = self.compiled
+        if self.model is not None:
+            try:
+                forest = SklearnForestView(self.model)
+            except ValueError as exc:
+                logger.warning("Salida temprana no disponible para %s: %s", self.artifact_path.name, exc)
+                return False
+        if forest is None:
+            return False
+        self._early_exit_forest = forest
+        self.early_exit = evaluator
+        return True
+
+    def predict_proba(self, array: np.ndarray) -> np.ndarray:
+        if self.early_exit is not None and self._early_exit_forest is not None:
+            return self.early_exit.predict_proba(self._early_exit_forest, array)
+        if self.compiled is not None and (self.model is None or array.shape[0] <= COMPILED_MAX_ROWS):
+            return self.compiled.predict_proba(array)
+        frame = pd.DataFrame(array, columns=self.feature_names)
+        return np.asarray(self.model.predict_proba(frame), dtype=float)
+
+    @staticmethod
+    def batch_from_probabilities(probabilities: np.ndarray) -> BatchPrediction:
+        class_indices = np.argmax(probabilities, axis=1)
+        class_names = [CLASS_ID_TO_NAME.get(int(idx), str(int(idx))) for idx in class_indices]
+        if BENIGN_CLASS_INDEX < probabilities.shape[1]:
+            benign_prob = probabilities[:, BENIGN_CLASS_INDEX]
+        else:
+            benign_prob = np.zeros(probabilities.shape[0], dtype=float)
+        scores = np.clip(1.0 - benign_prob, 0.0, 0.999)
+        return BatchPrediction(
+            class_indices=class_indices,
+            scores=scores,
+            class_names=class_names,
+            probabilities=probabilities,
         )
+
+    def predict(self, features: Dict[str, float]) -> ModelPrediction:
+        return self.predict_batch(self._vectorize(features)).prediction(0)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Cache LRU de probabilidades indexada por el vector de features.
+
+    La clave son la versión del modelo y los bytes del vector (exacto, o
+    redondeado a `quantize_digits` cifras significativas), así que flujos
+    idénticos de un escaneo o una inundación se puntúan una sola vez. Solo se
+    guardan entradas de la versión activa: al sustituir el modelo el registro
+    llama a `clear(version)` y las llamadas que aún van con la versión anterior
+    se puntúan sin pasar por la cache.
+    """
+
+    def __init__(self, maxsize: int = 4096, quantize_digits: int | None = None):
+        self.maxsize = max(1, maxsize)
+        self.quantize_digits = quantize_digits if quantize_digits and quantize_digits > 0 else None
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._version: str | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self, version: str | None = None) -> None:
+        """Vacía la cache; con `version`, esa pasa a ser la única que se guarda."""
+
+        with self._lock:
+            if self._entries or (version is not None and self._version not in (None, version)):
+                self.invalidations += 1
+            self._entries.clear()
+            if version is not None:
+                self._version = version
+
+    def stats(self) -> Dict[str, float | int | str | None]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self._version,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "quantize_digits": self.quantize_digits,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+    def _keys(self, version: str, matrix: np.ndarray) -> List[bytes]:
+        keyed = np.ascontiguousarray(matrix, dtype=np.float64)
+        if self.quantize_digits:
+            magnitude = np.floor(np.log10(np.abs(keyed), where=keyed != 0, out=np.zeros_like(keyed)))
+            scale = np.power(10.0, magnitude - self.quantize_digits + 1)
+            keyed = np.round(keyed / scale) * scale
+        # -0.0 y 0.0 deben compartir clave.
+        keyed = keyed + 0.0
+        prefix = version.encode("utf-8") + b"\0"
+        return [prefix + row.tobytes() for row in keyed]
+
+    def get_or_compute(
+        self,
+        version: str,
+        matrix: np.ndarray,
+        compute: Callable[[np.ndarray], np.ndarray],
+    ) -> np.ndarray:
+        """Devuelve las probabilidades de cada fila, puntuando solo las filas no vistas."""
+
+        with self._lock:
+            if self._version is None:
+                self._version = version
+            current = self._version
+        if version != current:
+            # Modelo ya sustituido (o distinto del activo): no se mezclan sus entradas.
+            return compute(matrix)
+
+        keys = self._keys(version, matrix)
+        cached: Dict[int, np.ndarray] = {}
+        pending: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for idx, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    cached[idx] = entry
+                else:
+                    pending.setdefault(key, []).append(idx)
+            self.hits += len(cached)
+            self.misses += len(keys) - len(cached)
+
+        computed = None
+        if pending:
+            # Las filas repetidas dentro del mismo bloque se puntúan una vez.
+            first_rows = [rows[0] for rows in pending.values()]
+            computed = compute(matrix[first_rows])
+
+        n_classes = computed.shape[1] if computed is not None else next(iter(cached.values())).shape[0]
+        probabilities = np.empty((len(keys), n_classes), dtype=np.float64)
+        for idx, entry in cached.items():
+            probabilities[idx] = entry
+        if computed is None:
+            return probabilities
+
+        with self._lock:
+            # Si el modelo se sustituyó mientras se puntuaba, el resultado no se guarda.
+            store = version == self._version
+            for (key, rows), proba in zip(pending.items(), computed):
+                probabilities[rows] = proba
+                if store:
+                    self._entries[key] = proba.copy()
+                    self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return probabilities
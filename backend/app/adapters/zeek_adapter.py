@@ -1,16 +1,30 @@
 from __future__ import annotations
 
-import csv
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, List, Optional
+from typing import Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from ..models import AttackTypeEnum, ProtocolEnum, SeverityEnum
 from ..schemas import AlertCreate
 from ..services.alerts_service import AlertsService
 from ..services.generators.synthetic_generator import SEVERITY_FLOOR, SEVERITY_WEIGHT
-from ..services.feature_bridge import build_conn_feature_vector
-from .model_adapter import ModelAdapter, ModelPrediction
+from ..services.feature_bridge import CONN_FEATURE_COLUMNS, build_conn_feature_matrix
+from ..services.host_windows import HOST_WINDOW_COLUMNS, HostWindowTracker
+from .feature_schema import FeatureSchema
+from .model_adapter import (
+    DEFAULT_BATCH_SIZE,
+    TOP_FEATURES,
+    ModelAdapter,
+    ModelPrediction,
+    align_columns,
+    iter_chunks,
+    select_rows,
+    take_rows,
+)
+from .zeek_log_reader import ZeekLogReader
 
 
 def _safe_float(value: Optional[str], default: float = 0.0) -> float:
@@ -37,13 +51,39 @@ PROTOCOL_MAP = {
 
 
 class ZeekAdapter:
-    """Lee un CSV estilo `conn.log`, calcula features y emite AlertCreate."""
+    """
+    Lee un `conn.log` (TSV nativo, JSON o CSV exportado, también `.gz`),
+    calcula features y emite AlertCreate.
+    """
 
-    def __init__(self, csv_path: str | Path, model_adapter: ModelAdapter):
-        self.csv_path = self._resolve_path(csv_path)
-        if not self.csv_path.exists():
+    def __init__(
+        self,
+        csv_path: str | Path | None,
+        model_adapter: ModelAdapter,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        feature_matrix: np.ndarray | None = None,
+        feature_dtype=None,
+        host_windows: HostWindowTracker | None = None,
+        row_offsets: np.ndarray | None = None,
+        window_matrix: np.ndarray | None = None,
+    ):
+        # Sin ruta solo puntúa filas ya leídas (`alerts_from_rows`), p. ej. las del tail de un log vivo.
+        self.csv_path = self._resolve_path(csv_path) if csv_path is not None else None
+        if self.csv_path is not None and not self.csv_path.exists():
             raise FileNotFoundError(f"Archivo Zeek no encontrado: {self.csv_path}")
         self.model_adapter = model_adapter
+        self.batch_size = max(1, batch_size)
+        # Matriz precalculada (sidecar .npy mapeado) alineada con las filas válidas del CSV.
+        self.feature_matrix = feature_matrix
+        # Por defecto el tipo validado del modelo (float32 o float64).
+        self.feature_dtype = np.dtype(feature_dtype or getattr(model_adapter, "feature_dtype", np.float64))
+        # Ventanas por IP origen: se actualizan con cada flujo leído, se emita o no alerta.
+        self.host_windows = host_windows
+        # Del índice de clases del dataset: offset en bytes y features de ventana de
+        # cada fila válida, para leer filas sueltas sin recorrer el archivo.
+        self.row_offsets = row_offsets
+        self.window_matrix = window_matrix
+        self._window_schema: FeatureSchema | None = None
 
     def _resolve_path(self, raw_path: str | Path) -> Path:
         path = Path(raw_path)
@@ -75,50 +115,255 @@ class ZeekAdapter:
         self,
         limit: int | None = None,
         attack_type: AttackTypeEnum | None = None,
+        start_row: int = 0,
+        rows: Sequence[int] | None = None,
     ) -> Iterator[AlertCreate]:
+        """
+        Alertas de las filas válidas a partir de la fila `start_row` (0 = desde el
+        inicio). Con `rows` (posiciones crecientes, p. ej. del índice de clases)
+        solo se leen y puntúan esas filas; si al repuntuarlas alguna ya no es del
+        tipo pedido, se completa con un recorrido filtrado tras la última de `rows`.
+        """
+
         emitted = 0
-        for row in self._iter_rows():
-            features = self._build_features(row)
-            prediction = self.model_adapter.predict(features)
-            alert = self._build_alert(row, features, prediction)
-            if attack_type and alert.attack_type != attack_type:
-                continue
+        for alert in self._iterate_alerts(limit, attack_type, start_row, rows):
             yield alert
             emitted += 1
-            if limit and emitted >= limit:
-                break
-
-    def _iter_rows(self) -> Iterable[Dict[str, str]]:
-        with self.csv_path.open(newline="", encoding="utf-8") as handle:
-            reader = csv.reader(handle)
-            raw_header = next(reader, None)
-            if not raw_header:
+        # El índice puede discrepar del modelo actual (salida temprana, float32, recarga).
+        if rows is not None and attack_type and limit and emitted < min(limit, len(rows)):
+            resume = max(start_row, int(rows[-1]) + 1)
+            yield from self._iterate_alerts(limit - emitted, attack_type, resume)
+
+    def _iterate_alerts(
+        self,
+        limit: int | None,
+        attack_type: AttackTypeEnum | None,
+        start_row: int = 0,
+        rows: Sequence[int] | None = None,
+    ) -> Iterator[AlertCreate]:
+        emitted = 0
+        # Sin filtro por tipo basta con puntuar las filas que se van a emitir.
+        chunk_size = self.batch_size
+        if limit and (not attack_type or rows is not None):
+            chunk_size = min(chunk_size, limit)
+        for schema, chunk, matrix, positions in self._iter_feature_chunks(chunk_size, start_row, rows):
+            for alert in self._score_chunk(schema, chunk, matrix, attack_type, positions):
+                yield alert
+                emitted += 1
+                if limit and emitted >= limit:
+                    return
+
+    def alerts_from_rows(
+        self,
+        header: Sequence[str],
+        rows: Sequence[List[str]],
+        numeric: Collection[str] = (),
+    ) -> Iterator[AlertCreate]:
+        """
+        Puntúa filas ya separadas en campos (p. ej. las que lee ZeekTailer de un
+        log vivo); `numeric` son las columnas que el lector ya tipó. Con
+        `window_matrix` (de `observe_rows` sobre las mismas filas) las ventanas
+        por host se toman de ahí y no se vuelven a contar.
+        """
+
+        schema, valid = self._valid_rows(header, rows, numeric)
+        start = 0
+        for chunk in iter_chunks(valid, self.batch_size):
+            features = np.empty((len(chunk), len(TOP_FEATURES)), dtype=self.feature_dtype)
+            matrix = build_conn_feature_matrix(schema.fill(chunk, schema.allocate(len(chunk))), out=features)
+            positions = slice(start, start + len(chunk)) if self.window_matrix is not None else None
+            yield from self._score_chunk(schema, chunk, matrix, positions=positions)
+            start += len(chunk)
+
+    def observe_rows(
+        self,
+        header: Sequence[str],
+        rows: Sequence[List[str]],
+        numeric: Collection[str] = (),
+    ) -> np.ndarray | None:
+        """
+        Cuenta las filas válidas en el tracker de ventanas y devuelve sus
+        features (None sin tracker), para puntuarlas después con `window_matrix`.
+        """
+
+        if self.host_windows is None:
+            return None
+        schema, valid = self._valid_rows(header, rows, numeric)
+        return self._host_window_features(schema, valid)
+
+    def _valid_rows(
+        self,
+        header: Sequence[str],
+        rows: Sequence[List[str]],
+        numeric: Collection[str],
+    ) -> Tuple[FeatureSchema, List[List[str]]]:
+        schema = FeatureSchema(self._normalize_header(list(header)), CONN_FEATURE_COLUMNS, numeric=numeric)
+        width = len(schema.header)
+        return schema, [row for row in rows if row and len(row) >= width]
+
+    def iter_model_inputs(
+        self, chunk_size: int | None = None
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], np.ndarray, np.ndarray | None]]:
+        """
+        Por bloque de filas válidas: esquema, filas, entrada del modelo (columnas
+        ya alineadas) y features de ventana (None sin tracker). Avanza el tracker.
+        """
+
+        for schema, rows, matrix, positions in self._iter_feature_chunks(chunk_size or self.batch_size):
+            window = self._host_window_features(schema, rows, positions)
+            yield schema, rows, self._model_input(matrix, window), window
+
+    def _score_chunk(
+        self,
+        schema: FeatureSchema,
+        rows: List[List[str]],
+        matrix: np.ndarray,
+        attack_type: AttackTypeEnum | None = None,
+        positions: slice | np.ndarray | None = None,
+    ) -> Iterator[AlertCreate]:
+        window = self._host_window_features(schema, rows, positions)
+        batch = self.model_adapter.predict_batch(self._model_input(matrix, window))
+        for idx, row in enumerate(rows):
+            if attack_type and batch.attack_type(idx) != attack_type:
+                continue
+            feature_subset = dict(zip(TOP_FEATURES, matrix[idx].tolist()))
+            host_window = None
+            if window is not None:
+                host_window = dict(zip(self.host_windows.feature_names, window[idx].tolist()))
+            yield self._build_alert(schema.record(row), feature_subset, batch.prediction(idx), host_window)
+
+    def _host_window_features(
+        self,
+        schema: FeatureSchema,
+        rows: List[List[str]],
+        positions: slice | np.ndarray | None = None,
+    ) -> np.ndarray | None:
+        if self.host_windows is None:
+            return None
+        if positions is not None:
+            # Valores precalculados en una pasada completa: iguales a observar el archivo entero.
+            precomputed = take_rows(self.window_matrix, positions, len(rows))
+            if precomputed is not None and precomputed.shape[1] == len(self.host_windows.feature_names):
+                return np.asarray(precomputed, dtype=np.float64)
+        if self._window_schema is None or self._window_schema.header != schema.header:
+            self._window_schema = FeatureSchema(schema.header, HOST_WINDOW_COLUMNS)
+        columns = self._window_schema.fill(rows, self._window_schema.allocate(len(rows)))
+        return self._observe_host_windows(columns, len(rows))
+
+    def _observe_host_windows(self, columns: Dict[str, np.ndarray], n_rows: int) -> np.ndarray:
+        missing = [None] * n_rows
+        return self.host_windows.observe_batch(
+            columns.get("ts", missing),
+            columns.get("id.orig_h", missing),
+            columns.get("id.resp_h", missing),
+            columns.get("id.resp_p", missing),
+        )
+
+    def _model_input(self, matrix: np.ndarray, window: np.ndarray | None) -> np.ndarray:
+        feature_names = self.model_adapter.feature_names
+        # Las features de ventana solo entran al modelo si el artefacto las declara.
+        if window is not None and not set(self.host_windows.feature_names).isdisjoint(feature_names):
+            columns = TOP_FEATURES + self.host_windows.feature_names
+            return align_columns(np.hstack([matrix, window]), columns, feature_names)
+        return align_columns(matrix, TOP_FEATURES, feature_names)
+
+    def iter_feature_matrices(self, chunk_size: int | None = None) -> Iterator[np.ndarray]:
+        """
+        Matrices de features (orden TOP_FEATURES) de todas las filas válidas, por
+        bloques. El buffer se reutiliza entre bloques: copiarlo si hay que guardarlo.
+        """
+
+        for _, _, matrix, _ in self._iter_feature_chunks(chunk_size or self.batch_size):
+            yield matrix
+
+    def _iter_feature_chunks(
+        self, chunk_size: int, start_row: int = 0, selected: Sequence[int] | None = None
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], np.ndarray, slice | np.ndarray]]:
+        raw_columns: np.ndarray | None = None
+        features = np.empty((chunk_size, len(TOP_FEATURES)), dtype=self.feature_dtype)
+        for schema, rows, positions in self._iter_row_chunks(chunk_size, start_row, selected):
+            precomputed = take_rows(self.feature_matrix, positions, len(rows))
+            if precomputed is not None:
+                matrix = np.asarray(precomputed, dtype=self.feature_dtype)
+            else:
+                if raw_columns is None:
+                    raw_columns = schema.allocate(chunk_size)
+                # Buffers reutilizados entre bloques: las alertas solo guardan copias.
+                matrix = build_conn_feature_matrix(
+                    schema.fill(rows, raw_columns), out=features[: len(rows)]
+                )
+            yield schema, rows, matrix, positions
+
+    def _iter_row_chunks(
+        self, chunk_size: int, start_row: int = 0, selected: Sequence[int] | None = None
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], slice | np.ndarray]]:
+        """Bloques de filas válidas con sus posiciones (slice contiguo o array de `selected`)."""
+
+        with ZeekLogReader(self.csv_path, block_rows=chunk_size) as reader:
+            if not reader.header:
+                return
+            schema = FeatureSchema(reader.header, CONN_FEATURE_COLUMNS, numeric=reader.numeric_columns)
+            width = len(reader.header)
+            if selected is not None:
+                positions = np.asarray(selected, dtype=np.int64)
+                positions = positions[positions >= start_row]
+                yield from self._iter_selected_chunks(reader, schema, positions, chunk_size)
                 return
-            header = self._normalize_header(raw_header)
-            for row in reader:
-                if not row:
-                    continue
-                if len(row) < len(header):
-                    continue
-                yield dict(zip(header, row))
+            rows = (row for row in reader.rows() if row and len(row) >= width)
+            if start_row:
+                rows = islice(rows, start_row, None)
+            offset = start_row
+            for chunk in iter_chunks(rows, chunk_size):
+                yield schema, chunk, slice(offset, offset + len(chunk))
+                offset += len(chunk)
+
+    def _iter_selected_chunks(
+        self,
+        reader: ZeekLogReader,
+        schema: FeatureSchema,
+        positions: np.ndarray,
+        chunk_size: int,
+    ) -> Iterator[Tuple[FeatureSchema, List[List[str]], np.ndarray]]:
+        offsets = self.row_offsets
+        if offsets is not None and (not positions.size or positions[-1] < len(offsets)):
+            # Salto directo a cada fila: coste proporcional a las filas pedidas.
+            for start in range(0, len(positions), chunk_size):
+                part = positions[start : start + chunk_size]
+                pairs = [
+                    (position, row)
+                    for position, row in zip(part.tolist(), reader.rows_at(offsets[part]))
+                    if row is not None
+                ]
+                if pairs:
+                    yield schema, [row for _, row in pairs], np.asarray([pos for pos, _ in pairs], dtype=np.int64)
+            return
+        # Sin offsets (p. ej. .gz): se lee en orden, pero solo se puntúan las filas pedidas.
+        width = len(schema.header)
+        rows = (row for row in reader.rows() if row and len(row) >= width)
+        for chunk in iter_chunks(select_rows(rows, positions.tolist()), chunk_size):
+            yield schema, [row for _, row in chunk], np.asarray([pos for pos, _ in chunk], dtype=np.int64)
+
+    def scan_row_offsets(self) -> np.ndarray | None:
+        """Offset en bytes de cada fila válida (None si el archivo no admite saltos)."""
+
+        with ZeekLogReader(self.csv_path) as reader:
+            return reader.row_offsets()
 
     def _normalize_header(self, raw_header: List[str]) -> List[str]:
         if raw_header and raw_header[0].startswith("#fields"):
             return raw_header[1:]
         return raw_header
 
-    def _build_features(self, row: Dict[str, str]) -> Dict[str, float]:
-        return build_conn_feature_vector(row)
-
     def _build_alert(
         self,
-        row: Dict[str, str],
+        row: Dict[str, object],
         feature_subset: Dict[str, float],
         prediction: ModelPrediction,
+        host_window: Dict[str, float] | None = None,
     ) -> AlertCreate:
         timestamp = datetime.utcfromtimestamp(_safe_float(row.get("ts")))
-        src_ip = row.get("id.orig_h", "0.0.0.0")
-        dst_ip = row.get("id.resp_h", "0.0.0.0")
+        src_ip = row.get("id.orig_h") or "0.0.0.0"
+        dst_ip = row.get("id.resp_h") or "0.0.0.0"
         src_port = _safe_int(row.get("id.orig_p"))
         dst_port = _safe_int(row.get("id.resp_p"))
 
@@ -126,7 +371,7 @@ class ZeekAdapter:
         protocol = PROTOCOL_MAP.get(proto_raw, ProtocolEnum.other)
 
         severity = self._map_severity(prediction.model_score, prediction.attack_type)
-        rule_id = f"ZEEK-{row.get('uid', 'NA')}"
+        rule_id = f"ZEEK-{row.get('uid') or 'NA'}"
         rule_name = f"Zeek {prediction.class_name}"
 
         meta = {
@@ -137,6 +382,8 @@ class ZeekAdapter:
                 "class_index": prediction.class_index,
             },
         }
+        if host_window is not None:
+            meta["host_window"] = host_window
 
         return AlertCreate(
             timestamp=timestamp,
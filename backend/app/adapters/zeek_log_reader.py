@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import math
+from datetime import datetime
+from itertools import chain, islice
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Sequence, TextIO
+
+import numpy as np
+
+from .model_adapter import iter_chunks
+
+FORMAT_TSV = "tsv"
+FORMAT_JSON = "json"
+FORMAT_CSV = "csv"
+
+DEFAULT_BLOCK_ROWS = 4096
+GZIP_MAGIC = b"\x1f\x8b"
+# Extensiones de logs nativos (además de cualquier `.gz` de rotación).
+ZEEK_LOG_SUFFIXES = (".log", ".json", ".ndjson")
+
+INTEGER_TYPES = {"count", "int", "port"}
+FLOAT_TYPES = {"time", "interval", "double"}
+NUMERIC_TYPES = INTEGER_TYPES | FLOAT_TYPES
+CONTAINER_PREFIXES = ("set[", "vector[", "table[")
+
+# Tipos de conn.log; el JSON de Zeek no trae `#types` y omite los campos sin valor.
+CONN_LOG_TYPES: Dict[str, str] = {
+    "ts": "time",
+    "uid": "string",
+    "id.orig_h": "addr",
+    "id.orig_p": "port",
+    "id.resp_h": "addr",
+    "id.resp_p": "port",
+    "proto": "enum",
+    "service": "string",
+    "duration": "interval",
+    "orig_bytes": "count",
+    "resp_bytes": "count",
+    "conn_state": "string",
+    "local_orig": "bool",
+    "local_resp": "bool",
+    "missed_bytes": "count",
+    "history": "string",
+    "orig_pkts": "count",
+    "orig_ip_bytes": "count",
+    "resp_pkts": "count",
+    "resp_ip_bytes": "count",
+    "tunnel_parents": "set[string]",
+}
+
+Converter = Callable[[Sequence], list]
+
+
+def decode_separator(value: str) -> str:
+    # Zeek escribe "#separator \x09".
+    if value.startswith("\\x"):
+        try:
+            return chr(int(value[2:], 16))
+        except ValueError:
+            return "\t"
+    return value or "\t"
+
+
+def is_native_zeek_log(path: Path) -> bool:
+    """Log de Zeek sin exportar (por extensión): `.log`, `.json`, `.ndjson` o rotación `.gz`."""
+
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        return len(suffixes) == 1 or suffixes[-2] != ".csv"
+    return bool(suffixes) and suffixes[-1] in ZEEK_LOG_SUFFIXES
+
+
+def is_dataset_file(path: Path) -> bool:
+    """CSV exportado o log nativo de Zeek (conn.log, JSON, rotaciones `.gz`)."""
+
+    return path.is_file() and (path.suffix.lower() == ".csv" or is_native_zeek_log(path))
+
+
+def is_gzip(path: Path) -> bool:
+    with path.open("rb") as probe:
+        return probe.read(2) == GZIP_MAGIC
+
+
+def open_zeek_text(path: Path) -> TextIO:
+    """Abre en modo texto, descomprimiendo gzip según la cabecera mágica (no la extensión)."""
+
+    if is_gzip(path):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return path.open("r", encoding="utf-8", errors="replace", newline="")
+
+
+def _parse_number(value, integer: bool):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if integer else float(value)
+    text = str(value).strip()
+    try:
+        return int(text) if integer else float(text)
+    except ValueError:
+        pass
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    if not math.isfinite(number):
+        return None
+    return int(number) if integer else number
+
+
+def _parse_time(value):
+    if isinstance(value, str):
+        number = _parse_number(value, integer=False)
+        if number is not None:
+            return number
+        # JSON con LogAscii::json_timestamps=JSON::TS_ISO8601.
+        try:
+            return datetime.fromisoformat(value.strip().replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return _parse_number(value, integer=False)
+
+
+class ZeekLogReader:
+    """
+    Lee en streaming un log de Zeek y devuelve filas con valores ya tipados.
+
+    Formatos: TSV nativo (respeta `#separator`, `#set_separator`,
+    `#empty_field`, `#unset_field`, `#fields` y `#types`), JSON por líneas y
+    CSV exportado, en texto plano o comprimidos con gzip (rotaciones
+    `conn.*.log.gz`). En TSV/JSON cada campo se convierte una sola vez según su
+    tipo Zeek: `count`/`int`/`port` → int, `time`/`interval`/`double` → float,
+    `bool` → bool, conjuntos/vectores → lista de str; los campos sin valor
+    quedan en None. El CSV se mantiene como texto, igual que antes.
+
+    La conversión se hace por bloques de `block_rows` filas y por columna, así
+    que la memoria no depende del tamaño del log. Las directivas que aparecen
+    tras los datos (`#close`, cabeceras repetidas de logs concatenados) se
+    ignoran; las filas con menos campos que `#fields` se descartan.
+    """
+
+    def __init__(self, path: str | Path, block_rows: int = DEFAULT_BLOCK_ROWS):
+        self.path = Path(path)
+        self.block_rows = max(1, block_rows)
+        self.format: str | None = None
+        self.header: List[str] = []
+        self.types: Dict[str, str] = {}
+        self.separator = "\t"
+        self.set_separator = ","
+        self.empty_field = "(empty)"
+        self.unset_field = "-"
+        self._handle: TextIO | None = None
+        self._pending: List[str] = []
+        self._csv_reader: Iterator[List[str]] | None = None
+        self._converters: List[Converter] | None = None
+
+    def __enter__(self) -> ZeekLogReader:
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def numeric_columns(self) -> set[str]:
+        return {name for name, zeek_type in self.types.items() if zeek_type in NUMERIC_TYPES}
+
+    def open(self) -> None:
+        self.close()
+        self._handle = open_zeek_text(self.path)
+        self._pending = []
+        self._converters = None
+        first_line = self._handle.readline()
+        stripped = first_line.lstrip("\ufeff").rstrip("\r\n")
+        if stripped.startswith("{"):
+            self.format = FORMAT_JSON
+            self._read_json_header(stripped)
+        elif stripped.startswith("#separator") or (stripped.startswith("#") and "\t" in stripped):
+            self.format = FORMAT_TSV
+            self._read_tsv_header(stripped)
+        else:
+            self.format = FORMAT_CSV
+            self._csv_reader = csv.reader(chain([first_line] if first_line else [], self._handle))
+            raw_header = next(self._csv_reader, None) or []
+            self.header = raw_header[1:] if raw_header and raw_header[0].startswith("#fields") else raw_header
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def rows(self) -> Iterator[Sequence]:
+        """Filas de datos en orden `header`; abre el archivo si hace falta."""
+
+        if self._handle is None:
+            self.open()
+        if self.format == FORMAT_CSV:
+            yield from self._csv_reader
+            return
+        if not self.header:
+            return
+        parse = self._tsv_block if self.format == FORMAT_TSV else self._json_block
+        lines = chain(self._pending, self._handle)
+        for block in iter_chunks(lines, self.block_rows):
+            values = parse(block)
+            if values:
+                yield from self._convert(values)
+
+    def row_offsets(self) -> np.ndarray | None:
+        """
+        Offset en bytes del inicio de cada fila válida, en el orden de `rows()`.
+        None si el archivo está comprimido (gzip no permite saltar a un offset).
+        """
+
+        if self.format is None:
+            self.open()
+        if is_gzip(self.path):
+            return None
+        width = len(self.header)
+        offsets: List[int] = []
+        position = 0
+        with self.path.open("rb") as handle:
+            if self.format == FORMAT_CSV:
+                position = len(handle.readline())
+            for raw in handle:
+                if self._parse_line(raw.decode("utf-8", errors="replace"), width) is not None:
+                    offsets.append(position)
+                position += len(raw)
+        return np.asarray(offsets, dtype=np.int64)
+
+    def rows_at(self, offsets: Sequence[int]) -> List[Sequence | None]:
+        """Filas que empiezan en `offsets` (de `row_offsets`); None si ya no es una fila válida."""
+
+        if self.format is None:
+            self.open()
+        width = len(self.header)
+        parsed = []
+        with self.path.open("rb") as handle:
+            for offset in offsets:
+                handle.seek(int(offset))
+                parsed.append(self._parse_line(handle.readline().decode("utf-8", errors="replace"), width))
+        if self.format == FORMAT_CSV:
+            return parsed
+        converted = iter(self._convert([values for values in parsed if values is not None]))
+        return [None if values is None else next(converted) for values in parsed]
+
+    def reset_header(self) -> None:
+        """Olvida cabecera y directivas, p. ej. cuando el tail pasa a otro archivo."""
+
+        self.format = None
+        self.header = []
+        self.types = {}
+        self.separator = "\t"
+        self.set_separator = ","
+        self.empty_field = "(empty)"
+        self.unset_field = "-"
+        self._converters = None
+
+    def read_directive(self, line: str) -> None:
+        """Aplica una directiva `#...` de un log TSV leído por otro (el tail de un log vivo)."""
+
+        self.format = FORMAT_TSV
+        if line.startswith("#fields"):
+            # Cabecera nueva (logs concatenados): sus `#types` llegan detrás.
+            self.types = {}
+        self._parse_directive(line)
+        self._converters = None
+
+    def read_header_line(self, line: str) -> None:
+        """Cabecera sin `#fields` (CSV exportado o TSV con nombres en la primera línea)."""
+
+        if "," in line and "\t" not in line:
+            self.format = FORMAT_CSV
+            self.header = next(csv.reader([line]), [])
+        else:
+            self.format = FORMAT_TSV
+            self.header = line.split("\t")
+        self.types = {}
+        self._converters = None
+
+    def parse_lines(self, lines: Sequence[str]) -> List[Sequence]:
+        """
+        Filas válidas de líneas de datos leídas por otro, convertidas con la
+        cabecera y las directivas actuales igual que en `rows()`.
+        """
+
+        if not self.header:
+            return []
+        if self.format == FORMAT_CSV:
+            width = len(self.header)
+            return [row for row in csv.reader(lines) if len(row) >= width]
+        if not self.types:
+            self.types = {name: CONN_LOG_TYPES[name] for name in self.header if name in CONN_LOG_TYPES}
+        return list(self._convert(self._tsv_block(list(lines))))
+
+    def _parse_line(self, line: str, width: int) -> list | None:
+        if self.format == FORMAT_CSV:
+            row = next(csv.reader([line]), None)
+            return row if row and len(row) >= width else None
+        parse = self._tsv_block if self.format == FORMAT_TSV else self._json_block
+        values = parse([line])
+        return values[0] if values else None
+
+    def _convert(self, values: List[list]) -> Iterator[tuple]:
+        if not values:
+            return iter(())
+        if self._converters is None:
+            self._converters = [self._converter(self.types.get(name, "string")) for name in self.header]
+        columns = [convert(column) for convert, column in zip(self._converters, zip(*values))]
+        return zip(*columns)
+
+    def _read_tsv_header(self, first_line: str) -> None:
+        line = first_line
+        while line.startswith("#"):
+            self._parse_directive(line)
+            raw = self._handle.readline()
+            if not raw:
+                break
+            line = raw.rstrip("\r\n")
+        else:
+            self._pending = [line]
+        if self.header and not self.types:
+            # Sin `#types` se asumen los tipos estándar de conn.log.
+            self.types = {name: CONN_LOG_TYPES[name] for name in self.header if name in CONN_LOG_TYPES}
+
+    def _parse_directive(self, line: str) -> None:
+        if line.startswith("#separator"):
+            self.separator = decode_separator(line.split(" ", 1)[1].strip() if " " in line else "")
+            return
+        key, _, value = line.partition(self.separator)
+        if key == "#set_separator":
+            self.set_separator = value
+        elif key == "#empty_field":
+            self.empty_field = value
+        elif key == "#unset_field":
+            self.unset_field = value
+        elif key == "#fields":
+            self.header = value.split(self.separator)
+        elif key == "#types":
+            self.types = dict(zip(self.header, value.split(self.separator)))
+
+    def _tsv_block(self, lines: List[str]) -> List[List[str]]:
+        separator = self.separator
+        width = len(self.header)
+        values: List[List[str]] = []
+        for raw in lines:
+            line = raw.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split(separator)
+            if len(fields) < width:
+                continue
+            values.append(fields[:width] if len(fields) > width else fields)
+        return values
+
+    def _converter(self, zeek_type: str) -> Converter:
+        if self.format == FORMAT_JSON:
+            return self._json_converter(zeek_type)
+        unset, empty = self.unset_field, self.empty_field
+        if zeek_type in NUMERIC_TYPES:
+            integer = zeek_type in INTEGER_TYPES
+            cast = int if integer else float
+
+            def convert_number(values: Sequence[str]) -> list:
+                try:
+                    if unset not in values:
+                        return list(map(cast, values))
+                    return [None if value == unset else cast(value) for value in values]
+                except ValueError:
+                    # Valores mal formados: fila a fila, None si no se pueden leer.
+                    return [None if value == unset else _parse_number(value, integer) for value in values]
+
+            return convert_number
+        if zeek_type == "bool":
+            return lambda values: [None if value == unset else value == "T" for value in values]
+        if zeek_type.startswith(CONTAINER_PREFIXES):
+            set_separator = self.set_separator
+            return lambda values: [
+                None if value == unset else ([] if value == empty else value.split(set_separator))
+                for value in values
+            ]
+
+        def convert_text(values: Sequence[str]) -> list:
+            if unset not in values and empty not in values:
+                return list(values)
+            return [None if value == unset else ("" if value == empty else value) for value in values]
+
+        return convert_text
+
+    def _read_json_header(self, first_line: str) -> None:
+        # Zeek omite en JSON los campos sin valor: la cabecera une las claves del
+        # primer bloque y se completa con los de conn.log. Un campo ajeno a conn.log
+        # que aparezca por primera vez después del primer bloque se ignora.
+        self._pending = [first_line, *islice(self._handle, self.block_rows - 1)]
+        keys: Dict[str, None] = {}
+        for raw in self._pending:
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                keys.update(dict.fromkeys(record))
+        if not keys:
+            return
+        self.header = list(keys) + [name for name in CONN_LOG_TYPES if name not in keys]
+        self.types = {name: CONN_LOG_TYPES.get(name, "string") for name in self.header}
+
+    def _json_block(self, lines: List[str]) -> List[List]:
+        header = self.header
+        values: List[List] = []
+        for raw in lines:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                values.append([record.get(name) for name in header])
+        return values
+
+    @staticmethod
+    def _json_converter(zeek_type: str) -> Converter:
+        if zeek_type == "time":
+            return lambda values: [_parse_time(value) for value in values]
+        if zeek_type in NUMERIC_TYPES:
+            integer = zeek_type in INTEGER_TYPES
+            return lambda values: [_parse_number(value, integer) for value in values]
+        return list
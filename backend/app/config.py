@@ -22,11 +22,45 @@ class Settings(BaseSettings):
     replay_speed: float = 1.0
     stream_mode: str = "SSE"
     model_path: str = "artifacts/rf_cicids2017_zeek_multiclass_v3.pkl"
+    model_batch_size: int = 256
+    model_engine: str = "sklearn"
+    model_mmap: bool = False
+    model_reload_interval_seconds: float = 10.0
+    model_preload: bool = True
+    model_early_exit: bool = False
+    model_early_exit_chunk_trees: int = 16
+    model_early_exit_budget_ms: float = 0.0
+    model_early_exit_audit_every: int = 50
+    model_feature_dtype: str = "float64"
+    model_feature_dtype_tolerance: float = 0.0
+    shadow_model_path: str | None = None
+    shadow_max_pending_batches: int = 64
+    prediction_cache_size: int = 4096
+    prediction_cache_quantize_digits: int = 0
+    inference_batching_enabled: bool = True
+    inference_workers: int = 1
+    inference_pool_min_rows: int = 4096
+    inference_pool_batch_size: int = 20000
+    inference_max_batch_size: int = 64
+    inference_max_wait_ms: float = 5.0
+    inference_result_timeout_seconds: float = 30.0
     zeek_conn_path: str | None = "data/default_csv/conn_latest.csv"
     zeek_seed_limit: int = 500
+    zeek_ingest_workers: int = 0
+    zeek_ingest_write_rows: int = 5000
+    zeek_tail_path: str | None = None
+    zeek_tail_poll_seconds: float = 1.0
+    zeek_tail_batch_rows: int = 500
     zeek_upload_dir: str = "./tmp/zeek_uploads"
+    zeek_feature_sidecars: bool = True
     zeek_reference_dataset: str = "data/default_csv/attacks_reference.csv"
     zeek_sync_script: str | None = "../sync_zeek_and_simulate.sh"
+    host_windows_enabled: bool = True
+    host_window_seconds: List[float] = Field(default_factory=lambda: [10.0, 60.0])
+    host_window_max_hosts: int = 50_000
+    host_window_max_events: int = 4096
+    host_window_idle_seconds: float = 300.0
+    host_window_max_total_events: int = 1_000_000
     kali_ssh_host: str | None = None
     kali_ssh_user: str | None = None
     kali_ssh_port: int = 22
@@ -50,6 +84,13 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in value.split(",") if origin.strip()]
         return value
 
+    @field_validator("host_window_seconds", mode="before")
+    @classmethod
+    def _split_windows(cls, value: str | list[float]) -> list[float]:
+        if isinstance(value, str):
+            return [float(item) for item in value.split(",") if item.strip()]
+        return value
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -4,17 +4,37 @@ import asyncio
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from .adapters.zeek_adapter import ZeekAdapter
 from .config import get_settings
 from .db import SessionLocal, init_db
-from .dependencies import get_alerts_service, stream_manager
+from .dependencies import stream_manager
 from .repositories.alerts_repo import AlertRepository
 from .routers import alerts, metrics, reports, stream, zeek_lab
 from .services.alerts_service import AlertsService
+from .services.dataset_features import stop_dataset_feature_store
 from .services.generators.synthetic_generator import SyntheticAlertGenerator
-from .services.model_provider import get_model_adapter
+from .services.host_windows import host_window_options, start_host_window_tracker
+from .services.inference_pool import InferencePool
+from .services.inference_service import start_inference_service, stop_inference_service
+from .services.model_provider import (
+    get_model_adapter,
+    get_model_readiness,
+    get_model_registry,
+    get_shadow_evaluator,
+    start_model_preload,
+)
 from .services.synthetic_control import start_synthetic_emitter, stop_synthetic_emitter
+from .services.zeek_ingest import (
+    ZeekIngestJob,
+    expand_dataset_paths,
+    is_multi_file_path,
+    start_zeek_ingest,
+    stop_zeek_ingest,
+)
+from .services.zeek_seed import seed_zeek_csv
+from .services.zeek_tail import ZeekTailer, start_zeek_tail, stop_zeek_tail
 
 settings = get_settings()
 app = FastAPI(title="IDS API", version="1.0.0")
@@ -39,6 +59,14 @@ def healthcheck():
     return {"status": "ok"}
 
 
+@app.get("/health/ready")
+def readiness():
+    """Indica si el modelo ya está cargado y caliente (503 mientras carga o si falló)."""
+    payload = get_model_readiness(app)
+    status_code = 503 if payload["status"] in ("loading", "error") else 200
+    return JSONResponse(payload, status_code=status_code)
+
+
 @app.on_event("startup")
 async def startup_event():
     init_db()
@@ -47,6 +75,21 @@ async def startup_event():
     if not hasattr(app.state, "synthetic_generator"):
         app.state.synthetic_generator = SyntheticAlertGenerator(seed=settings.synthetic_seed)
     app.state.synthetic_rate = getattr(app.state, "synthetic_rate", settings.synthetic_rate_per_min)
+    if settings.model_preload:
+        # Carga + calentamiento en segundo plano; también deja en el log la huella del modelo.
+        start_model_preload(app, settings.model_path)
+    get_model_registry().start_watcher(settings.model_reload_interval_seconds)
+    shadow = get_shadow_evaluator()
+    if shadow is not None:
+        shadow.start()
+    if settings.inference_batching_enabled:
+        await start_inference_service(
+            app,
+            lambda: get_model_adapter(settings.model_path),
+            max_batch_size=settings.inference_max_batch_size,
+            max_wait_ms=settings.inference_max_wait_ms,
+            result_timeout=settings.inference_result_timeout_seconds,
+        )
     ingestion_mode = settings.ingestion_mode.upper()
     if ingestion_mode.startswith("SYNTHETIC"):
         generator = app.state.synthetic_generator
@@ -69,13 +112,50 @@ async def startup_event():
         if not settings.zeek_conn_path:
             raise RuntimeError("ZEEK_CSV requiere ZEEK_CONN_PATH configurado en .env")
         model_adapter = get_model_adapter(settings.model_path)
-        zeek_adapter = ZeekAdapter(settings.zeek_conn_path, model_adapter)
         limit = settings.zeek_seed_limit if settings.zeek_seed_limit > 0 else None
-        with SessionLocal() as session:
-            repo = AlertRepository(session)
-            service = AlertsService(repo, stream_manager)
-            created = zeek_adapter.seed_from_csv(service, limit)
-            app.state.zeek_ingested = created
+        if is_multi_file_path(settings.zeek_conn_path):
+            # Carpeta o comodín: todos los archivos, en paralelo y en segundo plano.
+            job = ZeekIngestJob(
+                expand_dataset_paths(settings.zeek_conn_path),
+                model_adapter,
+                SessionLocal,
+                workers=settings.zeek_ingest_workers,
+                batch_size=settings.model_batch_size,
+                write_rows=settings.zeek_ingest_write_rows,
+                limit=limit,
+                host_windows=host_window_options(settings),
+            )
+            await start_zeek_ingest(app, job)
+        else:
+            with InferencePool(
+                model_adapter,
+                workers=settings.inference_workers,
+                min_rows=settings.inference_pool_min_rows,
+            ) as pool:
+                batch_size = settings.model_batch_size
+                if pool.workers > 1:
+                    batch_size = max(batch_size, settings.inference_pool_batch_size)
+                zeek_adapter = ZeekAdapter(
+                    settings.zeek_conn_path,
+                    pool,
+                    batch_size=batch_size,
+                    host_windows=start_host_window_tracker(app, settings),
+                )
+                # Reanuda desde el checkpoint en BD: los reinicios no duplican alertas.
+                app.state.zeek_ingested = seed_zeek_csv(zeek_adapter, SessionLocal, limit, stream_manager)
+    elif ingestion_mode == "ZEEK_TAIL":
+        tail_path = settings.zeek_tail_path or settings.zeek_conn_path
+        if not tail_path:
+            raise RuntimeError("ZEEK_TAIL requiere ZEEK_TAIL_PATH (o ZEEK_CONN_PATH) configurado en .env")
+        tailer = ZeekTailer(
+            tail_path,
+            lambda: get_model_adapter(settings.model_path),
+            SessionLocal,
+            batch_rows=settings.zeek_tail_batch_rows,
+            batch_size=settings.model_batch_size,
+            host_windows=start_host_window_tracker(app, settings),
+        )
+        await start_zeek_tail(app, stream_manager, tailer, settings.zeek_tail_poll_seconds)
     elif ingestion_mode == "TEST_DISABLED":
         # Usado por la suite de tests para evitar side-effects en la BD.
         pass
@@ -86,3 +166,11 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     await stop_synthetic_emitter(app)
+    await stop_zeek_tail(app)
+    await stop_zeek_ingest(app)
+    await stop_inference_service(app)
+    stop_dataset_feature_store(app)
+    get_model_registry().stop_watcher()
+    shadow = get_shadow_evaluator()
+    if shadow is not None:
+        shadow.stop()
@@ -59,3 +59,20 @@ class Alert(SQLModel, table=True):
     model_score: float = Field(nullable=False)
     model_label: ModelLabelEnum = Field(nullable=False)
     meta: dict | None = Field(default_factory=dict, sa_column=Column(JSON))
+
+
+class IngestCheckpoint(SQLModel, table=True):
+    """Posición de lectura persistida de una fuente de ingesta (p. ej. conn.log en tail)."""
+
+    __tablename__ = "ingest_checkpoints"
+
+    source: str = Field(primary_key=True)
+    path: str = Field(nullable=False)
+    inode: int | None = Field(default=None)
+    # Byte siguiente a leer (tail) y filas de datos ya consumidas (punto de reanudación del seed).
+    offset: int = Field(default=0, nullable=False)
+    rows: int = Field(default=0, nullable=False)
+    # Huella del archivo (tamaño, mtime, hash de la cabecera) y si se llegó al final.
+    fingerprint: str | None = Field(default=None)
+    complete: bool = Field(default=False, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
@@ -30,6 +30,17 @@ class AlertRepository:
         self.session.refresh(alert)
         return alert
 
+    def create_many(self, payloads: Sequence[AlertCreate], commit: bool = True) -> list[Alert]:
+        """Inserta un lote; con commit=False el llamador confirma (p. ej. junto a un checkpoint)."""
+
+        alerts = [Alert(**payload.model_dump()) for payload in payloads]
+        self.session.add_all(alerts)
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+        return alerts
+
     def get(self, alert_id):
         return self.session.get(Alert, alert_id)
 
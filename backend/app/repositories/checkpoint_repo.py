@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlmodel import Session
+
+from ..models import IngestCheckpoint
+
+
+class CheckpointRepository:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get(self, source: str) -> IngestCheckpoint | None:
+        return self.session.get(IngestCheckpoint, source)
+
+    def stage(self, source: str, **fields) -> IngestCheckpoint:
+        """Actualiza el checkpoint en la sesión sin confirmar, para hacerlo junto a las alertas."""
+
+        checkpoint = self.get(source)
+        if checkpoint is None:
+            checkpoint = IngestCheckpoint(source=source, **fields)
+        else:
+            for name, value in fields.items():
+                setattr(checkpoint, name, value)
+        checkpoint.updated_at = datetime.utcnow()
+        self.session.add(checkpoint)
+        return checkpoint
+
+    def save(self, source: str, **fields) -> IngestCheckpoint:
+        checkpoint = self.stage(source, **fields)
+        self.session.commit()
+        return checkpoint
@@ -1,8 +1,30 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
 
+from ..config import get_settings
 from ..dependencies import get_alerts_service
-from ..schemas import DashboardMetrics, MetricsOverview, ModelPerformanceMetrics
+from ..schemas import (
+    DashboardMetrics,
+    EarlyExitStats,
+    HostWindowStats,
+    InferenceStats,
+    MetricsOverview,
+    ModelPerformanceMetrics,
+    PredictionCacheStats,
+    ShadowModelStats,
+    ZeekIngestStats,
+    ZeekTailStats,
+)
 from ..services.alerts_service import AlertsService
+from ..services.host_windows import get_host_window_tracker
+from ..services.inference_service import get_inference_service
+from ..services.model_provider import (
+    get_early_exit_evaluator,
+    get_model_registry,
+    get_prediction_cache,
+    get_shadow_evaluator,
+)
+from ..services.zeek_ingest import get_zeek_ingest_status
+from ..services.zeek_tail import get_zeek_tail_status
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
@@ -26,4 +48,76 @@ def get_model_performance(
     Devuelve métricas centradas en el desempeño del modelo
     (score promedio, latencia, distribución por tipo de ataque y dataset).
     """
-    return service.model_performance_metrics(window_hours=window_hours)
+    metrics = service.model_performance_metrics(window_hours=window_hours)
+    entry = get_model_registry().peek(get_settings().model_path)
+    if entry is not None:
+        metrics.model_version = entry.adapter.version
+        metrics.model_engine = entry.adapter.engine
+        metrics.model_loaded_at = entry.loaded_at
+    return metrics
+
+
+@router.get("/inference", response_model=InferenceStats)
+def get_inference_stats(request: Request):
+    """
+    Expone profundidad de cola y tamaños de batch del servicio de inferencia
+    compartido para ajustar INFERENCE_MAX_BATCH_SIZE / INFERENCE_MAX_WAIT_MS.
+    """
+    service = get_inference_service(request.app)
+    if service is None:
+        raise HTTPException(status_code=404, detail="El servicio de inferencia no está habilitado")
+    return service.stats()
+
+
+@router.get("/prediction-cache", response_model=PredictionCacheStats)
+def get_prediction_cache_stats():
+    """Aciertos/fallos de la cache LRU de predicciones por vector de features."""
+    cache = get_prediction_cache()
+    if cache is None:
+        return PredictionCacheStats(enabled=False)
+    return PredictionCacheStats(enabled=True, **cache.stats())
+
+
+@router.get("/early-exit", response_model=EarlyExitStats)
+def get_early_exit_stats():
+    """
+    Tasa de salida temprana (por margen o por presupuesto), fracción de árboles
+    evaluados y acuerdo con el bosque completo en los batches auditados.
+    """
+    evaluator = get_early_exit_evaluator()
+    if evaluator is None:
+        return EarlyExitStats(enabled=False)
+    return EarlyExitStats(enabled=True, **evaluator.stats())
+
+
+@router.get("/host-windows", response_model=HostWindowStats)
+def get_host_window_stats(request: Request):
+    """Hosts y flujos en las ventanas deslizantes de la ingesta Zeek y expulsiones."""
+    tracker = get_host_window_tracker(request.app)
+    if tracker is None:
+        return HostWindowStats(enabled=False)
+    return HostWindowStats(enabled=True, **tracker.stats())
+
+
+@router.get("/zeek-tail", response_model=ZeekTailStats)
+def get_zeek_tail_stats(request: Request):
+    """Offset, retraso en bytes y latencia por lote del tail de conn.log (INGESTION_MODE=ZEEK_TAIL)."""
+    return ZeekTailStats(**get_zeek_tail_status(request.app))
+
+
+@router.get("/zeek-ingest", response_model=ZeekIngestStats)
+def get_zeek_ingest_stats(request: Request):
+    """Progreso por archivo y totales de la ingesta multiarchivo de ZEEK_CSV (carpeta o comodín)."""
+    return ZeekIngestStats(**get_zeek_ingest_status(request.app))
+
+
+@router.get("/shadow-model", response_model=ShadowModelStats)
+def get_shadow_model_stats():
+    """
+    Compara el modelo primario con el candidato en sombra: acuerdo global y por
+    clase, matriz de confusión primario×sombra y batches descartados por retraso.
+    """
+    evaluator = get_shadow_evaluator()
+    if evaluator is None:
+        return ShadowModelStats(enabled=False)
+    return ShadowModelStats(**evaluator.stats())
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import csv
+import hashlib
 import io
 import uuid
 import glob
@@ -17,7 +18,10 @@ from ..dependencies import get_alerts_service, stream_manager
 from ..models import AttackTypeEnum
 from ..schemas import AlertRead
 from ..services.alerts_service import AlertsService
-from ..services.model_provider import get_model_adapter
+from ..services.dataset_features import DatasetFeatureStore, get_dataset_feature_store
+from ..services.host_windows import create_host_window_tracker
+from ..services.inference_service import get_inference_service
+from ..services.model_provider import get_feature_dtype, get_model_adapter
 from ..adapters.feature_csv_adapter import FeatureCSVAdapter
 from ..services.cicids_converter import convert_cicids_content, looks_like_cicids_raw
 from ..services.synthetic_control import (
@@ -26,6 +30,7 @@ from ..services.synthetic_control import (
     stop_synthetic_emitter,
 )
 from ..adapters.zeek_adapter import ZeekAdapter
+from ..adapters.zeek_log_reader import ZeekLogReader, is_dataset_file, is_native_zeek_log
 from ..adapters.model_adapter import TOP_FEATURES
 
 router = APIRouter(prefix="/zeek-lab", tags=["zeek-lab"])
@@ -91,6 +96,15 @@ class SimulateResponse(BaseModel):
     alerts: List[AlertRead]
 
 
+class DatasetIndexResponse(BaseModel):
+    dataset_id: str | None = None
+    status: str
+    rows: int | None = None
+    predicted: Dict[str, int] = Field(default_factory=dict)
+    labels: Dict[str, int] = Field(default_factory=dict)
+    seekable: bool = False
+
+
 class CommandRequest(BaseModel):
     command: str = Field(min_length=1, max_length=2000)
 
@@ -134,16 +148,27 @@ def _resolve_path(raw_path: str | Path) -> Path:
     return path.resolve()
 
 
+def _feature_store(request: Request, settings, directory: Path) -> DatasetFeatureStore:
+    # El índice de clases puntúa el dataset entero: usa el mismo pool que el seed de ZEEK_CSV.
+    return get_dataset_feature_store(
+        request.app,
+        directory,
+        workers=settings.inference_workers,
+        pool_min_rows=settings.inference_pool_min_rows,
+    )
+
+
 def _latest_csv_in_dir(directory: Path) -> Path:
+    # CSV exportados o logs nativos de Zeek (conn.log, JSON, rotaciones .gz).
     candidates = sorted(
-        (p for p in directory.glob("*.csv") if p.is_file()),
+        (p for p in directory.iterdir() if is_dataset_file(p)),
         key=lambda item: item.stat().st_mtime,
         reverse=True,
     )
     if not candidates:
         raise HTTPException(
             status_code=404,
-            detail=f"No se encontraron CSV en {directory}",
+            detail=f"No se encontraron CSV ni logs de Zeek en {directory}",
         )
     return candidates[0]
 
@@ -222,6 +247,26 @@ def _parse_preview(content: str, limit: int = 5) -> Tuple[List[str], List[Dict[s
     return header, preview
 
 
+def _preview_value(value: object) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, list):
+        return ",".join(value)
+    return str(value)
+
+
+def _parse_native_preview(path: Path, limit: int = 5) -> Tuple[List[str], List[Dict[str, str]]]:
+    """Cabecera y primeras filas de un log nativo de Zeek (TSV/JSON, también .gz)."""
+
+    preview: List[Dict[str, str]] = []
+    with ZeekLogReader(path, block_rows=limit) as reader:
+        for row in reader.rows():
+            preview.append({name: _preview_value(value) for name, value in zip(reader.header, row)})
+            if len(preview) >= limit:
+                break
+        return list(reader.header), preview
+
+
 def _prepare_dataset_content(
     filename: str, content_bytes: bytes
 ) -> Tuple[bytes, List[str], List[Dict[str, str]], str]:
@@ -374,18 +419,49 @@ def _resolve_dataset_path(
 
 @router.post("/upload-dataset", response_model=UploadResponse)
 async def upload_dataset(request: Request, file: UploadFile = File(...)):
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Solo se permiten archivos CSV")
+    native_log = is_native_zeek_log(Path(file.filename))
+    if not native_log and not file.filename.lower().endswith(".csv"):
+        raise HTTPException(
+            status_code=400, detail="Solo se permiten archivos CSV o logs de Zeek (.log, .json, .gz)"
+        )
     raw_bytes = await file.read()
-    content_bytes, columns, preview, dataset_type = _prepare_dataset_content(file.filename, raw_bytes)
-    _validate_columns(columns, dataset_type)
-
     dataset_id = uuid.uuid4().hex
     settings = get_settings()
     upload_dir = _resolve_path(settings.zeek_upload_dir)
     upload_dir.mkdir(parents=True, exist_ok=True)
-    target_path = upload_dir / f"{dataset_id}.csv"
-    target_path.write_bytes(content_bytes)
+    if native_log:
+        # El log se guarda tal cual (sin exportar a CSV); ZeekAdapter lo lee de forma nativa.
+        content_bytes = raw_bytes
+        dataset_type = DATASET_TYPE_CONN
+        target_path = upload_dir / f"{dataset_id}{''.join(Path(file.filename).suffixes[-2:]).lower()}"
+        target_path.write_bytes(content_bytes)
+        try:
+            columns, preview = _parse_native_preview(target_path)
+            _validate_columns(columns, dataset_type)
+        except HTTPException:
+            target_path.unlink(missing_ok=True)
+            raise
+        except (OSError, EOFError) as exc:
+            # gzip truncado o corrupto.
+            target_path.unlink(missing_ok=True)
+            raise HTTPException(status_code=400, detail=f"No se pudo leer el log de Zeek: {exc}") from exc
+    else:
+        content_bytes, columns, preview, dataset_type = _prepare_dataset_content(file.filename, raw_bytes)
+        _validate_columns(columns, dataset_type)
+        target_path = upload_dir / f"{dataset_id}.csv"
+        target_path.write_bytes(content_bytes)
+    if settings.zeek_feature_sidecars:
+        store = _feature_store(request, settings, upload_dir)
+        store.remember_hash(target_path, hashlib.sha256(content_bytes).hexdigest())
+        feature_dtype = get_feature_dtype(settings.model_path)
+        store.schedule(target_path, dataset_type, feature_dtype)
+        store.schedule_index(
+            target_path,
+            dataset_type,
+            lambda: get_model_adapter(settings.model_path),
+            feature_dtype,
+            lambda: create_host_window_tracker(settings),
+        )
 
     registry = _dataset_registry(request)
     registry[dataset_id] = {"path": str(target_path), "filename": file.filename, "type": dataset_type}
@@ -408,8 +484,10 @@ def dataset_preview(
     path, resolved_id, used_default, dataset_type = _resolve_dataset_path(request, dataset_id, use_default)
     if not path.exists():
         raise HTTPException(status_code=404, detail="No se encontró el archivo solicitado")
-    content_text = path.read_text(encoding="utf-8", errors="ignore")
-    columns, preview = _parse_preview(content_text)
+    if is_native_zeek_log(path):
+        columns, preview = _parse_native_preview(path)
+    else:
+        columns, preview = _parse_preview(path.read_text(encoding="utf-8", errors="ignore"))
     if not columns:
         raise HTTPException(status_code=400, detail="El CSV no contiene filas válidas")
     _validate_columns(columns, dataset_type)
@@ -422,6 +500,28 @@ def dataset_preview(
     )
 
 
+@router.get("/dataset-index", response_model=DatasetIndexResponse)
+def dataset_index(request: Request, dataset_id: str = Query(...)):
+    """Filas por clase predicha y por etiqueta real de un dataset subido o de referencia."""
+
+    path, resolved_id, _, dataset_type = _resolve_dataset_path(request, dataset_id, False)
+    settings = get_settings()
+    if not settings.zeek_feature_sidecars:
+        return DatasetIndexResponse(dataset_id=resolved_id, status="disabled")
+    store = _feature_store(request, settings, _resolve_path(settings.zeek_upload_dir))
+    model_adapter = get_model_adapter(settings.model_path)
+    class_index = store.load_index(
+        path,
+        dataset_type,
+        model_adapter,
+        model_adapter.feature_dtype,
+        lambda: create_host_window_tracker(settings),
+    )
+    if class_index is None:
+        return DatasetIndexResponse(dataset_id=resolved_id, status="building")
+    return DatasetIndexResponse(dataset_id=resolved_id, status="ready", **class_index.summary())
+
+
 @router.post("/simulate-alert", response_model=SimulateResponse)
 def simulate_alert(
     payload: SimulateRequest,
@@ -434,11 +534,50 @@ def simulate_alert(
 
     attack_type = _attack_type_from_str(payload.attack_type)
     settings = get_settings()
-    model_adapter = get_model_adapter(settings.model_path)
+    inference_service = get_inference_service(request.app)
+    if inference_service is not None and inference_service.running:
+        # Agrupa esta simulación con otras concurrentes en micro-batches compartidos.
+        model_adapter = inference_service.client()
+    else:
+        model_adapter = get_model_adapter(settings.model_path)
+    feature_matrix = None
+    class_index = None
+    rows = None
+    if settings.zeek_feature_sidecars and dataset_id and not used_default:
+        # Datasets subidos o de referencia: contenido estable, se reutiliza su sidecar.
+        store = _feature_store(request, settings, _resolve_path(settings.zeek_upload_dir))
+        feature_matrix = store.load(path, dataset_type, model_adapter.feature_dtype)
+        if attack_type:
+            # Con el índice de clases solo se leen y puntúan las primeras filas del tipo pedido.
+            class_index = store.load_index(
+                path,
+                dataset_type,
+                get_model_adapter(settings.model_path),
+                model_adapter.feature_dtype,
+                lambda: create_host_window_tracker(settings),
+            )
+    if class_index is not None:
+        rows = class_index.rows_for_class(attack_type, limit=payload.count)
+    row_offsets = class_index.offsets if class_index is not None else None
     if dataset_type == DATASET_TYPE_FEATURES:
-        adapter = FeatureCSVAdapter(path, model_adapter)
+        adapter = FeatureCSVAdapter(
+            path,
+            model_adapter,
+            batch_size=settings.model_batch_size,
+            feature_matrix=feature_matrix,
+            row_offsets=row_offsets,
+        )
     else:
-        adapter = ZeekAdapter(path, model_adapter)
+        # Ventanas propias de cada simulación: repetir un dataset no infla el estado en vivo.
+        adapter = ZeekAdapter(
+            path,
+            model_adapter,
+            batch_size=settings.model_batch_size,
+            feature_matrix=feature_matrix,
+            host_windows=create_host_window_tracker(settings),
+            row_offsets=row_offsets,
+            window_matrix=class_index.windows if class_index is not None else None,
+        )
 
     alerts: List[AlertRead] = []
     dataset_label = (
@@ -452,7 +591,7 @@ def simulate_alert(
         else ("default" if used_default else "uploaded")
     )
 
-    for alert_payload in adapter.iterate_alerts(limit=payload.count, attack_type=attack_type):
+    for alert_payload in adapter.iterate_alerts(limit=payload.count, attack_type=attack_type, rows=rows):
         alert_payload.meta["dataset_label"] = dataset_label
         alert_payload.meta["dataset_source"] = dataset_source
         if dataset_id:
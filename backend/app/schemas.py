@@ -123,6 +123,7 @@ class DatasetBreakdownEntry(BaseModel):
 
 
 class ModelPerformanceMetrics(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
     window_hours: int
     window_start: datetime
     window_end: datetime
@@ -131,3 +132,141 @@ class ModelPerformanceMetrics(BaseModel):
     avg_latency_ms: float
     attack_type_stats: List[AttackTypeStat]
     dataset_breakdown: List[DatasetBreakdownEntry]
+    model_version: Optional[str] = None
+    model_engine: Optional[str] = None
+    model_loaded_at: Optional[datetime] = None
+
+
+class InferenceStats(BaseModel):
+    running: bool
+    queue_depth: int
+    max_queue_depth: int
+    max_batch_size: int
+    max_wait_ms: float
+    requests: int
+    rows: int
+    batches: int
+    errors: int
+    avg_batch_rows: float
+    max_batch_rows: int
+    last_batch_rows: int
+    avg_queue_wait_ms: float
+
+
+class PredictionCacheStats(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+    enabled: bool
+    model_version: str | None = None
+    size: int = 0
+    maxsize: int = 0
+    quantize_digits: int | None = None
+    hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    invalidations: int = 0
+
+
+class EarlyExitStats(BaseModel):
+    enabled: bool
+    chunk_trees: int = 0
+    budget_ms: float = 0.0
+    audit_every: int = 0
+    batches: int = 0
+    rows: int = 0
+    margin_exit_rows: int = 0
+    budget_exit_rows: int = 0
+    budget_exhausted_batches: int = 0
+    early_exit_rate: float = 0.0
+    trees_evaluated_fraction: float = 0.0
+    audited_batches: int = 0
+    audited_rows: int = 0
+    audit_agreement_rate: float = 0.0
+    audit_mean_abs_score_diff: float = 0.0
+
+
+class HostWindowStats(BaseModel):
+    enabled: bool
+    windows_seconds: List[float] = Field(default_factory=list)
+    hosts: int = 0
+    max_hosts: int = 0
+    events: int = 0
+    max_events_per_window: int = 0
+    max_total_events: int = 0
+    approx_bytes: int = 0
+    flows: int = 0
+    clock: float = 0.0
+    evicted_idle: int = 0
+    evicted_capacity: int = 0
+    evicted_memory: int = 0
+    truncated_events: int = 0
+
+
+class ZeekTailStats(BaseModel):
+    running: bool
+    path: str | None = None
+    inode: int | None = None
+    offset: int = 0
+    lag_bytes: int = 0
+    rows: int = 0
+    alerts: int = 0
+    polls: int = 0
+    errors: int = 0
+    rotations: int = 0
+    truncations: int = 0
+    last_batch_ms: float = 0.0
+    max_batch_ms: float = 0.0
+
+
+class ZeekIngestFileStats(BaseModel):
+    path: str
+    status: str
+    start_row: int = 0
+    rows_scored: int = 0
+    rows_written: int = 0
+    complete: bool = False
+    error: str | None = None
+    elapsed_seconds: float = 0.0
+
+
+class ZeekIngestStats(BaseModel):
+    running: bool
+    workers: int = 0
+    files_total: int = 0
+    files_done: int = 0
+    files_running: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    files_cancelled: int = 0
+    rows_scored: int = 0
+    rows_written: int = 0
+    flushes: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    files: List[ZeekIngestFileStats] = Field(default_factory=list)
+
+
+class ShadowClassAgreement(BaseModel):
+    class_name: str
+    primary_count: int
+    shadow_count: int
+    agreement_rate: float
+
+
+class ShadowModelStats(BaseModel):
+    enabled: bool
+    running: bool = False
+    primary_version: str | None = None
+    shadow_version: str | None = None
+    load_error: str | None = None
+    missing_features: List[str] = Field(default_factory=list)
+    rows_compared: int = 0
+    batches_compared: int = 0
+    agreement_rate: float = 0.0
+    disagreements: int = 0
+    mean_abs_score_diff: float = 0.0
+    queued_batches: int = 0
+    dropped_batches: int = 0
+    dropped_rows: int = 0
+    errors: int = 0
+    per_class: List[ShadowClassAgreement] = Field(default_factory=list)
+    confusion_matrix: List[List[int]] = Field(default_factory=list)
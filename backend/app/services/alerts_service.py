@@ -4,7 +4,7 @@ import asyncio
 import csv
 import io
 from datetime import datetime, timedelta
-from typing import AsyncGenerator, Dict, Iterable, List
+from typing import AsyncGenerator, Dict, Iterable, List, Sequence
 
 from fastapi import HTTPException, status
 
@@ -48,6 +48,10 @@ class AlertStreamManager:
                         pass
                     queue.put_nowait(payload)
 
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
     async def subscribe(self) -> asyncio.Queue:
         queue: asyncio.Queue = asyncio.Queue(maxsize=100)
         async with self._lock:
@@ -61,7 +65,7 @@ class AlertStreamManager:
 
 
 class AlertsService:
-    def __init__(self, repository: AlertRepository, stream_manager: AlertStreamManager):
+    def __init__(self, repository: AlertRepository, stream_manager: AlertStreamManager | None):
         self.repository = repository
         self.stream_manager = stream_manager
         self._overview_cache: Dict[str, object] | None = None
@@ -107,10 +111,44 @@ class AlertsService:
                 alert_read.id,
             )
         else:
-            loop.create_task(self.stream_manager.publish(alert_read))
+            if self.stream_manager is not None:
+                loop.create_task(self.stream_manager.publish(alert_read))
 
         return alert_read
 
+    def create_many(self, payloads: Sequence[AlertCreate], commit: bool = True) -> List[Alert]:
+        """
+        Inserta un lote de alertas. Con commit=False quien llama confirma la
+        transacción (p. ej. junto a un checkpoint) y después llama a
+        `notify_created` con las alertas devueltas.
+        """
+        alerts = self.repository.create_many(payloads, commit=commit)
+        if commit:
+            self.notify_created(alerts)
+        return alerts
+
+    def notify_created(self, alerts: Sequence[Alert], publish: bool = True) -> None:
+        """
+        Equivalente por lotes de lo que hace `create_alert` tras guardar: invalida
+        las cachés de métricas y publica en el stream si hay event loop y algún
+        suscriptor. Solo debe llamarse cuando el lote ya está confirmado.
+        """
+        if not alerts:
+            return
+        self._invalidate_caches()
+        if not publish or self.stream_manager is None or not self.stream_manager.has_subscribers:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.debug("No running event loop; skipping stream publish for %s alerts", len(alerts))
+            return
+        loop.create_task(self._publish_many([AlertRead.model_validate(alert) for alert in alerts]))
+
+    async def _publish_many(self, alerts: List[AlertRead]) -> None:
+        for alert in alerts:
+            await self.stream_manager.publish(alert)
+
 
     def export_csv(self, filters: AlertFilters) -> Iterable[bytes]:
         header = [
@@ -0,0 +1,508 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from ..adapters.feature_csv_adapter import LABEL_COLUMNS, FeatureCSVAdapter
+from ..adapters.model_adapter import CLASS_ID_TO_NAME, CLASS_NAME_TO_ATTACK, TOP_FEATURES, ModelAdapter
+from ..adapters.zeek_adapter import ZeekAdapter
+from ..adapters.zeek_log_reader import is_gzip
+from ..models import AttackTypeEnum
+from .host_windows import HostWindowTracker
+from .inference_pool import DEFAULT_MIN_POOL_ROWS, InferencePool
+
+logger = logging.getLogger(__name__)
+
+# Subir al cambiar cómo se calculan las features; invalida todos los sidecars.
+FEATURE_SCHEMA_VERSION = 1
+SIDECAR_CHUNK_ROWS = 8192
+_HASH_BLOCK_BYTES = 1 << 20
+
+DATASET_TYPE_FEATURES = "features"
+# Subir al cambiar el contenido del índice de clases.
+CLASS_INDEX_VERSION = 1
+
+
+def feature_schema_tag() -> str:
+    columns = hashlib.sha256(",".join(TOP_FEATURES).encode("utf-8")).hexdigest()[:8]
+    return f"v{FEATURE_SCHEMA_VERSION}-{columns}"
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_lines(path: Path) -> int:
+    """Líneas del archivo (descomprimido si es gzip): cota superior de sus filas de datos."""
+
+    opener = gzip.open if is_gzip(path) else open
+    lines, last = 0, b"\n"
+    with opener(path, "rb") as handle:
+        for block in iter(lambda: handle.read(_HASH_BLOCK_BYTES), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return lines + (last != b"\n")
+
+
+def _truncate_npy_rows(path: Path, rows: int) -> None:
+    """
+    Deja en `rows` filas un .npy escrito con más capacidad: reescribe la
+    cabecera en el sitio (mismo tamaño, rellena con espacios) y recorta los datos.
+    """
+
+    fmt = np.lib.format
+    with path.open("r+b") as handle:
+        major, _ = fmt.read_magic(handle)
+        header_start = handle.tell() + (2 if major == 1 else 4)
+        read_header = fmt.read_array_header_1_0 if major == 1 else fmt.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(handle)
+        data_start = handle.tell()
+        header = repr({"descr": fmt.dtype_to_descr(dtype), "fortran_order": fortran_order, "shape": (rows, *shape[1:])})
+        handle.seek(header_start)
+        handle.write((header.ljust(data_start - header_start - 1) + "\n").encode("latin1"))
+        handle.truncate(data_start + rows * int(np.prod(shape[1:])) * dtype.itemsize)
+
+
+def attack_for_class(class_index: int) -> AttackTypeEnum:
+    """Igual que `BatchPrediction.attack_type` a partir del índice de clase del modelo."""
+
+    return CLASS_NAME_TO_ATTACK.get(CLASS_ID_TO_NAME.get(class_index, str(class_index)), AttackTypeEnum.dos)
+
+
+def _group_rows(codes: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Filas agrupadas por código (en orden de archivo dentro de cada grupo) y límites."""
+
+    valid = codes >= 0
+    rows = np.flatnonzero(valid)
+    rows = rows[np.argsort(codes[valid], kind="stable")].astype(np.int64)
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    return rows, np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+
+def _first_rows(parts: List[np.ndarray], limit: int | None) -> np.ndarray:
+    if not parts:
+        return np.zeros(0, dtype=np.int64)
+    rows = np.sort(np.concatenate(parts))
+    return rows if limit is None else rows[:limit]
+
+
+@dataclass
+class DatasetClassIndex:
+    """
+    Índice de un dataset por clase predicha y, si hay columna de etiqueta, por
+    etiqueta real. Las filas de cada grupo están contiguas (`*_rows` entre
+    `*_bounds[i]` y `*_bounds[i + 1]`) y en orden de archivo, así que las
+    primeras N de un tipo se obtienen en O(N). `offsets` da el byte de inicio de
+    cada fila (None en archivos comprimidos) y `windows` las features de ventana
+    por host que vería una pasada completa con un tracker nuevo.
+    """
+
+    rows: int
+    class_rows: np.ndarray
+    class_bounds: np.ndarray
+    label_names: List[str]
+    label_rows: np.ndarray
+    label_bounds: np.ndarray
+    offsets: np.ndarray | None = None
+    windows: np.ndarray | None = None
+
+    def rows_for_class(self, attack_type: AttackTypeEnum, limit: int | None = None) -> np.ndarray:
+        parts = []
+        for code in range(len(self.class_bounds) - 1):
+            if attack_for_class(code) != attack_type:
+                continue
+            start, stop = int(self.class_bounds[code]), int(self.class_bounds[code + 1])
+            if limit is not None:
+                stop = min(stop, start + limit)
+            parts.append(self.class_rows[start:stop])
+        return _first_rows(parts, limit)
+
+    def rows_for_label(self, label: str, limit: int | None = None) -> np.ndarray:
+        if label not in self.label_names:
+            return np.zeros(0, dtype=np.int64)
+        code = self.label_names.index(label)
+        start, stop = int(self.label_bounds[code]), int(self.label_bounds[code + 1])
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return np.asarray(self.label_rows[start:stop], dtype=np.int64)
+
+    def summary(self) -> Dict[str, Any]:
+        predicted: Dict[str, int] = {}
+        for code in range(len(self.class_bounds) - 1):
+            count = int(self.class_bounds[code + 1] - self.class_bounds[code])
+            if count:
+                attack = attack_for_class(code).value
+                predicted[attack] = predicted.get(attack, 0) + count
+        labels = {
+            name: int(self.label_bounds[code + 1] - self.label_bounds[code])
+            for code, name in enumerate(self.label_names)
+        }
+        return {"rows": self.rows, "predicted": predicted, "labels": labels, "seekable": self.offsets is not None}
+
+
+def _window_signature(tracker: HostWindowTracker | None) -> str:
+    if tracker is None:
+        return "none"
+    return "{}|{}|{}|{}|{}".format(
+        ",".join(tracker.feature_names),
+        tracker.max_hosts,
+        tracker.max_events,
+        tracker.idle_seconds,
+        tracker.max_total_events,
+    )
+
+
+class DatasetFeatureStore:
+    """
+    Sidecars .npy con la matriz de features de cada dataset de zeek-lab.
+
+    La matriz se calcula una vez por contenido (hash SHA-256), versión del
+    esquema de features y tipo (float64/float32), en un hilo de fondo, y se guarda en `directory`. Las
+    simulaciones posteriores la abren con mmap en lugar de reconstruir las
+    features desde la fila 0; mientras no exista se sigue calculando al vuelo.
+    El hash también se calcula en ese hilo: las lecturas confían en el último
+    hash conocido mientras el archivo conserve tamaño y mtime.
+    El índice de clases puntúa el dataset completo con un InferencePool de
+    `workers` procesos.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        chunk_rows: int = SIDECAR_CHUNK_ROWS,
+        workers: int = 1,
+        pool_min_rows: int = DEFAULT_MIN_POOL_ROWS,
+    ):
+        self.directory = directory
+        self.chunk_rows = max(1, chunk_rows)
+        self.workers = workers
+        self.pool_min_rows = pool_min_rows
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dataset-features")
+        self._lock = threading.Lock()
+        self._pending: Dict[Path, Future] = {}
+        self._hashes: Dict[Path, Tuple[int, int, str]] = {}
+
+    def sidecar_path(self, dataset_path: Path, dataset_type: str, digest: str, dtype=np.float64) -> Path:
+        tag = f"{feature_schema_tag()}.{np.dtype(dtype).name}"
+        name = f"{dataset_path.stem}.{dataset_type}.{digest[:16]}.{tag}.features.npy"
+        return self.directory / name
+
+    def remember_hash(self, dataset_path: Path, digest: str) -> None:
+        """Registra el hash ya calculado (p. ej. al subir el archivo) para no releerlo."""
+
+        stat = dataset_path.stat()
+        with self._lock:
+            self._hashes[dataset_path] = (stat.st_size, stat.st_mtime_ns, digest)
+
+    def _known_hash(self, dataset_path: Path) -> str | None:
+        """Hash ya calculado si el archivo conserva tamaño y mtime; nunca lee el contenido."""
+
+        stat = dataset_path.stat()
+        with self._lock:
+            cached = self._hashes.get(dataset_path)
+        if cached and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        return None
+
+    def _content_hash(self, dataset_path: Path) -> str:
+        # Lee el archivo entero: solo desde el hilo de fondo, nunca en una petición.
+        digest = self._known_hash(dataset_path)
+        if digest is not None:
+            return digest
+        stat = dataset_path.stat()
+        digest = content_hash(dataset_path)
+        with self._lock:
+            self._hashes[dataset_path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def schedule(self, dataset_path: Path, dataset_type: str, dtype=np.float64) -> Future | None:
+        """Encola hash y construcción del sidecar si aún no existe. Devuelve None si ya está listo."""
+
+        digest = self._known_hash(dataset_path)
+        if digest is not None and self.sidecar_path(dataset_path, dataset_type, digest, dtype).exists():
+            return None
+        key = Path(f"{dataset_path}.{dataset_type}.{np.dtype(dtype).name}.features")
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and not pending.done():
+                return pending
+            future = self._executor.submit(self._build_features, dataset_path, dataset_type, dtype)
+            self._pending[key] = future
+        return future
+
+    def load(self, dataset_path: Path, dataset_type: str, dtype=np.float64) -> np.ndarray | None:
+        """Matriz mapeada en memoria si el sidecar existe; si no, programa su cálculo."""
+
+        try:
+            digest = self._known_hash(dataset_path)
+        except OSError:
+            return None
+        sidecar = self.sidecar_path(dataset_path, dataset_type, digest, dtype) if digest is not None else None
+        if sidecar is None or not sidecar.exists():
+            # Sin hash conocido (p. ej. tras un reinicio) se calcula en segundo plano.
+            self.schedule(dataset_path, dataset_type, dtype)
+            return None
+        try:
+            matrix = np.load(sidecar, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError) as exc:
+            logger.warning("Sidecar de features ilegible %s: %s", sidecar, exc)
+            return None
+        if matrix.ndim != 2 or matrix.shape[1] != len(TOP_FEATURES) or matrix.dtype != np.dtype(dtype):
+            return None
+        return matrix
+
+    def index_path(
+        self,
+        dataset_path: Path,
+        dataset_type: str,
+        digest: str,
+        dtype,
+        model_version: str,
+        host_windows: HostWindowTracker | None = None,
+    ) -> Path:
+        # El índice depende del modelo y de la configuración de ventanas, además del contenido.
+        key = f"{model_version}|{_window_signature(host_windows)}|v{CLASS_INDEX_VERSION}"
+        tag = f"{feature_schema_tag()}.{np.dtype(dtype).name}.{hashlib.sha256(key.encode('utf-8')).hexdigest()[:12]}"
+        return self.directory / f"{dataset_path.stem}.{dataset_type}.{digest[:16]}.{tag}.index"
+
+    def schedule_index(
+        self,
+        dataset_path: Path,
+        dataset_type: str,
+        model_provider: Callable[[], ModelAdapter],
+        dtype=np.float64,
+        host_windows_factory: Callable[[], HostWindowTracker | None] = lambda: None,
+    ) -> Future:
+        """
+        Encola el índice de clases (detrás del sidecar de features, en el mismo
+        hilo). El modelo se obtiene ya en segundo plano: subir un dataset no espera
+        a que se cargue.
+        """
+
+        key = Path(f"{dataset_path}.{dataset_type}.{np.dtype(dtype).name}.index")
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None and not pending.done():
+                return pending
+            future = self._executor.submit(
+                self._build_index, dataset_path, dataset_type, model_provider, dtype, host_windows_factory
+            )
+            self._pending[key] = future
+        return future
+
+    def load_index(
+        self,
+        dataset_path: Path,
+        dataset_type: str,
+        model_adapter: ModelAdapter,
+        dtype=np.float64,
+        host_windows_factory: Callable[[], HostWindowTracker | None] = lambda: None,
+    ) -> DatasetClassIndex | None:
+        """Índice de clases mapeado en memoria; si aún no existe, programa su cálculo y devuelve None."""
+
+        host_windows = host_windows_factory() if dataset_type != DATASET_TYPE_FEATURES else None
+        try:
+            digest = self._known_hash(dataset_path)
+        except OSError:
+            return None
+        target = None
+        if digest is not None:
+            target = self.index_path(dataset_path, dataset_type, digest, dtype, model_adapter.version, host_windows)
+        if target is None or not (target / "meta.json").exists():
+            self.schedule_index(dataset_path, dataset_type, lambda: model_adapter, dtype, host_windows_factory)
+            return None
+        try:
+            return self._read_index(target)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Índice de clases ilegible %s: %s", target, exc)
+            return None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _build_index(
+        self,
+        dataset_path: Path,
+        dataset_type: str,
+        model_provider: Callable[[], ModelAdapter],
+        dtype,
+        host_windows_factory: Callable[[], HostWindowTracker | None],
+    ) -> Path:
+        model = model_provider()
+        host_windows = host_windows_factory() if dataset_type != DATASET_TYPE_FEATURES else None
+        digest = self._content_hash(dataset_path)
+        target = self.index_path(dataset_path, dataset_type, digest, dtype, model.version, host_windows)
+        if (target / "meta.json").exists():
+            return target
+        feature_matrix = self.load(dataset_path, dataset_type, dtype)
+        pool = InferencePool(model, workers=self.workers, min_rows=self.pool_min_rows)
+        # Con varios workers cada bloque debe dar al menos un fragmento por proceso.
+        score_rows = max(self.chunk_rows, pool.workers * pool.min_rows) if pool.workers > 1 else self.chunk_rows
+        if dataset_type == DATASET_TYPE_FEATURES:
+            adapter = FeatureCSVAdapter(
+                dataset_path, model, batch_size=score_rows, feature_matrix=feature_matrix, feature_dtype=dtype
+            )
+        else:
+            # Tracker nuevo y pasada completa: las mismas ventanas que una simulación desde la fila 0.
+            adapter = ZeekAdapter(
+                dataset_path,
+                model,
+                batch_size=score_rows,
+                feature_matrix=feature_matrix,
+                feature_dtype=dtype,
+                host_windows=host_windows,
+            )
+
+        predicted: List[np.ndarray] = []
+        windows: List[np.ndarray] = []
+        label_codes: List[int] = []
+        label_names: Dict[str, int] = {}
+        with pool:
+            for schema, rows, inputs, window in adapter.iter_model_inputs(score_rows):
+                # predict_proba: el índice no pasa por la caché de predicciones ni el modelo sombra.
+                batch = model.batch_from_probabilities(pool.predict_proba(inputs))
+                predicted.append(batch.class_indices.astype(np.int16))
+                if window is not None:
+                    windows.append(np.array(window, dtype=np.float64))
+                label_idx = next((schema.header.index(name) for name in LABEL_COLUMNS if name in schema.header), None)
+                if label_idx is not None:
+                    for row in rows:
+                        label = str(row[label_idx] or "").strip()
+                        label_codes.append(label_names.setdefault(label, len(label_names)) if label else -1)
+
+        classes = np.concatenate(predicted) if predicted else np.zeros(0, dtype=np.int16)
+        n_rows = int(classes.shape[0])
+        class_rows, class_bounds = _group_rows(
+            classes.astype(np.int64), max(len(CLASS_ID_TO_NAME), int(classes.max(initial=-1)) + 1)
+        )
+        labels = np.asarray(label_codes if len(label_codes) == n_rows else [-1] * n_rows, dtype=np.int64)
+        label_rows, label_bounds = _group_rows(labels, len(label_names))
+        arrays = {
+            "class_rows": class_rows,
+            "class_bounds": class_bounds,
+            "label_rows": label_rows,
+            "label_bounds": label_bounds,
+        }
+        offsets = adapter.scan_row_offsets()
+        if offsets is not None and offsets.shape[0] == n_rows:
+            arrays["offsets"] = offsets
+        elif offsets is not None:
+            # Filas que ocupan varias líneas (comillas en CSV): no se puede saltar por línea.
+            logger.warning("Offsets descartados para %s: %s líneas vs %s filas", dataset_path, len(offsets), n_rows)
+        if windows:
+            arrays["windows"] = np.concatenate(windows)
+        meta = {"rows": n_rows, "label_names": list(label_names), "model_version": model.version}
+        self._write_index(target, arrays, meta)
+        logger.info("Índice de clases listo: %s (%s filas)", target.name, n_rows)
+        return target
+
+    def _write_index(self, target: Path, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        staging = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir()
+        try:
+            for name, array in arrays.items():
+                np.save(staging / f"{name}.npy", array, allow_pickle=False)
+            # meta.json se escribe al final: marca el índice como completo.
+            (staging / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _read_index(target: Path) -> DatasetClassIndex:
+        meta = json.loads((target / "meta.json").read_text(encoding="utf-8"))
+
+        def array(name: str) -> np.ndarray | None:
+            path = target / f"{name}.npy"
+            if not path.exists():
+                return None
+            try:
+                return np.load(path, mmap_mode="r", allow_pickle=False)
+            except ValueError:
+                # Un .npy sin datos no se puede mapear.
+                return np.load(path, allow_pickle=False)
+
+        return DatasetClassIndex(
+            rows=int(meta["rows"]),
+            class_rows=array("class_rows"),
+            class_bounds=np.asarray(array("class_bounds")),
+            label_names=list(meta["label_names"]),
+            label_rows=array("label_rows"),
+            label_bounds=np.asarray(array("label_bounds")),
+            offsets=array("offsets"),
+            windows=array("windows"),
+        )
+
+    def _build_features(self, dataset_path: Path, dataset_type: str, dtype) -> Path:
+        sidecar = self.sidecar_path(dataset_path, dataset_type, self._content_hash(dataset_path), dtype)
+        if sidecar.exists():
+            return sidecar
+        return self._build(dataset_path, dataset_type, sidecar, dtype)
+
+    def _build(self, dataset_path: Path, dataset_type: str, sidecar: Path, dtype) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        adapter_cls = FeatureCSVAdapter if dataset_type == DATASET_TYPE_FEATURES else ZeekAdapter
+        # Solo se usa el pipeline de features del adaptador; no se puntúa nada.
+        adapter = adapter_cls(dataset_path, None, batch_size=self.chunk_rows, feature_dtype=dtype)
+        dtype = adapter.feature_dtype
+        staging = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp.npy")
+        # Cada fila ocupa al menos una línea: se escribe directamente en el .npy
+        # mapeado y al final la cabecera se ajusta a las filas válidas.
+        capacity = count_lines(dataset_path)
+        try:
+            output = np.lib.format.open_memmap(
+                staging, mode="w+", dtype=dtype, shape=(capacity, len(TOP_FEATURES))
+            )
+            rows = 0
+            for matrix in adapter.iter_feature_matrices(self.chunk_rows):
+                output[rows : rows + matrix.shape[0]] = matrix
+                rows += matrix.shape[0]
+            output.flush()
+            del output
+            if rows != capacity:
+                _truncate_npy_rows(staging, rows)
+            os.replace(staging, sidecar)
+        finally:
+            staging.unlink(missing_ok=True)
+        logger.info("Sidecar de features listo: %s (%s filas)", sidecar.name, rows)
+        return sidecar
+
+
+def get_dataset_feature_store(
+    app,
+    directory: Path,
+    workers: int = 1,
+    pool_min_rows: int = DEFAULT_MIN_POOL_ROWS,
+) -> DatasetFeatureStore:
+    store = getattr(app.state, "dataset_feature_store", None)
+    if store is None:
+        store = DatasetFeatureStore(directory, workers=workers, pool_min_rows=pool_min_rows)
+        app.state.dataset_feature_store = store
+    return store
+
+
+def stop_dataset_feature_store(app) -> bool:
+    store = getattr(app.state, "dataset_feature_store", None)
+    if store is None:
+        return False
+    store.close()
+    app.state.dataset_feature_store = None
+    return True
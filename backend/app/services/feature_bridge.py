@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import csv
-from dataclasses import dataclass
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping
+from typing import Dict, Iterable, Iterator, List, Mapping, Sequence
 
 import joblib
 import numpy as np
@@ -18,6 +20,8 @@ STD_ESTIMATE_FRACTION = 0.1
 EPSILON = 1e-6
 HTTP_PORTS = {80, 8080, 8000, 443}
 SSH_PORTS = {22}
+HTTP_SERVICES = {"http", "http-alt", "https"}
+CICFLOW_CHUNK_ROWS = 50_000
 
 TOP20_FEATURES: List[str] = [
     "Bwd Packet Length Max",
@@ -63,16 +67,74 @@ class ModelArtifacts:
     """
     Define rutas a scaler y modelo entrenados sobre CICIDS2017 (top-20 features).
     Permite reutilizar instancias sin asumir rutas fijas en el código.
+
+    Ambos artefactos se deserializan una sola vez (bajo lock, seguro entre hilos)
+    y quedan en memoria; `predict_rows` mapea, escala y puntúa un lote completo.
     """
 
     scaler_path: Path
     model_path: Path
+    _scaler: object = field(default=None, init=False, repr=False, compare=False)
+    _model: object = field(default=None, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
 
     def load_scaler(self):
-        return joblib.load(self.scaler_path)
+        return self.load()[0]
 
     def load_model(self):
-        return joblib.load(self.model_path)
+        return self.load()[1]
+
+    def load(self) -> tuple[object, object]:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    scaler = joblib.load(self.scaler_path)
+                    self._scaler = scaler
+                    self._model = joblib.load(self.model_path)
+        return self._scaler, self._model
+
+    def predict_matrix(self, matrix: np.ndarray) -> List[Dict[str, object]]:
+        """Escala y puntúa una matriz N×20 (orden TOP20_FEATURES) en una sola llamada."""
+
+        scaler, model = self.load()
+        if matrix.shape[0] == 0:
+            return []
+        probabilities = model.predict_proba(scaler.transform(matrix))
+        classes = [str(cls) for cls in model.classes_]
+        predicted = np.argmax(probabilities, axis=1)
+        results: List[Dict[str, object]] = []
+        for row_idx, class_idx in enumerate(predicted.tolist()):
+            row_proba = probabilities[row_idx].tolist()
+            results.append(
+                {
+                    "predicted_label": classes[class_idx],
+                    "predicted_proba": row_proba[class_idx],
+                    "probabilities": dict(zip(classes, row_proba)),
+                    "features_vector": matrix[row_idx].tolist(),
+                }
+            )
+        return results
+
+    def predict_frame(self, frame: pd.DataFrame) -> List[Dict[str, object]]:
+        """Puntúa un bloque de `iter_cicflow_log` sin recorrerlo fila a fila."""
+
+        return self.predict_matrix(map_cicflow_frame_to_features(frame))
+
+    def predict_rows(self, rows: Iterable[Mapping[str, float]]) -> List[Dict[str, object]]:
+        """Mapea varias filas de cicflow.log al vector top-20 y las puntúa juntas."""
+
+        matrix = np.asarray(
+            [[features[name] for name in TOP20_FEATURES] for features in map(map_cicflow_row_to_features, rows)],
+            dtype=float,
+        ).reshape(-1, len(TOP20_FEATURES))
+        return self.predict_matrix(matrix)
+
+
+@lru_cache(maxsize=8)
+def get_model_artifacts(scaler_path: str | Path, model_path: str | Path) -> ModelArtifacts:
+    """Pipeline scaler+modelo compartido por proceso para un par de rutas."""
+
+    return ModelArtifacts(scaler_path=Path(scaler_path), model_path=Path(model_path))
 
 
 def load_cicflow_log(path: str | Path) -> pd.DataFrame:
@@ -85,6 +147,81 @@ def load_cicflow_log(path: str | Path) -> pd.DataFrame:
     return df
 
 
+def iter_cicflow_log(path: str | Path, chunksize: int = CICFLOW_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Recorre cicflow.log en DataFrames de como mucho `chunksize` filas, de modo
+    que la memoria se mantiene acotada aunque el log ocupe varios GB.
+    """
+
+    with pd.read_csv(path, sep="\t", comment="#", chunksize=max(1, chunksize)) as reader:
+        for chunk in reader:
+            chunk.columns = [str(col).strip() for col in chunk.columns]
+            yield chunk
+
+
+# Columna de cicflow.log (y alternativa si falta o no es numérica) de cada feature TOP20.
+CICFLOW_TOP20_SOURCES: Dict[str, tuple[str, ...]] = {
+    "Bwd Packet Length Max": ("bwd_pkt_len_max",),
+    "Avg Fwd Segment Size": ("avg_fwd_seg_size",),
+    "Fwd Packet Length Mean": ("fwd_pkt_len_mean",),
+    "Bwd Packet Length Min": ("bwd_pkt_len_min",),
+    "PSH Flag Count": ("psh_flag_count",),
+    "Subflow Fwd Packets": ("subflow_fwd_pkts", "total_fwd_pkts"),
+    "Total Length of Bwd Packets": ("total_bwd_len",),
+    "Total Fwd Packets": ("total_fwd_pkts",),
+    "act_data_pkt_fwd": ("act_data_pkt_fwd",),
+    "Fwd Packet Length Min": ("fwd_pkt_len_min",),
+    "Idle Min": ("idle_min",),
+    "Bwd Packets/s": ("bwd_pkts_per_sec",),
+    "Destination Port": ("id_resp_p", "dst_port"),
+    "min_seg_size_forward": ("min_seg_size_forward", "avg_fwd_seg_size"),
+    "Init_Win_bytes_backward": ("init_win_bytes_bwd",),
+    "Bwd Packet Length Std": ("bwd_pkt_len_std",),
+    "Avg Bwd Segment Size": ("avg_bwd_seg_size",),
+    "Packet Length Mean": ("pkt_len_mean",),
+    "Min Packet Length": ("min_pkt_len",),
+    "Bwd Packet Length Mean": ("bwd_pkt_len_mean",),
+}
+
+
+def _cicflow_column(frame: pd.DataFrame, sources: Sequence[str]) -> np.ndarray:
+    """
+    Equivalente columnar de los `_get` anidados: usa la primera columna y, en
+    las celdas donde falta o float() falla, la alternativa (o 0.0).
+    """
+
+    fallback = _cicflow_column(frame, sources[1:]) if len(sources) > 1 else np.zeros(len(frame.index))
+    if sources[0] not in frame.columns:
+        return fallback
+    values = frame[sources[0]].to_numpy()
+    if values.dtype.kind in "biuf":
+        return values.astype(np.float64)
+    values = values.astype(object)
+    try:
+        return values.astype(np.float64)
+    except (TypeError, ValueError):
+        parsed = fallback.copy()
+        for idx, value in enumerate(values):
+            try:
+                parsed[idx] = float(value)
+            except (TypeError, ValueError):
+                continue
+        return parsed
+
+
+def map_cicflow_frame_to_features(frame: pd.DataFrame) -> np.ndarray:
+    """
+    Versión vectorizada de `map_cicflow_row_to_features` para un bloque de
+    cicflow.log: devuelve una matriz N×20 float64 en el orden de TOP20_FEATURES.
+    Las columnas alternativas se resuelven una vez por bloque.
+    """
+
+    matrix = np.empty((len(frame.index), len(TOP20_FEATURES)), dtype=np.float64)
+    for col_idx, name in enumerate(TOP20_FEATURES):
+        matrix[:, col_idx] = _cicflow_column(frame, CICFLOW_TOP20_SOURCES[name])
+    return matrix
+
+
 def map_cicflow_row_to_features(row: Mapping[str, float]) -> Dict[str, float]:
     """
     Mapea una fila proveniente de cicflow.log al vector de 20 features
@@ -137,23 +274,7 @@ def predict_from_cicflow_row(
     y devuelve etiqueta/puntajes listos para integrarse a un backend.
     """
 
-    features = map_cicflow_row_to_features(row)
-    vector = vectorize_features(features)
-
-    scaler = artifacts.load_scaler()
-    model = artifacts.load_model()
-
-    scaled = scaler.transform(vector)
-    probabilities = model.predict_proba(scaled)[0]
-    predicted_idx = int(np.argmax(probabilities))
-    predicted_label = model.classes_[predicted_idx]
-
-    return {
-        "predicted_label": str(predicted_label),
-        "predicted_proba": float(probabilities[predicted_idx]),
-        "probabilities": {str(cls): float(prob) for cls, prob in zip(model.classes_, probabilities)},
-        "features_vector": vector[0].tolist(),
-    }
+    return artifacts.predict_rows([row])[0]
 
 
 def _safe_float(value: str | None, default: float = 0.0) -> float:
@@ -224,7 +345,7 @@ def build_conn_feature_vector(row: Mapping[str, str]) -> Dict[str, float]:
     service = (row.get("service") or "").strip().lower()
     dst_port = int(_get_number(row, "id.resp_p", "resp_p", default=0.0))
 
-    is_http = 1.0 if (service in {"http", "http-alt", "https"} or dst_port in HTTP_PORTS) else 0.0
+    is_http = 1.0 if (service in HTTP_SERVICES or dst_port in HTTP_PORTS) else 0.0
     is_ssh = 1.0 if (service == "ssh" or dst_port in SSH_PORTS) else 0.0
 
     vector = {
@@ -248,6 +369,147 @@ def build_conn_feature_vector(row: Mapping[str, str]) -> Dict[str, float]:
     return {name: float(vector.get(name, 0.0)) for name in TOP_FEATURES}
 
 
+# Columnas de conn.log que lee build_conn_feature_matrix.
+CONN_FEATURE_COLUMNS: List[str] = [
+    "duration",
+    "orig_bytes",
+    "orig_ip_bytes",
+    "resp_bytes",
+    "resp_ip_bytes",
+    "orig_pkts",
+    "resp_pkts",
+    "proto",
+    "service",
+    "id.resp_p",
+    "resp_p",
+]
+
+ColumnChunk = pd.DataFrame | Mapping[str, Sequence[str] | np.ndarray]
+
+
+def _chunk_length(chunk: ColumnChunk) -> int:
+    if isinstance(chunk, pd.DataFrame):
+        return len(chunk.index)
+    for values in chunk.values():
+        return len(values)
+    return 0
+
+
+def _column_values(chunk: ColumnChunk, name: str) -> np.ndarray | None:
+    if name not in chunk:
+        return None
+    values = chunk[name]
+    if isinstance(values, pd.Series):
+        return values.to_numpy()
+    return np.asarray(values) if isinstance(values, np.ndarray) else np.asarray(values, dtype=object)
+
+
+def _parse_number_column(
+    values: np.ndarray,
+    default: float | np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Equivalente columnar de `_has_value` + `_safe_float`. Devuelve los valores
+    (con `default`, escalar o por fila, en celdas vacías o inválidas) y la
+    máscara de celdas con valor (ni vacías, ni "-", ni None).
+    """
+
+    defaults = np.broadcast_to(np.asarray(default, dtype=np.float64), values.shape)
+    if values.dtype.kind in "biuf":
+        parsed = values.astype(np.float64)
+        present = ~np.isnan(parsed)
+        return np.where(present, parsed, defaults), present
+    text = pd.Series(values, dtype=object).str.strip()
+    present = (text.notna() & (text != "") & (text != "-")).to_numpy()
+    parsed = defaults.copy()
+    candidates = text.to_numpy()[present].astype(str)
+    try:
+        parsed[present] = candidates.astype(np.float64)
+    except ValueError:
+        # Separadores de miles u otros restos: se resuelven fila a fila como antes.
+        for idx, value in zip(np.flatnonzero(present), candidates):
+            parsed[idx] = _safe_float(value, parsed[idx])
+    return parsed, present
+
+
+def _number_column(chunk: ColumnChunk, n_rows: int, *names: str, default: float = 0.0) -> np.ndarray:
+    """Versión columnar de `_get_number`: primera columna con valor en cada fila."""
+
+    result = np.full(n_rows, default, dtype=np.float64)
+    resolved = np.zeros(n_rows, dtype=bool)
+    for name in names:
+        values = _column_values(chunk, name)
+        if values is None:
+            continue
+        parsed, present = _parse_number_column(values, default)
+        take = present & ~resolved
+        result[take] = parsed[take]
+        resolved |= take
+    return result
+
+
+def _text_column(chunk: ColumnChunk, n_rows: int, name: str) -> pd.Series:
+    values = _column_values(chunk, name)
+    if values is None:
+        return pd.Series([""] * n_rows, dtype=object)
+    text = pd.Series(values, dtype=object)
+    return text.where(text.notna() & (text != ""), "").astype(str).str.strip()
+
+
+def _non_negative(values: np.ndarray) -> np.ndarray:
+    # Igual que max(value, 0.0): conserva NaN y -0.0.
+    return np.where(0.0 > values, 0.0, values)
+
+
+def build_conn_feature_matrix(chunk: ColumnChunk, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Versión columnar de `build_conn_feature_vector` para un bloque completo de
+    conn.log (DataFrame o diccionario columna -> valores, como texto del CSV o
+    ya numéricos). Devuelve una matriz N×len(TOP_FEATURES) float64 en el orden
+    de TOP_FEATURES, numéricamente idéntica a aplicar la versión fila a fila.
+    Con `out` se escribe en ese buffer preasignado (y su número de filas manda).
+    """
+
+    n_rows = out.shape[0] if out is not None else _chunk_length(chunk)
+    duration = _non_negative(_number_column(chunk, n_rows, "duration"))
+    orig_bytes = _non_negative(_number_column(chunk, n_rows, "orig_bytes", "orig_ip_bytes"))
+    resp_bytes = _non_negative(_number_column(chunk, n_rows, "resp_bytes", "resp_ip_bytes"))
+    orig_pkts = _non_negative(_number_column(chunk, n_rows, "orig_pkts"))
+    resp_pkts = _non_negative(_number_column(chunk, n_rows, "resp_pkts"))
+
+    proto = _text_column(chunk, n_rows, "proto").str.upper().to_numpy()
+    service = _text_column(chunk, n_rows, "service").str.lower()
+    dst_port = np.trunc(_number_column(chunk, n_rows, "id.resp_p", "resp_p"))
+
+    is_http = service.isin(HTTP_SERVICES).to_numpy() | np.isin(dst_port, list(HTTP_PORTS))
+    is_ssh = (service == "ssh").to_numpy() | np.isin(dst_port, list(SSH_PORTS))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bytes_ratio = orig_bytes / np.where(EPSILON > resp_bytes, EPSILON, resp_bytes)
+        pkts_ratio = orig_pkts / np.where(EPSILON > resp_pkts, EPSILON, resp_pkts)
+
+    columns = {
+        "duration": duration,
+        "orig_bytes": orig_bytes,
+        "resp_bytes": resp_bytes,
+        "orig_pkts": orig_pkts,
+        "resp_pkts": resp_pkts,
+        "bytes_total": orig_bytes + resp_bytes,
+        "bytes_ratio": bytes_ratio,
+        "pkts_total": orig_pkts + resp_pkts,
+        "pkts_ratio": pkts_ratio,
+        "proto_tcp": proto == "TCP",
+        "proto_udp": proto == "UDP",
+        "proto_icmp": proto == "ICMP",
+        "is_http": is_http,
+        "is_ssh": is_ssh,
+    }
+    matrix = out if out is not None else np.empty((n_rows, len(TOP_FEATURES)), dtype=np.float64)
+    for col_idx, name in enumerate(TOP_FEATURES):
+        matrix[:, col_idx] = columns.get(name, 0.0)
+    return matrix
+
+
 # Compatibilidad hacia atrás: algunos scripts seguían importando este nombre.
 build_cicids_feature_vector = build_conn_feature_vector
 
@@ -292,14 +554,14 @@ def build_cicids_full_feature_vector(row: Dict[str, str]) -> Dict[str, float]:
     fwd_iat_mean = duration / max(orig_pkts, 1.0)
     bwd_iat_mean = duration / max(resp_pkts, 1.0)
 
-    history = row.get("history", "") or ""
-    syn_flags = history.count("S") + history.count("s")
-    fin_flags = history.count("F") + history.count("f")
-    rst_flags = history.count("R") + history.count("r")
-    ack_flags = history.count("A") + history.count("a")
-    urg_flags = history.count("U") + history.count("u")
-    psh_flags = history.count("P") + history.count("p")
-    ece_flags = history.count("E") + history.count("e")
+    history = Counter(row.get("history", "") or "")
+    syn_flags = history["S"] + history["s"]
+    fin_flags = history["F"] + history["f"]
+    rst_flags = history["R"] + history["r"]
+    ack_flags = history["A"] + history["a"]
+    urg_flags = history["U"] + history["u"]
+    psh_flags = history["P"] + history["p"]
+    ece_flags = history["E"] + history["e"]
 
     down_up_ratio = resp_ip_bytes / orig_ip_bytes if orig_ip_bytes > 0 else resp_ip_bytes
 
@@ -335,8 +597,8 @@ def build_cicids_full_feature_vector(row: Dict[str, str]) -> Dict[str, float]:
     set_feature("Subflow Bwd Packets", resp_pkts)
     set_feature("Subflow Fwd Bytes", orig_ip_bytes)
     set_feature("Subflow Bwd Bytes", resp_ip_bytes)
-    set_feature("Fwd PSH Flags", history.count("P"))
-    set_feature("Bwd PSH Flags", history.count("p"))
+    set_feature("Fwd PSH Flags", history["P"])
+    set_feature("Bwd PSH Flags", history["p"])
     set_feature("PSH Flag Count", psh_flags)
     set_feature("ACK Flag Count", ack_flags)
     set_feature("URG Flag Count", urg_flags)
@@ -344,7 +606,7 @@ def build_cicids_full_feature_vector(row: Dict[str, str]) -> Dict[str, float]:
     set_feature("FIN Flag Count", fin_flags)
     set_feature("RST Flag Count", rst_flags)
     set_feature("ECE Flag Count", ece_flags)
-    set_feature("act_data_pkt_fwd", max(orig_pkts - history.count("P") - syn_flags, 0.0))
+    set_feature("act_data_pkt_fwd", max(orig_pkts - history["P"] - syn_flags, 0.0))
     set_feature("min_seg_size_forward", fwd_mean)
     set_feature("Destination Port", _safe_float(row.get("id.resp_p")))
     set_feature("Init_Win_bytes_backward", resp_bytes or resp_ip_bytes)
@@ -367,7 +629,6 @@ def build_cicids_full_feature_vector(row: Dict[str, str]) -> Dict[str, float]:
     set_feature("Bwd IAT Min", bwd_iat_mean)
     set_feature("Bwd IAT Std", _approx_std(bwd_iat_mean))
     set_feature("Bwd IAT Total", duration)
-    set_feature("Flow IAT Mean", avg_iat_total)
     set_feature("Idle Mean", idle_time)
     set_feature("Idle Min", idle_time * 0.8 if idle_time else 0.0)
     set_feature("Idle Max", idle_time * 1.2 if idle_time else 0.0)
@@ -376,21 +637,213 @@ def build_cicids_full_feature_vector(row: Dict[str, str]) -> Dict[str, float]:
     set_feature("Active Min", active_time * 0.8 if active_time else 0.0)
     set_feature("Active Max", active_time * 1.2 if active_time else 0.0)
     set_feature("Active Std", _approx_std(active_time))
-    set_feature("Flow Bytes/s", flow_bytes_s)
-    set_feature("Average Packet Size", avg_pkt_length)
-    set_feature("Bwd Packets/s", bwd_pkts_s)
-    set_feature("Fwd Packets/s", fwd_pkts_s)
-    set_feature("Subflow Bwd Bytes", resp_ip_bytes)
-    set_feature("Subflow Fwd Bytes", orig_ip_bytes)
     set_feature("Bwd Avg Bytes/Bulk", 0.0)
     set_feature("Bwd Avg Packets/Bulk", 0.0)
     set_feature("Bwd Avg Bulk Rate", 0.0)
     set_feature("Fwd Avg Bytes/Bulk", 0.0)
     set_feature("Fwd Avg Packets/Bulk", 0.0)
     set_feature("Fwd Avg Bulk Rate", 0.0)
-    set_feature("Bwd URG Flags", history.count("u"))
-    set_feature("Fwd URG Flags", history.count("U"))
-    set_feature("Flow Packets/s", pkt_rate)
-    set_feature("Flow Bytes/s", flow_bytes_s)
+    set_feature("Bwd URG Flags", history["u"])
+    set_feature("Fwd URG Flags", history["U"])
 
     return features
+
+
+# Letras de `history` que cuentan las features de flags, en orden de columna.
+_HISTORY_FLAGS = "SsFfRrAaUuPpEe"
+_HISTORY_LOOKUP = np.full(256, -1, dtype=np.int64)
+for _flag_idx, _flag in enumerate(_HISTORY_FLAGS):
+    _HISTORY_LOOKUP[ord(_flag)] = _flag_idx
+
+
+def _history_flag_counts(chunk: ColumnChunk, n_rows: int) -> Dict[str, np.ndarray]:
+    """Cuenta todas las letras de `history` de un bloque en una única pasada sobre sus bytes."""
+
+    values = _column_values(chunk, "history")
+    if values is None or n_rows == 0:
+        return {flag: np.zeros(n_rows, dtype=np.float64) for flag in _HISTORY_FLAGS}
+    encoded = [
+        value.encode("utf-8", "surrogatepass") if isinstance(value, str) else b"" for value in values
+    ]
+    lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=n_rows)
+    # En UTF-8 los bytes ASCII nunca aparecen dentro de un carácter multibyte.
+    codes = _HISTORY_LOOKUP[np.frombuffer(b"".join(encoded), dtype=np.uint8)]
+    row_ids = np.repeat(np.arange(n_rows), lengths)
+    flagged = codes >= 0
+    counts = np.bincount(
+        row_ids[flagged] * len(_HISTORY_FLAGS) + codes[flagged],
+        minlength=n_rows * len(_HISTORY_FLAGS),
+    ).reshape(n_rows, len(_HISTORY_FLAGS))
+    return {flag: counts[:, idx].astype(np.float64) for idx, flag in enumerate(_HISTORY_FLAGS)}
+
+
+def _float_column(chunk: ColumnChunk, n_rows: int, name: str, default: float | np.ndarray = 0.0) -> np.ndarray:
+    """Versión columnar de `_safe_float(row.get(name), default)`."""
+
+    values = _column_values(chunk, name)
+    if values is None:
+        return np.array(np.broadcast_to(default, (n_rows,)), dtype=np.float64)
+    return _parse_number_column(values, default)[0]
+
+
+def _py_max(first: np.ndarray, *others: np.ndarray | float) -> np.ndarray:
+    # Misma semántica que max() de Python: gana el primero salvo que otro sea mayor.
+    result = first
+    for other in others:
+        result = np.where(other > result, other, result)
+    return result
+
+
+def _py_min(first: np.ndarray, other: np.ndarray | float) -> np.ndarray:
+    return np.where(other < first, other, first)
+
+
+def _per_packet_array(total_bytes: np.ndarray, packets: np.ndarray) -> np.ndarray:
+    return np.where(packets <= 0, total_bytes, total_bytes / packets)
+
+
+def _approx_std_array(values: np.ndarray) -> np.ndarray:
+    return np.where(values <= 0, 0.0, values * STD_ESTIMATE_FRACTION)
+
+
+def _per_second(values: np.ndarray, duration: np.ndarray) -> np.ndarray:
+    return np.where(duration > 0, values / duration, values)
+
+
+def _scaled_if_nonzero(values: np.ndarray, factor: float) -> np.ndarray:
+    return np.where(values != 0, values * factor, 0.0)
+
+
+def build_cicids_full_feature_matrix(chunk: ColumnChunk) -> np.ndarray:
+    """
+    Versión columnar de `build_cicids_full_feature_vector` para N filas de
+    conn.log. Devuelve una matriz float32 preasignada con las columnas en el
+    orden de `cicids_feature_names()`; las features que la heurística no cubre
+    quedan a 0.
+    """
+
+    names = cicids_feature_names()
+    n_rows = _chunk_length(chunk)
+    matrix = np.zeros((n_rows, len(names)), dtype=np.float32)
+    if n_rows == 0 or not names:
+        return matrix
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        duration = _py_max(_float_column(chunk, n_rows, "duration"), MIN_DURATION)
+        orig_pkts = _non_negative(_float_column(chunk, n_rows, "orig_pkts"))
+        resp_pkts = _non_negative(_float_column(chunk, n_rows, "resp_pkts"))
+        orig_bytes = _non_negative(_float_column(chunk, n_rows, "orig_bytes"))
+        resp_bytes = _non_negative(_float_column(chunk, n_rows, "resp_bytes"))
+        orig_ip_bytes = _py_max(_float_column(chunk, n_rows, "orig_ip_bytes", orig_bytes), orig_bytes)
+        resp_ip_bytes = _py_max(_float_column(chunk, n_rows, "resp_ip_bytes", resp_bytes), resp_bytes)
+
+        total_pkts = orig_pkts + resp_pkts
+        total_bytes = orig_ip_bytes + resp_ip_bytes
+
+        fwd_mean = _per_packet_array(orig_ip_bytes, orig_pkts)
+        bwd_mean = _per_packet_array(resp_ip_bytes, resp_pkts)
+        avg_pkt_length = _per_packet_array(total_bytes, total_pkts)
+        max_pkt_length = _py_max(fwd_mean, bwd_mean, avg_pkt_length)
+        lengths = np.stack([fwd_mean, bwd_mean, avg_pkt_length])
+        min_pkt_length = np.where(
+            (lengths > 0).any(axis=0),
+            np.where(lengths > 0, lengths, np.inf).min(axis=0),
+            0.0,
+        )
+
+        pkt_rate = _per_second(total_pkts, duration)
+        fwd_pkts_s = _per_second(orig_pkts, duration)
+        bwd_pkts_s = _per_second(resp_pkts, duration)
+        flow_bytes_s = _per_second(total_bytes, duration)
+
+        avg_iat_total = duration / _py_max(total_pkts, 1.0)
+        fwd_iat_mean = duration / _py_max(orig_pkts, 1.0)
+        bwd_iat_mean = duration / _py_max(resp_pkts, 1.0)
+
+        history = _history_flag_counts(chunk, n_rows)
+        syn_flags = history["S"] + history["s"]
+
+        down_up_ratio = np.where(orig_ip_bytes > 0, resp_ip_bytes / orig_ip_bytes, resp_ip_bytes)
+        idle_time = _non_negative(duration - _py_min(duration, total_pkts * 0.001))
+        active_time = duration - idle_time
+        avg_pkt_std = _approx_std_array(avg_pkt_length)
+
+        columns: Dict[str, np.ndarray] = {
+            "Flow Duration": duration,
+            "Total Fwd Packets": orig_pkts,
+            "Total Backward Packets": resp_pkts,
+            "Total Length of Fwd Packets": orig_ip_bytes,
+            "Total Length of Bwd Packets": resp_ip_bytes,
+            "Avg Fwd Segment Size": fwd_mean,
+            "Avg Bwd Segment Size": bwd_mean,
+            "Fwd Packet Length Mean": fwd_mean,
+            "Bwd Packet Length Mean": bwd_mean,
+            "Fwd Packet Length Min": np.where(fwd_mean != 0, fwd_mean, avg_pkt_length),
+            "Fwd Packet Length Max": _py_max(fwd_mean, avg_pkt_length),
+            "Bwd Packet Length Max": _py_max(bwd_mean, resp_ip_bytes / _py_max(resp_pkts, 1.0)),
+            "Bwd Packet Length Min": np.where(bwd_mean != 0, bwd_mean, avg_pkt_length),
+            "Bwd Packet Length Std": _approx_std_array(bwd_mean),
+            "Fwd Packet Length Std": _approx_std_array(fwd_mean),
+            "Packet Length Mean": avg_pkt_length,
+            "Average Packet Size": avg_pkt_length,
+            "Max Packet Length": max_pkt_length,
+            "Min Packet Length": min_pkt_length,
+            "Packet Length Std": avg_pkt_std,
+            "Packet Length Variance": avg_pkt_std**2,
+            "Flow Packets/s": pkt_rate,
+            "Flow Bytes/s": flow_bytes_s,
+            "Fwd Packets/s": fwd_pkts_s,
+            "Bwd Packets/s": bwd_pkts_s,
+            "Subflow Fwd Packets": orig_pkts,
+            "Subflow Bwd Packets": resp_pkts,
+            "Subflow Fwd Bytes": orig_ip_bytes,
+            "Subflow Bwd Bytes": resp_ip_bytes,
+            "Fwd PSH Flags": history["P"],
+            "Bwd PSH Flags": history["p"],
+            "PSH Flag Count": history["P"] + history["p"],
+            "ACK Flag Count": history["A"] + history["a"],
+            "URG Flag Count": history["U"] + history["u"],
+            "SYN Flag Count": syn_flags,
+            "FIN Flag Count": history["F"] + history["f"],
+            "RST Flag Count": history["R"] + history["r"],
+            "ECE Flag Count": history["E"] + history["e"],
+            "act_data_pkt_fwd": _non_negative(orig_pkts - history["P"] - syn_flags),
+            "min_seg_size_forward": fwd_mean,
+            "Destination Port": _float_column(chunk, n_rows, "id.resp_p"),
+            "Init_Win_bytes_backward": np.where(resp_bytes != 0, resp_bytes, resp_ip_bytes),
+            "Init_Win_bytes_forward": np.where(orig_bytes != 0, orig_bytes, orig_ip_bytes),
+            "Fwd Header Length": orig_pkts * HEADER_BYTES_ESTIMATE,
+            "Fwd Header Length.1": orig_pkts * HEADER_BYTES_ESTIMATE,
+            "Bwd Header Length": resp_pkts * HEADER_BYTES_ESTIMATE,
+            "Down/Up Ratio": down_up_ratio,
+            "Flow IAT Mean": avg_iat_total,
+            "Flow IAT Max": avg_iat_total,
+            "Flow IAT Min": avg_iat_total,
+            "Flow IAT Std": _approx_std_array(avg_iat_total),
+            "Fwd IAT Mean": fwd_iat_mean,
+            "Fwd IAT Max": fwd_iat_mean,
+            "Fwd IAT Min": fwd_iat_mean,
+            "Fwd IAT Std": _approx_std_array(fwd_iat_mean),
+            "Fwd IAT Total": duration,
+            "Bwd IAT Mean": bwd_iat_mean,
+            "Bwd IAT Max": bwd_iat_mean,
+            "Bwd IAT Min": bwd_iat_mean,
+            "Bwd IAT Std": _approx_std_array(bwd_iat_mean),
+            "Bwd IAT Total": duration,
+            "Idle Mean": idle_time,
+            "Idle Min": _scaled_if_nonzero(idle_time, 0.8),
+            "Idle Max": _scaled_if_nonzero(idle_time, 1.2),
+            "Idle Std": _approx_std_array(idle_time),
+            "Active Mean": active_time,
+            "Active Min": _scaled_if_nonzero(active_time, 0.8),
+            "Active Max": _scaled_if_nonzero(active_time, 1.2),
+            "Active Std": _approx_std_array(active_time),
+            "Bwd URG Flags": history["u"],
+            "Fwd URG Flags": history["U"],
+        }
+
+    for col_idx, name in enumerate(names):
+        values = columns.get(name)
+        if values is not None:
+            matrix[:, col_idx] = values
+    return matrix
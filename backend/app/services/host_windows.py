@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .feature_bridge import _safe_float
+
+# Columnas de conn.log que alimentan las ventanas por host.
+HOST_WINDOW_COLUMNS = ["ts", "id.orig_h", "id.resp_h", "id.resp_p"]
+DEFAULT_WINDOWS = (10.0, 60.0)
+DEFAULT_MAX_TOTAL_EVENTS = 1_000_000
+
+# Estimación de bytes para stats(): tupla del flujo en la cola más su entrada en
+# los contadores de distintos, y estado fijo de cada host/ventana (deque + dicts).
+_EVENT_BYTES = 160
+_HOST_BYTES = 120
+_WINDOW_BYTES = 1100
+
+
+def _as_float(value) -> float:
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        number = _safe_float(value)
+    return number if math.isfinite(number) else 0.0
+
+
+def host_window_feature_names(windows: Sequence[float] = DEFAULT_WINDOWS) -> List[str]:
+    names: List[str] = []
+    for seconds in windows:
+        label = f"{seconds:g}s"
+        names.extend(
+            [
+                f"host_conn_rate_{label}",
+                f"host_distinct_dst_ports_{label}",
+                f"host_distinct_dst_hosts_{label}",
+            ]
+        )
+    return names
+
+
+class _Window:
+    """Flujos recientes de un host dentro de una ventana, con conteos de distintos."""
+
+    __slots__ = ("events", "ports", "hosts")
+
+    def __init__(self):
+        self.events: deque = deque()
+        self.ports: Dict[int, int] = {}
+        self.hosts: Dict[str, int] = {}
+
+    def add(self, ts: float, dst_host: str, dst_port: int) -> None:
+        self.events.append((ts, dst_host, dst_port))
+        self.ports[dst_port] = self.ports.get(dst_port, 0) + 1
+        self.hosts[dst_host] = self.hosts.get(dst_host, 0) + 1
+
+    def pop_oldest(self) -> None:
+        _, dst_host, dst_port = self.events.popleft()
+        remaining = self.ports[dst_port] - 1
+        if remaining:
+            self.ports[dst_port] = remaining
+        else:
+            del self.ports[dst_port]
+        remaining = self.hosts[dst_host] - 1
+        if remaining:
+            self.hosts[dst_host] = remaining
+        else:
+            del self.hosts[dst_host]
+
+    def expire(self, cutoff: float) -> None:
+        events = self.events
+        while events and events[0][0] <= cutoff:
+            self.pop_oldest()
+
+
+class _HostState:
+    __slots__ = ("windows", "last_seen")
+
+    def __init__(self, n_windows: int):
+        self.windows = tuple(_Window() for _ in range(n_windows))
+        self.last_seen = 0.0
+
+    def event_count(self) -> int:
+        return sum(len(window.events) for window in self.windows)
+
+
+class HostWindowTracker:
+    """
+    Features de comportamiento por IP origen sobre ventanas deslizantes.
+
+    Cada flujo actualiza el estado de su host en O(1) amortizado: por ventana,
+    una cola con los flujos vivos y dos contadores (puertos y hosts destino) que
+    dan los distintos sin recorrer la cola. El reloj es el mayor `ts` visto, de
+    modo que el replay de un conn.log se comporta igual que el tráfico en vivo;
+    los flujos algo desordenados se aceptan tal cual.
+
+    La memoria está acotada: cada ventana guarda como mucho `max_events` flujos
+    (al llenarse se descartan los más antiguos, y los distintos pasan a ser una
+    cota inferior), los hosts sin actividad en `idle_seconds` se expulsan y, por
+    encima de `max_hosts`, se expulsa el host menos reciente. Además, el total
+    de flujos guardados entre todos los hosts no supera `max_total_events`: al
+    rebasarlo se expulsa el host menos reciente, de modo que muchos hosts
+    ruidosos no pueden sumar `max_hosts * max_events` flujos.
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[float] = DEFAULT_WINDOWS,
+        max_hosts: int = 50_000,
+        max_events: int = 4096,
+        idle_seconds: float = 300.0,
+        max_total_events: int = DEFAULT_MAX_TOTAL_EVENTS,
+    ):
+        self.windows: Tuple[float, ...] = tuple(sorted({float(w) for w in windows if w > 0}))
+        if not self.windows:
+            raise ValueError("Se necesita al menos una ventana de duración positiva")
+        self.feature_names = host_window_feature_names(self.windows)
+        self.max_hosts = max(1, max_hosts)
+        self.max_events = max(1, max_events)
+        self.idle_seconds = max(max(self.windows), idle_seconds)
+        # Un host con todas sus ventanas llenas siempre cabe en el presupuesto.
+        self.max_total_events = max(max_total_events, self.max_events * len(self.windows))
+        self._hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._events = 0
+        self.clock = 0.0
+        self.flows = 0
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+        self.evicted_memory = 0
+        self.truncated_events = 0
+
+    def observe_batch(
+        self,
+        timestamps: Sequence,
+        src_hosts: Sequence,
+        dst_hosts: Sequence,
+        dst_ports: Sequence,
+    ) -> np.ndarray:
+        """
+        Registra un bloque de flujos en orden y devuelve, por flujo, las features
+        de su host justo después de contarlo (orden `feature_names`).
+        """
+
+        n_rows = len(src_hosts)
+        values: List[float] = []
+        append = values.append
+        windows = self.windows
+        hosts = self._hosts
+        with self._lock:
+            clock = self.clock
+            events = self._events
+            for idx in range(n_rows):
+                ts = _as_float(timestamps[idx])
+                if ts > clock:
+                    clock = ts
+                src = str(src_hosts[idx] or "")
+                dst = str(dst_hosts[idx] or "")
+                port = int(_as_float(dst_ports[idx]))
+                state = hosts.get(src)
+                if state is None:
+                    state = _HostState(len(windows))
+                    hosts[src] = state
+                else:
+                    hosts.move_to_end(src)
+                state.last_seen = clock
+                for seconds, window in zip(windows, state.windows):
+                    before = len(window.events)
+                    window.expire(clock - seconds)
+                    if len(window.events) >= self.max_events:
+                        window.pop_oldest()
+                        self.truncated_events += 1
+                    window.add(ts, dst, port)
+                    live = len(window.events)
+                    events += live - before
+                    append(live / seconds)
+                    append(len(window.ports))
+                    append(len(window.hosts))
+                # El host actual acaba de pasar al final: el frente es siempre otro host.
+                while events > self.max_total_events:
+                    _, evicted = hosts.popitem(last=False)
+                    events -= evicted.event_count()
+                    self.evicted_memory += 1
+            self.clock = clock
+            self._events = events
+            self.flows += n_rows
+            self._evict()
+        return np.array(values, dtype=np.float64).reshape(n_rows, len(self.feature_names))
+
+    def snapshot(self, src_host: str) -> Dict[str, float]:
+        """Features actuales de un host (ceros si no hay actividad reciente)."""
+
+        values = [0.0] * len(self.feature_names)
+        with self._lock:
+            state = self._hosts.get(src_host)
+            if state is not None:
+                col = 0
+                for seconds, window in zip(self.windows, state.windows):
+                    before = len(window.events)
+                    window.expire(self.clock - seconds)
+                    self._events -= before - len(window.events)
+                    values[col : col + 3] = [
+                        len(window.events) / seconds,
+                        float(len(window.ports)),
+                        float(len(window.hosts)),
+                    ]
+                    col += 3
+        return dict(zip(self.feature_names, values))
+
+    def _evict(self) -> None:
+        hosts = self._hosts
+        idle_cutoff = self.clock - self.idle_seconds
+        # El OrderedDict está ordenado por última actividad: basta mirar el frente.
+        while hosts:
+            state = next(iter(hosts.values()))
+            if state.last_seen >= idle_cutoff:
+                break
+            hosts.popitem(last=False)
+            self._events -= state.event_count()
+            self.evicted_idle += 1
+        while len(hosts) > self.max_hosts:
+            _, state = hosts.popitem(last=False)
+            self._events -= state.event_count()
+            self.evicted_capacity += 1
+
+    def stats(self) -> Dict[str, float | int | List[float]]:
+        with self._lock:
+            hosts = len(self._hosts)
+            return {
+                "windows_seconds": list(self.windows),
+                "hosts": hosts,
+                "max_hosts": self.max_hosts,
+                "events": self._events,
+                "max_events_per_window": self.max_events,
+                "max_total_events": self.max_total_events,
+                "approx_bytes": (
+                    hosts * (_HOST_BYTES + _WINDOW_BYTES * len(self.windows)) + self._events * _EVENT_BYTES
+                ),
+                "flows": self.flows,
+                "clock": self.clock,
+                "evicted_idle": self.evicted_idle,
+                "evicted_capacity": self.evicted_capacity,
+                "evicted_memory": self.evicted_memory,
+                "truncated_events": self.truncated_events,
+            }
+
+
+def host_window_options(settings) -> Dict[str, Any] | None:
+    """Argumentos de HostWindowTracker según la configuración (None si está deshabilitado)."""
+
+    if not settings.host_windows_enabled:
+        return None
+    return {
+        "windows": list(settings.host_window_seconds),
+        "max_hosts": settings.host_window_max_hosts,
+        "max_events": settings.host_window_max_events,
+        "idle_seconds": settings.host_window_idle_seconds,
+        "max_total_events": settings.host_window_max_total_events,
+    }
+
+
+def create_host_window_tracker(settings) -> HostWindowTracker | None:
+    options = host_window_options(settings)
+    if options is None:
+        return None
+    return HostWindowTracker(**options)
+
+
+def get_host_window_tracker(app) -> HostWindowTracker | None:
+    return getattr(app.state, "host_window_tracker", None)
+
+
+def start_host_window_tracker(app, settings) -> HostWindowTracker | None:
+    tracker = get_host_window_tracker(app)
+    if tracker is None:
+        tracker = create_host_window_tracker(settings)
+        app.state.host_window_tracker = tracker
+    return tracker
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..adapters.early_exit import EarlyExitEvaluator
+from ..adapters.model_adapter import FEATURE_DTYPES, BatchPrediction, ModelAdapter, ModelPrediction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_POOL_ROWS = 4096
+
+# Modelo compartido con los workers. Con `fork` se hereda por copy-on-write y
+# ningún proceso hijo vuelve a deserializar el artefacto.
+_SHARED_ADAPTER: ModelAdapter | None = None
+
+
+@dataclass(frozen=True)
+class WorkerOptions:
+    """
+    Ajustes que `model_provider._prepare_adapter` aplicó al modelo del padre y
+    que un worker sin fork, que abre el artefacto de cero, debe repetir para
+    puntuar igual: el tipo de features ya validado y la salida temprana.
+    """
+
+    feature_dtype: str = "float64"
+    early_exit: Dict[str, Any] | None = None
+
+    @classmethod
+    def from_adapter(cls, adapter: ModelAdapter) -> WorkerOptions:
+        evaluator = adapter.early_exit
+        early_exit = None
+        if evaluator is not None:
+            early_exit = {
+                "chunk_trees": evaluator.chunk_trees,
+                "budget_ms": evaluator.budget_ms,
+                "audit_every": evaluator.audit_every,
+                "score_column": evaluator.score_column,
+            }
+        return cls(np.dtype(adapter.feature_dtype).name, early_exit)
+
+    def apply(self, adapter: ModelAdapter) -> None:
+        # El padre ya validó este tipo para el mismo artefacto; no se repite la validación.
+        adapter.feature_dtype = FEATURE_DTYPES[self.feature_dtype]
+        if self.early_exit is not None:
+            adapter.enable_early_exit(EarlyExitEvaluator(**self.early_exit))
+
+
+def _init_worker(artifact_path: str, engine: str, mmap: bool, options: WorkerOptions) -> None:
+    global _SHARED_ADAPTER
+    if _SHARED_ADAPTER is not None and str(_SHARED_ADAPTER.artifact_path) == artifact_path:
+        # El hilo sombra no sobrevive al fork; el proceso padre evalúa el resultado fusionado.
+        _SHARED_ADAPTER.shadow = None
+        return
+    # Sin fork (spawn/forkserver) cada worker abre el artefacto una sola vez;
+    # con mmap los arreglos del bosque se comparten igualmente entre procesos.
+    _SHARED_ADAPTER = ModelAdapter(artifact_path, engine=engine, mmap=mmap)
+    options.apply(_SHARED_ADAPTER)
+
+
+def _score_shard(matrix: np.ndarray) -> BatchPrediction:
+    assert _SHARED_ADAPTER is not None
+    return _SHARED_ADAPTER.predict_batch(matrix)
+
+
+def _score_shard_proba(matrix: np.ndarray) -> np.ndarray:
+    assert _SHARED_ADAPTER is not None
+    return _SHARED_ADAPTER.predict_proba(matrix)
+
+
+def pool_context() -> multiprocessing.context.BaseContext:
+    """
+    `fork` solo si el proceso no tiene más hilos: al hacer fork con el watcher del
+    registro, el modelo sombra, la precarga o el threadpool de FastAPI vivos, el
+    hijo puede heredar locks tomados y bloquearse. En ese caso se usa `forkserver`.
+    """
+
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def worker_initargs(
+    adapter: ModelAdapter,
+    context: multiprocessing.context.BaseContext,
+) -> Tuple[str, str, bool, WorkerOptions]:
+    """Argumentos de `_init_worker` para que cada worker puntúe con el mismo modelo que el padre."""
+
+    if context.get_start_method() != "fork" and not adapter.mmap:
+        logger.info(
+            "Workers sin fork: cada uno carga su propia copia de %s (MODEL_MMAP=true la compartiría)",
+            adapter.artifact_path.name,
+        )
+    return str(adapter.artifact_path), adapter.engine, adapter.mmap, WorkerOptions.from_adapter(adapter)
+
+
+def resolve_worker_count(workers: int) -> int:
+    """0 o negativo equivale a un worker por CPU disponible."""
+
+    if workers > 0:
+        return workers
+    return max(1, os.cpu_count() or 1)
+
+
+class InferencePool:
+    """
+    Puntúa matrices de features grandes repartiéndolas entre procesos.
+
+    Expone la misma interfaz que ModelAdapter (`vectorize_batch`, `predict_batch`,
+    `predict`) para poder pasarse a ZeekAdapter/FeatureCSVAdapter. Los bloques
+    con menos de `min_rows` filas se puntúan en el proceso actual, donde el coste
+    de serializar hacia los workers no compensa.
+    """
+
+    def __init__(
+        self,
+        adapter: ModelAdapter,
+        workers: int = 0,
+        min_rows: int = DEFAULT_MIN_POOL_ROWS,
+    ):
+        self.adapter = adapter
+        self.workers = resolve_worker_count(workers)
+        self.min_rows = max(1, min_rows)
+        self._executor: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> "InferencePool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.adapter.feature_names
+
+    @property
+    def feature_dtype(self):
+        return self.adapter.feature_dtype
+
+    def to_matrix(self, matrix: np.ndarray | pd.DataFrame) -> np.ndarray:
+        return self.adapter.to_matrix(matrix)
+
+    def vectorize_batch(self, rows: Sequence[Mapping[str, float]]) -> pd.DataFrame:
+        return self.adapter.vectorize_batch(rows)
+
+    def predict(self, features: Mapping[str, float]) -> ModelPrediction:
+        return self.adapter.predict(features)
+
+    def predict_batch(self, matrix: np.ndarray | pd.DataFrame) -> BatchPrediction:
+        array = self.adapter.to_matrix(matrix)
+        shards = self._shards(array)
+        if shards is None:
+            return self.adapter.predict_batch(array)
+        # map() conserva el orden de entrada, así que basta con concatenar.
+        result = BatchPrediction.concat(list(self._get_executor().map(_score_shard, shards)))
+        if self.adapter.shadow is not None:
+            self.adapter.shadow.submit(array, self.adapter.feature_names, result, self.adapter.version)
+        return result
+
+    def predict_proba(self, matrix: np.ndarray | pd.DataFrame) -> np.ndarray:
+        """Probabilidades en bruto repartidas entre workers, sin caché ni modelo sombra."""
+
+        array = self.adapter.to_matrix(matrix)
+        shards = self._shards(array)
+        if shards is None:
+            return self.adapter.predict_proba(array)
+        return np.concatenate(list(self._get_executor().map(_score_shard_proba, shards)))
+
+    def _shards(self, array: np.ndarray) -> List[np.ndarray] | None:
+        if self.workers <= 1 or array.shape[0] < self.min_rows:
+            return None
+        return np.array_split(array, min(self.workers, max(1, array.shape[0] // self.min_rows)))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            global _SHARED_ADAPTER
+            _SHARED_ADAPTER = self.adapter
+            context = pool_context()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=worker_initargs(self.adapter, context),
+            )
+            logger.info(
+                "Pool de inferencia iniciado con %s workers (%s)",
+                self.workers,
+                context.get_start_method(),
+            )
+        return self._executor
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ..adapters.model_adapter import BatchPrediction, ModelAdapter, ModelPrediction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_TIMEOUT_SECONDS = 30.0
+
+
+@dataclass
+class _PendingRequest:
+    matrix: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def rows(self) -> int:
+        return int(self.matrix.shape[0])
+
+
+class InferenceService:
+    """
+    Servicio de inferencia compartido: encola peticiones en un asyncio.Queue y las
+    agrupa en micro-batches que se puntúan con una sola llamada a predict_batch.
+    Un batch se despacha al alcanzar `max_batch_size` filas o tras `max_wait_ms`.
+    """
+
+    def __init__(
+        self,
+        adapter_provider: Callable[[], ModelAdapter],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        result_timeout: float = DEFAULT_RESULT_TIMEOUT_SECONDS,
+    ):
+        self._adapter_provider = adapter_provider
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        # Espera máxima de los clientes síncronos por su resultado.
+        self.result_timeout = max(0.001, result_timeout)
+        self._queue: asyncio.Queue[_PendingRequest] | None = None
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._flushed_requests = 0
+        self._rows = 0
+        self._batches = 0
+        self._max_batch_rows = 0
+        self._last_batch_rows = 0
+        self._max_queue_depth = 0
+        self._wait_ms_total = 0.0
+        self._errors = 0
+
+    @property
+    def adapter(self) -> ModelAdapter:
+        return self._adapter_provider()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop | None:
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        return bool(self._task and not self._task.done())
+
+    async def start(self) -> bool:
+        if self.running:
+            return False
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._worker())
+        return True
+
+    async def stop(self) -> bool:
+        task = self._task
+        if not task:
+            return False
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending = self._queue.get_nowait()
+                if not pending.future.done():
+                    pending.future.set_exception(RuntimeError("Servicio de inferencia detenido"))
+        return True
+
+    async def predict_batch(self, matrix: np.ndarray | pd.DataFrame) -> BatchPrediction:
+        if not self.running or self._queue is None:
+            raise RuntimeError("El servicio de inferencia no está iniciado")
+        array = self.adapter.to_matrix(matrix)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingRequest(matrix=array, future=future))
+        with self._stats_lock:
+            self._requests += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return await future
+
+    async def predict(self, features: Mapping[str, float]) -> ModelPrediction:
+        batch = await self.predict_batch(self.adapter.vectorize_batch([features]))
+        return batch.prediction(0)
+
+    def client(self) -> "BatchingModelClient":
+        return BatchingModelClient(self)
+
+    def stats(self) -> Dict[str, float | int | bool]:
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                "running": self.running,
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "max_queue_depth": self._max_queue_depth,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "requests": self._requests,
+                "rows": self._rows,
+                "batches": batches,
+                "errors": self._errors,
+                "avg_batch_rows": (self._rows / batches) if batches else 0.0,
+                "max_batch_rows": self._max_batch_rows,
+                "last_batch_rows": self._last_batch_rows,
+                "avg_queue_wait_ms": (
+                    (self._wait_ms_total / self._flushed_requests) if self._flushed_requests else 0.0
+                ),
+            }
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            pending: List[_PendingRequest] = [first]
+            rows = first.rows
+            deadline = loop.time() + self.max_wait_ms / 1000.0
+            while rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                rows += item.rows
+            await self._flush(pending, rows)
+
+    async def _flush(self, pending: List[_PendingRequest], rows: int) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            # Falla si una recarga cambió el ancho de features entre peticiones ya encoladas.
+            matrix = np.vstack([item.matrix for item in pending])
+            batch = await loop.run_in_executor(None, self.adapter.predict_batch, matrix)
+        except Exception as exc:
+            # Se resuelven todas las peticiones del batch y el worker sigue atendiendo la cola.
+            logger.exception("Fallo al puntuar un micro-batch de %s filas", rows)
+            with self._stats_lock:
+                self._errors += 1
+            for item in pending:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        with self._stats_lock:
+            self._rows += rows
+            self._batches += 1
+            self._flushed_requests += len(pending)
+            self._last_batch_rows = rows
+            self._max_batch_rows = max(self._max_batch_rows, rows)
+            self._wait_ms_total += sum((started - item.enqueued_at) * 1000.0 for item in pending)
+
+        offset = 0
+        for item in pending:
+            if not item.future.done():
+                item.future.set_result(batch.slice(offset, offset + item.rows))
+            offset += item.rows
+
+
+class BatchingModelClient:
+    """
+    Fachada síncrona con la interfaz de ModelAdapter que enruta predict_batch por el
+    InferenceService. Pensada para handlers síncronos que corren en el threadpool;
+    si se invoca desde el propio event loop (o el servicio no está activo) puntúa
+    directamente para no bloquear el loop esperando su propio resultado.
+    """
+
+    def __init__(self, service: InferenceService):
+        self.service = service
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.service.adapter.feature_names
+
+    @property
+    def feature_dtype(self):
+        return self.service.adapter.feature_dtype
+
+    def to_matrix(self, matrix: np.ndarray | pd.DataFrame) -> np.ndarray:
+        return self.service.adapter.to_matrix(matrix)
+
+    def vectorize_batch(self, rows: Sequence[Mapping[str, float]]) -> pd.DataFrame:
+        return self.service.adapter.vectorize_batch(rows)
+
+    def predict_batch(self, matrix: np.ndarray | pd.DataFrame) -> BatchPrediction:
+        loop = self.service.loop
+        if not self.service.running or loop is None or self._on_loop(loop):
+            return self.service.adapter.predict_batch(matrix)
+        future = asyncio.run_coroutine_threadsafe(self.service.predict_batch(matrix), loop)
+        try:
+            return future.result(timeout=self.service.result_timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(
+                f"El servicio de inferencia no respondió en {self.service.result_timeout:.1f}s"
+            ) from None
+
+    def predict(self, features: Mapping[str, float]) -> ModelPrediction:
+        return self.predict_batch(self.vectorize_batch([features])).prediction(0)
+
+    @staticmethod
+    def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+
+def get_inference_service(app) -> InferenceService | None:
+    return getattr(app.state, "inference_service", None)
+
+
+async def start_inference_service(
+    app,
+    adapter_provider: Callable[[], ModelAdapter],
+    max_batch_size: int,
+    max_wait_ms: float,
+    result_timeout: float = DEFAULT_RESULT_TIMEOUT_SECONDS,
+) -> InferenceService:
+    service = get_inference_service(app)
+    if service is None:
+        service = InferenceService(
+            adapter_provider,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            result_timeout=result_timeout,
+        )
+        app.state.inference_service = service
+    await service.start()
+    return service
+
+
+async def stop_inference_service(app) -> bool:
+    service = get_inference_service(app)
+    if service is None:
+        return False
+    return await service.stop()
@@ -1,12 +1,175 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from functools import lru_cache
+from pathlib import Path
+from typing import Any
 
-from ..adapters.model_adapter import ModelAdapter
+import numpy as np
+import pandas as pd
+
+from ..adapters.early_exit import EarlyExitEvaluator
+from ..adapters.model_adapter import (
+    BENIGN_CLASS_INDEX,
+    FEATURE_DTYPES,
+    TOP_FEATURES,
+    ModelAdapter,
+    align_columns,
+)
+from ..adapters.prediction_cache import PredictionCache
+from ..config import get_settings
+from .feature_bridge import build_conn_feature_matrix
+from .model_registry import ModelRegistry
+from .shadow_model import ShadowEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+def get_model_adapter(path: str, engine: str | None = None) -> ModelAdapter:
+    """Devuelve el modelo activo del registro, cargándolo la primera vez."""
+
+    settings = get_settings()
+    return get_model_registry().get(path, engine or settings.model_engine, settings.model_mmap)
+
+
+@lru_cache
+def get_prediction_cache() -> PredictionCache | None:
+    """Cache de predicciones compartida por todos los modelos del proceso."""
+
+    settings = get_settings()
+    if settings.prediction_cache_size <= 0:
+        return None
+    return PredictionCache(
+        maxsize=settings.prediction_cache_size,
+        quantize_digits=settings.prediction_cache_quantize_digits or None,
+    )
+
+
+def _load_model_adapter(path: str, engine: str, mmap: bool) -> ModelAdapter:
+    return ModelAdapter(path, engine=engine, mmap=mmap)
 
 
 @lru_cache
-def get_model_adapter(path: str) -> ModelAdapter:
-    """Carga y reutiliza el artefacto ML, evitando relecturas costosas."""
+def get_shadow_evaluator() -> ShadowEvaluator | None:
+    """Evaluador del artefacto candidato (SHADOW_MODEL_PATH), fuera del camino crítico."""
+
+    settings = get_settings()
+    if not settings.shadow_model_path:
+        return None
+    return ShadowEvaluator(
+        lambda: ModelAdapter(settings.shadow_model_path, engine=settings.model_engine),
+        max_pending=settings.shadow_max_pending_batches,
+    )
+
+
+@lru_cache
+def get_early_exit_evaluator() -> EarlyExitEvaluator | None:
+    """Modo rápido opcional (MODEL_EARLY_EXIT); sus contadores sobreviven a las recargas."""
+
+    settings = get_settings()
+    if not settings.model_early_exit:
+        return None
+    return EarlyExitEvaluator(
+        chunk_trees=settings.model_early_exit_chunk_trees,
+        budget_ms=settings.model_early_exit_budget_ms,
+        audit_every=settings.model_early_exit_audit_every,
+        score_column=BENIGN_CLASS_INDEX,
+    )
+
+
+def _reference_feature_matrix(feature_names) -> np.ndarray:
+    settings = get_settings()
+    path = Path(settings.zeek_reference_dataset)
+    if not path.is_absolute() and not path.exists():
+        path = Path(__file__).resolve().parents[2] / path
+    frame = pd.read_csv(path, dtype=object, keep_default_na=False)
+    return align_columns(build_conn_feature_matrix(frame), TOP_FEATURES, feature_names)
+
+
+def _apply_feature_dtype(adapter: ModelAdapter) -> None:
+    """
+    Activa MODEL_FEATURE_DTYPE solo si, sobre el dataset de referencia, predice
+    lo mismo que float64; si no, el modelo sigue en float64 y se avisa en el log.
+    """
+
+    settings = get_settings()
+    name = settings.model_feature_dtype.lower()
+    if name == "float64":
+        return
+    dtype = FEATURE_DTYPES.get(name)
+    if dtype is None:
+        logger.warning("MODEL_FEATURE_DTYPE desconocido (%s); se usa float64", name)
+        return
+    try:
+        matrix = _reference_feature_matrix(adapter.feature_names)
+    except (OSError, ValueError) as exc:
+        logger.warning("No se pudo validar %s sin el dataset de referencia: %s", name, exc)
+        return
+    report = adapter.validate_feature_dtype(matrix, dtype, settings.model_feature_dtype_tolerance)
+    if not report["ok"]:
+        logger.warning("Features en %s descartadas para %s: %s", name, adapter.version, report)
+        return
+    adapter.feature_dtype = dtype
+    logger.info("Features en %s validadas para %s: %s", name, adapter.version, report)
+
+
+def get_feature_dtype(path: str):
+    """Tipo de features del modelo activo en `path`, sin forzar su carga."""
+
+    entry = get_model_registry().peek(path)
+    return entry.adapter.feature_dtype if entry is not None else np.float64
+
+
+def _prepare_adapter(adapter: ModelAdapter) -> None:
+    # Se conecta después del calentamiento; las entradas llevan la versión en la clave.
+    _apply_feature_dtype(adapter)
+    adapter.cache = get_prediction_cache()
+    adapter.shadow = get_shadow_evaluator()
+    early_exit = get_early_exit_evaluator()
+    if early_exit is not None:
+        adapter.enable_early_exit(early_exit)
+
+
+@lru_cache
+def get_model_registry() -> ModelRegistry:
+    return ModelRegistry(_load_model_adapter, prepare=_prepare_adapter)
+
+
+def start_model_preload(app, path: str) -> asyncio.Future:
+    """
+    Carga y calienta el modelo en el executor por defecto sin bloquear el arranque.
+    Las peticiones que lleguen antes esperan en el lock de carga del registro en
+    lugar de disparar una segunda deserialización.
+    """
+
+    existing = getattr(app.state, "model_preload", None)
+    if existing is not None:
+        return existing
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, get_model_adapter, path)
+    future.add_done_callback(_log_preload_result)
+    app.state.model_preload = future
+    return future
+
+
+def _log_preload_result(future: asyncio.Future) -> None:
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("No se pudo precargar el modelo: %s", exc)
+    else:
+        logger.info("Modelo precargado y caliente (%s)", future.result().version)
+
 
-    return ModelAdapter(path)
+def get_model_readiness(app) -> dict[str, Any]:
+    future = getattr(app.state, "model_preload", None)
+    if future is None:
+        return {"status": "cold", "model_version": None, "detail": None}
+    if not future.done():
+        return {"status": "loading", "model_version": None, "detail": None}
+    exc = future.exception()
+    if exc is not None:
+        return {"status": "error", "model_version": None, "detail": str(exc)}
+    return {"status": "ready", "model_version": future.result().version, "detail": None}
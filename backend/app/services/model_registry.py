@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Tuple
+
+import numpy as np
+
+from ..adapters.model_adapter import ModelAdapter
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ROWS = 8
+
+Fingerprint = Tuple[int, int]
+
+
+def _fingerprint(path: Path) -> Fingerprint | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+@dataclass
+class RegistryEntry:
+    adapter: ModelAdapter
+    fingerprint: Fingerprint | None
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    # Huella vista en el último sondeo; se recarga cuando se repite (archivo estable).
+    pending: Fingerprint | None = None
+    failed: Fingerprint | None = None
+
+
+class ModelRegistry:
+    """
+    Registro de modelos activos con recarga en caliente.
+
+    Un hilo vigila la huella (tamaño + mtime) de cada artefacto cargado. Cuando
+    cambia y se mantiene estable un intervalo, el nuevo modelo se carga y calienta
+    en ese hilo y luego se sustituye con una única asignación bajo lock: las
+    predicciones en curso conservan su referencia al modelo anterior.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, str, bool], ModelAdapter],
+        prepare: Callable[[ModelAdapter], None] | None = None,
+    ):
+        self._loader = loader
+        self._prepare = prepare
+        self._entries: Dict[Hashable, RegistryEntry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+        self._watcher: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    def get(self, path: str, engine: str, mmap: bool) -> ModelAdapter:
+        key = (path, engine, mmap)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry.adapter
+        with self._load_lock(key):
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._build_entry(key)
+                with self._lock:
+                    self._entries[key] = entry
+        return entry.adapter
+
+    def peek(self, path: str) -> RegistryEntry | None:
+        """Entrada activa para `path` sin provocar una carga."""
+
+        with self._lock:
+            for (entry_path, _, _), entry in self._entries.items():
+                if entry_path == path:
+                    return entry
+        return None
+
+    def reload(self, key: Hashable) -> ModelAdapter:
+        with self._load_lock(key):
+            entry = self._build_entry(key)
+            with self._lock:
+                previous = self._entries.get(key)
+                self._entries[key] = entry
+            if entry.adapter.cache is not None:
+                # Solo se guardan entradas de la versión activa; las de la anterior sobran.
+                entry.adapter.cache.clear(entry.adapter.version)
+        logger.info(
+            "Modelo recargado: %s -> %s",
+            previous.adapter.version if previous else None,
+            entry.adapter.version,
+        )
+        return entry.adapter
+
+    def check_for_updates(self) -> int:
+        """Recarga los artefactos cuya huella cambió y ya es estable. Devuelve cuántos."""
+
+        reloaded = 0
+        with self._lock:
+            snapshot = list(self._entries.items())
+        for key, entry in snapshot:
+            current = _fingerprint(entry.adapter.artifact_path)
+            if current is None or current == entry.fingerprint or current == entry.failed:
+                entry.pending = None
+                continue
+            if entry.pending != current:
+                entry.pending = current
+                continue
+            try:
+                self.reload(key)
+            except Exception:  # pragma: no cover - defensivo
+                logger.exception("No se pudo recargar el modelo %s; se mantiene el activo", key[0])
+                entry.failed = current
+                continue
+            reloaded += 1
+        return reloaded
+
+    def start_watcher(self, interval_seconds: float) -> bool:
+        if interval_seconds <= 0 or (self._watcher and self._watcher.is_alive()):
+            return False
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            args=(interval_seconds,),
+            name="model-registry-watcher",
+            daemon=True,
+        )
+        self._watcher.start()
+        return True
+
+    def stop_watcher(self) -> bool:
+        watcher = self._watcher
+        if not watcher:
+            return False
+        self._stop_event.set()
+        watcher.join(timeout=5)
+        self._watcher = None
+        return True
+
+    def _watch(self, interval_seconds: float) -> None:
+        while not self._stop_event.wait(interval_seconds):
+            try:
+                self.check_for_updates()
+            except Exception:  # pragma: no cover - defensivo
+                logger.exception("Error vigilando artefactos del modelo")
+
+    def _load_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _build_entry(self, key: Hashable) -> RegistryEntry:
+        path, engine, mmap = key
+        adapter = self._loader(path, engine, mmap)
+        fingerprint = (
+            adapter.artifact_fingerprint["source_size"],
+            adapter.artifact_fingerprint["source_mtime_ns"],
+        )
+        # Primera llamada fuera del camino crítico: asigna buffers y calienta el motor.
+        adapter.predict_proba(np.zeros((WARMUP_ROWS, len(adapter.feature_names)), dtype=float))
+        if self._prepare is not None:
+            self._prepare(adapter)
+        return RegistryEntry(adapter=adapter, fingerprint=fingerprint)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from ..adapters.model_adapter import CLASS_ID_TO_NAME, BatchPrediction, ModelAdapter, align_columns
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowEvaluator:
+    """
+    Evalúa un artefacto candidato sobre los mismos batches que el modelo primario.
+
+    `submit` solo encola (sin bloquear) la matriz y la predicción primaria; un hilo
+    aparte puntúa con el modelo sombra y acumula contadores agregados (matriz de
+    confusión primario×sombra y diferencia de score). Si la cola está llena el
+    batch se descarta y se cuenta, de modo que la ingesta nunca espera a la sombra.
+
+    Cada batch viaja con los nombres de columna del primario y se reordena a las
+    features que declara el candidato, que puede usar otra lista u otro orden; las
+    que el primario no calcula se rellenan con 0 y se listan en `missing_features`.
+    """
+
+    def __init__(self, loader: Callable[[], ModelAdapter], max_pending: int = 64):
+        self._loader = loader
+        self._queue: "queue.Queue[tuple[np.ndarray, List[str], np.ndarray, np.ndarray, str]]" = queue.Queue(
+            maxsize=max(1, max_pending)
+        )
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._adapter: ModelAdapter | None = None
+        self._n_classes = len(CLASS_ID_TO_NAME)
+        self._confusion = np.zeros((self._n_classes, self._n_classes), dtype=np.int64)
+        self._score_diff_total = 0.0
+        self._rows = 0
+        self._batches = 0
+        self._dropped_batches = 0
+        self._dropped_rows = 0
+        self._errors = 0
+        self._primary_version: str | None = None
+        self._load_error: str | None = None
+        self._missing_features: List[str] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> bool:
+        if self.running:
+            return False
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-model", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> bool:
+        thread = self._thread
+        if not thread:
+            return False
+        self._stop_event.set()
+        thread.join(timeout=5)
+        self._thread = None
+        return True
+
+    def submit(
+        self,
+        matrix: np.ndarray,
+        feature_names: Sequence[str],
+        primary: BatchPrediction,
+        primary_version: str,
+    ) -> bool:
+        if len(primary) == 0:
+            return True
+        try:
+            # Copia: quien llama puede reutilizar su buffer en cuanto volvemos.
+            self._queue.put_nowait(
+                (
+                    np.array(matrix, copy=True),
+                    list(feature_names),
+                    primary.class_indices,
+                    primary.scores,
+                    primary_version,
+                )
+            )
+        except queue.Full:
+            with self._lock:
+                self._dropped_batches += 1
+                self._dropped_rows += len(primary)
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            confusion = self._confusion.copy()
+            rows = self._rows
+            per_class: List[Dict[str, Any]] = []
+            for idx in range(self._n_classes):
+                primary_count = int(confusion[idx].sum())
+                per_class.append(
+                    {
+                        "class_name": CLASS_ID_TO_NAME.get(idx, str(idx)),
+                        "primary_count": primary_count,
+                        "shadow_count": int(confusion[:, idx].sum()),
+                        "agreement_rate": (confusion[idx, idx] / primary_count) if primary_count else 0.0,
+                    }
+                )
+            return {
+                "enabled": True,
+                "running": self.running,
+                "primary_version": self._primary_version,
+                "shadow_version": self._adapter.version if self._adapter else None,
+                "load_error": self._load_error,
+                "missing_features": list(self._missing_features),
+                "rows_compared": rows,
+                "batches_compared": self._batches,
+                "agreement_rate": (float(np.trace(confusion)) / rows) if rows else 0.0,
+                "disagreements": int(rows - np.trace(confusion)),
+                "mean_abs_score_diff": (self._score_diff_total / rows) if rows else 0.0,
+                "queued_batches": self._queue.qsize(),
+                "dropped_batches": self._dropped_batches,
+                "dropped_rows": self._dropped_rows,
+                "errors": self._errors,
+                "per_class": per_class,
+                "confusion_matrix": confusion.tolist(),
+            }
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                matrix, feature_names, primary_idx, primary_scores, primary_version = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._evaluate(matrix, feature_names, primary_idx, primary_scores, primary_version)
+            except Exception as exc:  # pragma: no cover - defensivo
+                logger.warning("Fallo evaluando el modelo sombra: %s", exc)
+                with self._lock:
+                    self._errors += 1
+
+    def _evaluate(
+        self,
+        matrix: np.ndarray,
+        feature_names: List[str],
+        primary_idx: np.ndarray,
+        primary_scores: np.ndarray,
+        primary_version: str,
+    ) -> None:
+        if self._adapter is None:
+            try:
+                self._adapter = self._loader()
+            except Exception as exc:
+                self._load_error = str(exc)
+                raise
+            self._load_error = None
+        shadow_names = self._adapter.feature_names
+        missing = [name for name in shadow_names if name not in feature_names]
+        if missing != self._missing_features:
+            logger.warning("El modelo sombra espera features que el primario no calcula (se usan 0): %s", missing)
+            self._missing_features = missing
+        shadow = self._adapter.predict_batch(align_columns(matrix, feature_names, shadow_names))
+        valid = (primary_idx < self._n_classes) & (shadow.class_indices < self._n_classes)
+        with self._lock:
+            np.add.at(self._confusion, (primary_idx[valid], shadow.class_indices[valid]), 1)
+            self._rows += int(valid.sum())
+            self._batches += 1
+            self._score_diff_total += float(np.abs(primary_scores[valid] - shadow.scores[valid]).sum())
+            self._primary_version = primary_version
@@ -0,0 +1,449 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import glob
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from ..adapters.model_adapter import DEFAULT_BATCH_SIZE, ModelAdapter, iter_chunks
+from ..adapters.zeek_adapter import ZeekAdapter
+from ..adapters.zeek_log_reader import is_dataset_file
+from ..repositories.alerts_repo import AlertRepository
+from ..repositories.checkpoint_repo import CheckpointRepository
+from ..schemas import AlertCreate
+from .host_windows import HostWindowTracker
+from .inference_pool import WorkerOptions, pool_context, resolve_worker_count, worker_initargs
+from .zeek_seed import SEED_SOURCE, FileFingerprint, file_fingerprint, resume_row, seed_source
+from .zeek_tail import resolve_log_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITE_ROWS = 5000
+QUEUE_CHUNKS_PER_WORKER = 4
+POLL_SECONDS = 0.5
+
+MSG_START = "start"
+MSG_ROWS = "rows"
+MSG_DONE = "done"
+MSG_CANCELLED = "cancelled"
+MSG_ERROR = "error"
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+# Estado de cada proceso worker: modelo, cola hacia el escritor y señal de parada.
+_SHARED_ADAPTER: ModelAdapter | None = None
+_RESULTS = None
+_STOP = None
+
+
+def is_multi_file_path(raw_path: str) -> bool:
+    """`ZEEK_CONN_PATH` apunta a una carpeta o a un patrón con comodines."""
+
+    if any(ch in raw_path for ch in "*?["):
+        return True
+    return resolve_log_path(raw_path).is_dir()
+
+
+def expand_dataset_paths(raw_path: str) -> List[Path]:
+    """
+    Todos los CSV/logs de Zeek de una carpeta o patrón (relativos al backend o
+    al proyecto), del más antiguo al más reciente para ingerir en orden temporal.
+    """
+
+    if any(ch in raw_path for ch in "*?["):
+        pattern = Path(raw_path)
+        if pattern.is_absolute():
+            candidates = [Path(match) for match in glob.glob(raw_path)]
+        else:
+            backend_root = Path(__file__).resolve().parents[2]
+            candidates = []
+            for root in (backend_root, backend_root.parent):
+                candidates = [Path(match) for match in glob.glob(str(root / raw_path))]
+                if candidates:
+                    break
+    else:
+        path = resolve_log_path(raw_path)
+        candidates = list(path.iterdir()) if path.is_dir() else [path]
+    files = {path.resolve() for path in candidates if is_dataset_file(path)}
+    return sorted(files, key=lambda item: (item.stat().st_mtime_ns, item.name))
+
+
+@dataclass(frozen=True)
+class FileTask:
+    index: int
+    path: Path
+    start_row: int
+    limit: int | None
+    batch_size: int
+    host_windows: Dict[str, Any] | None
+
+
+@dataclass
+class FileProgress:
+    path: Path
+    source: str
+    fingerprint: FileFingerprint
+    start_row: int = 0
+    status: str = STATUS_QUEUED
+    scored: int = 0
+    buffered: int = 0
+    written: int = 0
+    complete: bool = False
+    error: str | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        return {
+            "path": str(self.path),
+            "status": self.status,
+            "start_row": self.start_row,
+            "rows_scored": self.scored,
+            "rows_written": self.written,
+            "complete": self.complete,
+            "error": self.error,
+            "elapsed_seconds": round(elapsed, 3),
+        }
+
+
+def _produce(adapter: ModelAdapter, task: FileTask, emit: Callable[[Tuple], None], stop) -> None:
+    """Lee, calcula features y puntúa un archivo; entrega los lotes al escritor vía `emit`."""
+
+    emit((MSG_START, task.index))
+    sent = 0
+    try:
+        tracker = HostWindowTracker(**task.host_windows) if task.host_windows else None
+        zeek = ZeekAdapter(task.path, adapter, batch_size=task.batch_size, host_windows=tracker)
+        alerts = zeek.iterate_alerts(limit=task.limit, start_row=task.start_row)
+        for chunk in iter_chunks(alerts, task.batch_size):
+            if stop.is_set():
+                # Parado a medias: lo ya enviado se confirma, pero el archivo no está terminado.
+                emit((MSG_CANCELLED, task.index))
+                return
+            for payload in chunk:
+                payload.meta["source"] = SEED_SOURCE
+            sent += len(chunk)
+            emit((MSG_ROWS, task.index, chunk))
+    except Exception as exc:  # noqa: BLE001 - un archivo defectuoso no detiene al resto
+        logger.exception("Error ingiriendo %s", task.path)
+        emit((MSG_ERROR, task.index, f"{type(exc).__name__}: {exc}"))
+        return
+    # Igual que el seed: sin límite, o con menos filas que el límite, el archivo quedó leído entero.
+    emit((MSG_DONE, task.index, not task.limit or sent < task.limit))
+
+
+def _init_worker(artifact_path: str, engine: str, mmap: bool, options: WorkerOptions, results, stop) -> None:
+    global _SHARED_ADAPTER, _RESULTS, _STOP
+    if _SHARED_ADAPTER is not None and str(_SHARED_ADAPTER.artifact_path) == artifact_path:
+        # Heredado por fork; el hilo sombra no sobrevive al fork.
+        _SHARED_ADAPTER.shadow = None
+    else:
+        _SHARED_ADAPTER = ModelAdapter(artifact_path, engine=engine, mmap=mmap)
+        options.apply(_SHARED_ADAPTER)
+    _RESULTS = results
+    _STOP = stop
+
+
+def _ingest_file(task: FileTask) -> None:
+    assert _SHARED_ADAPTER is not None and _RESULTS is not None
+    _produce(_SHARED_ADAPTER, task, _RESULTS.put, _STOP)
+
+
+class ZeekIngestJob:
+    """
+    Ingesta de muchos CSV/logs de Zeek repartida entre procesos.
+
+    Cada worker lee, calcula features y puntúa un archivo completo (con su
+    propio HostWindowTracker, ya que el estado no se comparte entre procesos) y
+    envía lotes de alertas por una cola acotada. Un único escritor, el hilo que
+    llama a `run()`, los acumula y confirma cada `write_rows` filas: alertas y
+    checkpoints de todos los archivos del lote en la misma transacción. Los
+    checkpoints son los del seed de ZEEK_CSV, así que un reinicio omite los
+    archivos ya leídos y continúa los que quedaron a medias. `limit` se aplica
+    por archivo.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str | Path],
+        adapter: ModelAdapter,
+        session_factory: Callable,
+        workers: int = 0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        write_rows: int = DEFAULT_WRITE_ROWS,
+        limit: int | None = None,
+        host_windows: Dict[str, Any] | None = None,
+    ):
+        self.paths = [Path(path) for path in paths]
+        self.adapter = adapter
+        self.session_factory = session_factory
+        self.workers = resolve_worker_count(workers)
+        self.batch_size = max(1, batch_size)
+        self.write_rows = max(1, write_rows)
+        self.limit = limit
+        self.host_windows = host_windows
+        self.files: List[FileProgress] = []
+        self.flushes = 0
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._buffer: List[AlertCreate] = []
+        self._dirty: set[int] = set()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None and self.finished_at is None
+
+    def stop(self) -> None:
+        """Los workers terminan el lote en curso; lo ya puntuado se confirma igualmente."""
+
+        self._cancel.set()
+
+    def run(self) -> int:
+        self.started_at = time.perf_counter()
+        try:
+            tasks = self._plan()
+            workers = min(self.workers, len(tasks))
+            if workers > 1:
+                self._run_pool(tasks, workers)
+            else:
+                for task in tasks:
+                    if self._cancel.is_set():
+                        self._finish(task.index, STATUS_CANCELLED)
+                        continue
+                    _produce(self.adapter, task, self._handle, self._cancel)
+            self._flush()
+        finally:
+            self.finished_at = time.perf_counter()
+        stats = self.stats()
+        logger.info(
+            "Ingesta Zeek: %s alertas de %s archivos (%s omitidos, %s con error) en %.1fs",
+            stats["rows_written"],
+            stats["files_total"],
+            stats["files_skipped"],
+            stats["files_failed"],
+            stats["elapsed_seconds"],
+        )
+        return stats["rows_written"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files = [progress.to_dict() for progress in self.files]
+            statuses = [progress.status for progress in self.files]
+            written = sum(progress.written for progress in self.files)
+            scored = sum(progress.scored for progress in self.files)
+            flushes = self.flushes
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "files_total": len(files),
+            "files_done": statuses.count(STATUS_DONE),
+            "files_running": statuses.count(STATUS_RUNNING),
+            "files_skipped": statuses.count(STATUS_SKIPPED),
+            "files_failed": statuses.count(STATUS_FAILED),
+            "files_cancelled": statuses.count(STATUS_CANCELLED),
+            "rows_scored": scored,
+            "rows_written": written,
+            "flushes": flushes,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(written / elapsed, 1) if elapsed > 0 else 0.0,
+            "files": files,
+        }
+
+    def _plan(self) -> List[FileTask]:
+        tasks: List[FileTask] = []
+        for path in self.paths:
+            fingerprint = file_fingerprint(path)
+            progress = FileProgress(path=path, source=seed_source(path), fingerprint=fingerprint)
+            start_row = resume_row(self.session_factory, progress.source, path, fingerprint)
+            with self._lock:
+                self.files.append(progress)
+                if start_row is None:
+                    progress.status = STATUS_SKIPPED
+                    progress.complete = True
+                    continue
+                progress.start_row = start_row
+            tasks.append(
+                FileTask(
+                    index=len(self.files) - 1,
+                    path=path,
+                    start_row=start_row,
+                    limit=self.limit,
+                    batch_size=self.batch_size,
+                    host_windows=self.host_windows,
+                )
+            )
+        return tasks
+
+    def _run_pool(self, tasks: List[FileTask], workers: int) -> None:
+        global _SHARED_ADAPTER
+        _SHARED_ADAPTER = self.adapter
+        # run() corre en un hilo del servidor: con otros hilos vivos no se hace fork.
+        context = pool_context()
+        results = context.Queue(maxsize=workers * QUEUE_CHUNKS_PER_WORKER)
+        stop = context.Event()
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(*worker_initargs(self.adapter, context), results, stop),
+        )
+        logger.info("Ingesta Zeek: %s archivos con %s workers", len(tasks), workers)
+        futures: Dict[int, Future] = {task.index: executor.submit(_ingest_file, task) for task in tasks}
+        pending = set(futures)
+        try:
+            while pending:
+                if self._cancel.is_set() and not stop.is_set():
+                    stop.set()
+                try:
+                    message = results.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    # Sin mensajes: se confirma lo acumulado y se revisan los workers caídos.
+                    self._flush()
+                    for index in list(pending):
+                        future = futures[index]
+                        if future.cancelled():
+                            self._finish(index, STATUS_CANCELLED)
+                        elif future.done() and future.exception() is not None:
+                            self._finish(index, STATUS_FAILED, error=repr(future.exception()))
+                        else:
+                            continue
+                        pending.discard(index)
+                    if stop.is_set():
+                        for index in list(pending):
+                            if futures[index].cancel():
+                                self._finish(index, STATUS_CANCELLED)
+                                pending.discard(index)
+                    continue
+                self._handle(message)
+                if message[0] in (MSG_DONE, MSG_CANCELLED, MSG_ERROR):
+                    pending.discard(message[1])
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            results.close()
+
+    def _handle(self, message: Tuple) -> None:
+        kind, index = message[0], message[1]
+        progress = self.files[index]
+        if kind == MSG_START:
+            with self._lock:
+                progress.status = STATUS_RUNNING
+                progress.started_at = time.perf_counter()
+        elif kind == MSG_ROWS:
+            chunk = message[2]
+            with self._lock:
+                progress.scored += len(chunk)
+                progress.buffered += len(chunk)
+            self._buffer.extend(chunk)
+            self._dirty.add(index)
+            if len(self._buffer) >= self.write_rows:
+                self._flush()
+        elif kind == MSG_DONE:
+            self._finish(index, STATUS_DONE, complete=message[2])
+        elif kind == MSG_CANCELLED:
+            self._finish(index, STATUS_CANCELLED)
+        elif kind == MSG_ERROR:
+            self._finish(index, STATUS_FAILED, error=message[2])
+
+    def _finish(
+        self,
+        index: int,
+        status: str,
+        complete: bool = False,
+        error: str | None = None,
+    ) -> None:
+        progress = self.files[index]
+        with self._lock:
+            progress.status = status
+            progress.complete = complete
+            progress.error = error
+            progress.finished_at = time.perf_counter()
+        if status == STATUS_DONE:
+            # El checkpoint final (complete) se confirma con el resto del lote.
+            self._dirty.add(index)
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._dirty:
+            return
+        dirty = [self.files[index] for index in sorted(self._dirty)]
+        with self.session_factory() as session:
+            if self._buffer:
+                AlertRepository(session).create_many(self._buffer, commit=False)
+            checkpoints = CheckpointRepository(session)
+            for progress in dirty:
+                checkpoints.stage(
+                    progress.source,
+                    path=str(progress.path),
+                    fingerprint=progress.fingerprint.encode(),
+                    rows=progress.start_row + progress.written + progress.buffered,
+                    complete=progress.complete,
+                )
+            session.commit()
+        with self._lock:
+            for progress in dirty:
+                progress.written += progress.buffered
+                progress.buffered = 0
+            self.flushes += 1
+        self._buffer = []
+        self._dirty.clear()
+
+
+async def _ingest_worker(app, job: ZeekIngestJob) -> None:
+    try:
+        app.state.zeek_ingested = await asyncio.to_thread(job.run)
+    except Exception:  # noqa: BLE001 - el fallo queda en el log y en /metrics/zeek-ingest
+        logger.exception("La ingesta Zeek multiarchivo terminó con error")
+
+
+def get_zeek_ingest_status(app) -> Dict[str, Any]:
+    job: ZeekIngestJob | None = getattr(app.state, "zeek_ingest", None)
+    if job is None:
+        return {"running": False}
+    return job.stats()
+
+
+async def start_zeek_ingest(app, job: ZeekIngestJob) -> bool:
+    existing_task = getattr(app.state, "zeek_ingest_task", None)
+    if existing_task and not existing_task.done():
+        return False
+    app.state.zeek_ingest = job
+    app.state.zeek_ingest_task = asyncio.create_task(_ingest_worker(app, job))
+    return True
+
+
+async def stop_zeek_ingest(app) -> bool:
+    task = getattr(app.state, "zeek_ingest_task", None)
+    job: ZeekIngestJob | None = getattr(app.state, "zeek_ingest", None)
+    if not task:
+        return False
+    if job is not None:
+        job.stop()
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=10)
+    except asyncio.TimeoutError:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    app.state.zeek_ingest_task = None
+    return True
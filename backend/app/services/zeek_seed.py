@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from ..adapters.model_adapter import iter_chunks
+from ..adapters.zeek_adapter import ZeekAdapter
+from ..repositories.alerts_repo import AlertRepository
+from ..repositories.checkpoint_repo import CheckpointRepository
+from .alerts_service import AlertsService, AlertStreamManager
+
+logger = logging.getLogger(__name__)
+
+SEED_SOURCE = "zeek_csv"
+HEAD_HASH_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class FileFingerprint:
+    """Tamaño, mtime y hash de los primeros `head_bytes` bytes de un archivo."""
+
+    size: int
+    mtime_ns: int
+    head_bytes: int
+    head_hash: str
+
+    def encode(self) -> str:
+        return f"{self.size}:{self.mtime_ns}:{self.head_bytes}:{self.head_hash}"
+
+    @classmethod
+    def decode(cls, raw: str | None) -> FileFingerprint | None:
+        try:
+            size, mtime_ns, head_bytes, head_hash = (raw or "").split(":")
+            return cls(int(size), int(mtime_ns), int(head_bytes), head_hash)
+        except ValueError:
+            return None
+
+
+def _head_hash(path: Path, head_bytes: int) -> str:
+    with path.open("rb") as handle:
+        return hashlib.sha256(handle.read(head_bytes)).hexdigest()
+
+
+def file_fingerprint(path: Path, head_bytes: int = HEAD_HASH_BYTES) -> FileFingerprint:
+    stat = path.stat()
+    head = min(head_bytes, stat.st_size)
+    return FileFingerprint(stat.st_size, stat.st_mtime_ns, head, _head_hash(path, head))
+
+
+def is_same_file(previous: FileFingerprint, path: Path, current: FileFingerprint) -> bool:
+    """El archivo actual es el anterior (quizá con filas añadidas al final)."""
+
+    if current.size < previous.size:
+        return False
+    # Se compara el mismo prefijo que se hasheó entonces, aunque el archivo haya crecido.
+    return _head_hash(path, previous.head_bytes) == previous.head_hash
+
+
+def seed_source(path: Path) -> str:
+    return f"{SEED_SOURCE}:{path.resolve()}"
+
+
+def resume_row(
+    session_factory: Callable,
+    source: str,
+    path: Path,
+    fingerprint: FileFingerprint,
+) -> int | None:
+    """Fila desde la que continuar según el checkpoint; None si ya se ingirió entero."""
+
+    with session_factory() as session:
+        checkpoint = CheckpointRepository(session).get(source)
+    if checkpoint is None:
+        return 0
+    previous = FileFingerprint.decode(checkpoint.fingerprint)
+    if previous == fingerprint and checkpoint.complete:
+        logger.info("Seed Zeek omitido: %s ya está ingerido (%s filas)", path, checkpoint.rows)
+        return None
+    if previous is not None and is_same_file(previous, path, fingerprint):
+        logger.info("Seed Zeek reanudado en la fila %s de %s", checkpoint.rows, path)
+        return checkpoint.rows
+    logger.info("Seed Zeek: %s cambió desde el último arranque; se ingiere desde el inicio", path)
+    return 0
+
+
+def seed_zeek_csv(
+    adapter: ZeekAdapter,
+    session_factory: Callable,
+    limit: int | None = None,
+    stream_manager: AlertStreamManager | None = None,
+) -> int:
+    """
+    Seed de ZEEK_CSV reanudable e idempotente.
+
+    Guarda en `ingest_checkpoints` la huella del archivo y cuántas filas de
+    datos se han consumido. Al reiniciar: si la huella no ha cambiado y el
+    archivo ya se leyó entero no se abre; si solo ha crecido se continúa desde
+    la última fila confirmada; si es otro archivo se empieza de cero. Alertas y
+    checkpoint se confirman juntos por lote, así que un corte no duplica filas.
+    Tras cada commit se invalidan las cachés y se publica en `stream_manager`,
+    igual que con `AlertsService.create_alert`.
+    """
+
+    path = adapter.csv_path
+    source = seed_source(path)
+    fingerprint = file_fingerprint(path)
+    start_row = resume_row(session_factory, source, path, fingerprint)
+    if start_row is None:
+        return 0
+
+    created = 0
+    alerts = adapter.iterate_alerts(limit=limit, start_row=start_row)
+    for chunk in iter_chunks(alerts, adapter.batch_size):
+        for payload in chunk:
+            payload.meta["source"] = SEED_SOURCE
+        created += len(chunk)
+        with session_factory() as session:
+            service = AlertsService(AlertRepository(session), stream_manager)
+            batch = service.create_many(chunk, commit=False)
+            CheckpointRepository(session).stage(
+                source,
+                path=str(path),
+                fingerprint=fingerprint.encode(),
+                rows=start_row + created,
+                complete=False,
+            )
+            session.commit()
+            service.notify_created(batch)
+
+    # Sin límite, o con menos filas que el límite, el archivo quedó leído entero.
+    complete = not limit or created < limit
+    with session_factory() as session:
+        CheckpointRepository(session).save(
+            source,
+            path=str(path),
+            fingerprint=fingerprint.encode(),
+            rows=start_row + created,
+            complete=complete,
+        )
+    logger.info("Seed Zeek: %s alertas nuevas desde %s (fila %s)", created, path, start_row + created)
+    return created
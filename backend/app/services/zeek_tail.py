@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from ..adapters.model_adapter import ModelAdapter
+from ..adapters.zeek_adapter import ZeekAdapter
+from ..adapters.zeek_log_reader import ZeekLogReader
+from ..repositories.alerts_repo import AlertRepository
+from ..repositories.checkpoint_repo import CheckpointRepository
+from ..schemas import AlertRead
+from .alerts_service import AlertsService
+from .host_windows import HostWindowTracker
+
+logger = logging.getLogger(__name__)
+
+TAIL_SOURCE = "zeek_tail"
+DEFAULT_READ_BYTES = 4 << 20
+
+
+def resolve_log_path(raw_path: str | Path) -> Path:
+    path = Path(raw_path)
+    if path.is_absolute():
+        return path
+    backend_root = Path(__file__).resolve().parents[2]
+    for root in (backend_root, backend_root.parent):
+        candidate = root / path
+        if candidate.exists():
+            return candidate
+    # El log puede no existir aún: se seguirá esperando en la ruta relativa al backend.
+    return backend_root / path
+
+
+class ZeekLogFollower:
+    """
+    Sigue un conn.log que crece (TSV nativo de Zeek con cabeceras `#fields` o
+    CSV con cabecera) y devuelve solo líneas completas a partir de `offset`.
+    Cabecera, directivas (`#unset_field`, `#types`...) y conversión de tipos son
+    las de ZeekLogReader, así que las filas llegan igual que en el seed.
+
+    El archivo se mantiene abierto entre lecturas. Si la ruta pasa a apuntar a
+    otro inodo (rotación), se termina de leer el archivo anterior y luego se
+    abre el nuevo desde el principio; si el tamaño cae por debajo de `offset`
+    (truncado/copytruncate), se vuelve a leer desde el byte 0.
+    """
+
+    def __init__(self, path: Path, read_bytes: int = DEFAULT_READ_BYTES):
+        self.path = path
+        self.read_bytes = max(4096, read_bytes)
+        self.inode: int | None = None
+        self.offset = 0
+        self.reader = ZeekLogReader(path)
+        self.rotations = 0
+        self.truncations = 0
+        self.has_more = False
+        self._data_start = 0
+        self._handle: BinaryIO | None = None
+
+    @property
+    def header(self) -> List[str] | None:
+        return self.reader.header or None
+
+    def resume(self, inode: int | None, offset: int) -> None:
+        """Posición guardada; solo se respeta si el archivo sigue siendo el mismo."""
+
+        self.inode = inode
+        self.offset = max(0, offset)
+
+    def size(self) -> int:
+        try:
+            return os.stat(self.path).st_size
+        except OSError:
+            return 0
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def read_rows(self, max_rows: int) -> List[Sequence]:
+        """Hasta `max_rows` filas nuevas; deja `offset` justo detrás de la última consumida."""
+
+        handle = self._handle or self._open()
+        if handle is None:
+            return []
+        size = os.fstat(handle.fileno()).st_size
+        if size < self.offset:
+            logger.warning("%s truncado (%s < %s bytes); se relee desde el inicio", self.path, size, self.offset)
+            self.truncations += 1
+            self.offset = 0
+            self._read_header(handle)
+        # Las cabeceras ya están leídas; los datos empiezan detrás de ellas.
+        self.offset = max(self.offset, self._data_start)
+        handle.seek(self.offset)
+        data = handle.read(self.read_bytes)
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            self.has_more = False
+            if self._rotated():
+                self._switch_file()
+            return []
+        lines: List[str] = []
+        consumed = 0
+        for raw_line in data[: cut + 1].splitlines(keepends=True):
+            if len(lines) >= max_rows:
+                break
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            is_header = line.startswith("#") or (line and self.header is None)
+            if is_header and lines:
+                # Cabecera nueva (logs concatenados): el lote acaba aquí para que todas sus filas la compartan.
+                break
+            consumed += len(raw_line)
+            if is_header:
+                self._parse_header_line(line)
+            elif line:
+                lines.append(line)
+        self.offset += consumed
+        self.has_more = consumed < cut + 1 or len(data) == self.read_bytes
+        return self.reader.parse_lines(lines)
+
+    def _open(self) -> BinaryIO | None:
+        try:
+            handle = self.path.open("rb")
+        except FileNotFoundError:
+            return None
+        inode = os.fstat(handle.fileno()).st_ino
+        if self.inode is not None and inode != self.inode:
+            # Rotó mientras no lo seguíamos: el checkpoint es de otro archivo.
+            logger.info("%s cambió de inodo desde el checkpoint; se lee desde el inicio", self.path)
+            self.rotations += 1
+            self.offset = 0
+        self.inode = inode
+        self._handle = handle
+        self._read_header(handle)
+        return handle
+
+    def _rotated(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return False
+
+    def _switch_file(self) -> None:
+        logger.info("Rotación detectada en %s; se sigue el archivo nuevo", self.path)
+        self.close()
+        self.rotations += 1
+        self.inode = None
+        self.offset = 0
+
+    def _read_header(self, handle: BinaryIO) -> None:
+        self.reader.reset_header()
+        self._data_start = 0
+        handle.seek(0)
+        for raw_line in handle:
+            if not raw_line.endswith(b"\n"):
+                break
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            if line.startswith("#"):
+                self._parse_header_line(line)
+                self._data_start += len(raw_line)
+                continue
+            if self.header is None and line:
+                self._parse_header_line(line)
+                self._data_start += len(raw_line)
+            break
+
+    def _parse_header_line(self, line: str) -> None:
+        if line.startswith("#"):
+            self.reader.read_directive(line)
+        else:
+            self.reader.read_header_line(line)
+
+
+@dataclass
+class _PendingBatch:
+    """Lote leído del log que aún no se ha confirmado en BD."""
+
+    header: List[str]
+    numeric: set[str]
+    rows: List[Sequence]
+    # Posición del follower justo detrás del lote: la que se guarda en el checkpoint.
+    inode: int | None
+    offset: int
+    window: np.ndarray | None = None
+    observed: bool = False
+
+
+class ZeekTailer:
+    """
+    Ingesta continua de un conn.log: lee un lote de filas nuevas, lo puntúa y
+    guarda alertas y checkpoint (inodo + offset) en la misma transacción, de
+    modo que un reinicio retoma justo tras el último lote confirmado.
+
+    Si el lote no llega a confirmarse se conserva y el siguiente poll lo
+    reintenta sin releerlo; sus flujos se cuentan en las ventanas por host una
+    sola vez, aunque haya reintentos.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        model_provider: Callable[[], ModelAdapter],
+        session_factory: Callable,
+        batch_rows: int = 500,
+        batch_size: int = 256,
+        host_windows: HostWindowTracker | None = None,
+        read_bytes: int = DEFAULT_READ_BYTES,
+    ):
+        self.path = resolve_log_path(path)
+        self.source = f"{TAIL_SOURCE}:{self.path}"
+        self.follower = ZeekLogFollower(self.path, read_bytes=read_bytes)
+        self.model_provider = model_provider
+        self.session_factory = session_factory
+        self.batch_rows = max(1, batch_rows)
+        self.batch_size = max(1, batch_size)
+        self.host_windows = host_windows
+        self.rows = 0
+        self.alerts = 0
+        self.polls = 0
+        self.errors = 0
+        self.last_batch_ms = 0.0
+        self.max_batch_ms = 0.0
+        self._pending: _PendingBatch | None = None
+
+    def restore(self) -> None:
+        with self.session_factory() as session:
+            checkpoint = CheckpointRepository(session).get(self.source)
+        if checkpoint is not None:
+            self.follower.resume(checkpoint.inode, checkpoint.offset)
+            self.rows = checkpoint.rows
+            logger.info("Tail de %s retomado en el byte %s", self.path, checkpoint.offset)
+
+    def poll(self) -> List[AlertRead]:
+        started = time.perf_counter()
+        self.polls += 1
+        batch = self._pending
+        if batch is None:
+            previous = (self.follower.inode, self.follower.offset)
+            rows = self.follower.read_rows(self.batch_rows)
+            if not rows and (self.follower.inode, self.follower.offset) == previous:
+                return []
+            batch = _PendingBatch(
+                self.follower.header or [],
+                self.follower.reader.numeric_columns,
+                rows,
+                self.follower.inode,
+                self.follower.offset,
+            )
+            self._pending = batch
+        # Si falla, `_pending` se mantiene y el siguiente poll reintenta el mismo lote.
+        alerts = self._persist(batch)
+        self._pending = None
+        self.rows += len(batch.rows)
+        self.alerts += len(alerts)
+        self.last_batch_ms = (time.perf_counter() - started) * 1000.0
+        self.max_batch_ms = max(self.max_batch_ms, self.last_batch_ms)
+        return alerts
+
+    def _persist(self, batch: _PendingBatch) -> List[AlertRead]:
+        payloads = []
+        if batch.rows:
+            # Sin ruta: entre una rotación y la creación del log nuevo `self.path` no existe.
+            adapter = ZeekAdapter(
+                None,
+                self.model_provider(),
+                batch_size=self.batch_size,
+                host_windows=self.host_windows,
+                window_matrix=batch.window,
+            )
+            if not batch.observed:
+                batch.window = adapter.observe_rows(batch.header, batch.rows, batch.numeric)
+                batch.observed = True
+                adapter.window_matrix = batch.window
+            for payload in adapter.alerts_from_rows(batch.header, batch.rows, batch.numeric):
+                payload.meta["source"] = TAIL_SOURCE
+                payloads.append(payload)
+        with self.session_factory() as session:
+            service = AlertsService(AlertRepository(session), None)
+            created = service.create_many(payloads, commit=False)
+            CheckpointRepository(session).stage(
+                self.source,
+                path=str(self.path),
+                inode=batch.inode,
+                offset=batch.offset,
+                rows=self.rows + len(batch.rows),
+            )
+            session.commit()
+            # `_tail_worker` publica las alertas devueltas; aquí solo se invalidan las cachés.
+            service.notify_created(created, publish=False)
+            return [AlertRead.model_validate(alert) for alert in created]
+
+    def close(self) -> None:
+        self.follower.close()
+
+    def stats(self) -> Dict[str, Any]:
+        follower = self.follower
+        return {
+            "path": str(self.path),
+            "inode": follower.inode,
+            "offset": follower.offset,
+            "lag_bytes": max(0, follower.size() - follower.offset) if follower.inode is not None else 0,
+            "rows": self.rows,
+            "alerts": self.alerts,
+            "polls": self.polls,
+            "errors": self.errors,
+            "rotations": follower.rotations,
+            "truncations": follower.truncations,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+            "max_batch_ms": round(self.max_batch_ms, 3),
+        }
+
+
+async def _tail_worker(
+    tailer: ZeekTailer,
+    stream_manager,
+    stop_event: asyncio.Event,
+    poll_interval: float,
+) -> None:
+    await asyncio.to_thread(tailer.restore)
+    while not stop_event.is_set():
+        try:
+            alerts = await asyncio.to_thread(tailer.poll)
+        except Exception:  # noqa: BLE001 - el tail no debe morir por un lote defectuoso
+            tailer.errors += 1
+            logger.exception("Error procesando %s; se reintenta en %.1fs", tailer.path, poll_interval)
+            alerts = []
+            tailer.follower.has_more = False
+        for alert in alerts:
+            await stream_manager.publish(alert)
+        if tailer.follower.has_more:
+            continue
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop_event.wait(), timeout=poll_interval)
+    tailer.close()
+
+
+def get_zeek_tail_status(app) -> Dict[str, Any]:
+    task = getattr(app.state, "zeek_tail_task", None)
+    tailer: ZeekTailer | None = getattr(app.state, "zeek_tail", None)
+    running = bool(task and not task.done())
+    if tailer is None:
+        return {"running": running}
+    return {"running": running, **tailer.stats()}
+
+
+async def start_zeek_tail(
+    app,
+    stream_manager,
+    tailer: ZeekTailer,
+    poll_interval: float = 1.0,
+) -> bool:
+    existing_task = getattr(app.state, "zeek_tail_task", None)
+    if existing_task and not existing_task.done():
+        return False
+    stop_event = asyncio.Event()
+    task = asyncio.create_task(_tail_worker(tailer, stream_manager, stop_event, max(0.05, poll_interval)))
+    app.state.zeek_tail = tailer
+    app.state.zeek_tail_stop_event = stop_event
+    app.state.zeek_tail_task = task
+    return True
+
+
+async def stop_zeek_tail(app) -> bool:
+    task = getattr(app.state, "zeek_tail_task", None)
+    stop_event = getattr(app.state, "zeek_tail_stop_event", None)
+    if not task:
+        return False
+    if stop_event:
+        stop_event.set()
+    try:
+        await asyncio.wait_for(task, timeout=5)
+    except asyncio.TimeoutError:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    app.state.zeek_tail_task = None
+    app.state.zeek_tail_stop_event = None
+    return True
@@ -0,0 +1,44 @@
+import csv
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+
+from app.adapters.model_adapter import TOP_FEATURES, ModelAdapter
+from app.services.feature_bridge import build_conn_feature_vector
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+@pytest.fixture(scope="session")
+def artifact_path(tmp_path_factory):
+    """RF pequeño entrenado sobre el dataset de referencia con etiquetas aleatorias."""
+
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    features = pd.DataFrame([build_conn_feature_vector(row) for row in rows], columns=TOP_FEATURES)
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 6, size=len(features))
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(features, labels)
+    path = tmp_path_factory.mktemp("model") / "rf.pkl"
+    joblib.dump({"model": model, "features": TOP_FEATURES}, path)
+    return path
+
+
+@pytest.fixture(scope="session")
+def model_adapter(artifact_path):
+    return ModelAdapter(artifact_path)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return sessionmaker(bind=engine, class_=Session, expire_on_commit=False)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from app.adapters.model_adapter import TOP_FEATURES, ModelAdapter
+
+
+def test_compiled_forest_is_bit_compatible(model_adapter, artifact_path):
+    compiled = ModelAdapter(artifact_path, engine="compiled")
+    assert compiled.engine == "compiled"
+    rng = np.random.default_rng(7)
+    matrix = np.abs(rng.standard_cauchy((300, len(TOP_FEATURES)))) * 50
+    expected = model_adapter.model.predict_proba(pd.DataFrame(matrix, columns=TOP_FEATURES))
+    np.testing.assert_array_equal(compiled.compiled.predict_proba(matrix), expected)
+    np.testing.assert_array_equal(compiled.predict_batch(matrix[:3]).probabilities, expected[:3])
+
+
+def test_mmap_sidecar_shares_compiled_forest(model_adapter, artifact_path, tmp_path):
+    local_artifact = tmp_path / artifact_path.name
+    local_artifact.write_bytes(artifact_path.read_bytes())
+    first = ModelAdapter(local_artifact, mmap=True)
+    assert first.model is None
+    assert first.compiled.memory_mapped
+    assert (tmp_path / f"{artifact_path.name}.mmap" / "meta.json").exists()
+
+    reopened = ModelAdapter(local_artifact, mmap=True)
+    assert reopened.footprint()["shared"]
+    rng = np.random.default_rng(11)
+    matrix = np.abs(rng.standard_cauchy((500, len(TOP_FEATURES)))) * 50
+    np.testing.assert_array_equal(
+        reopened.predict_batch(matrix).probabilities,
+        model_adapter.predict_batch(matrix).probabilities,
+    )
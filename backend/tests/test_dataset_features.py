@@ -0,0 +1,192 @@
+import csv
+import gzip
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.adapters.feature_csv_adapter import FeatureCSVAdapter
+from app.adapters.model_adapter import TOP_FEATURES
+from app.adapters.zeek_adapter import ZeekAdapter
+from app.models import AttackTypeEnum
+from app.services import dataset_features
+from app.services.dataset_features import DatasetFeatureStore
+from app.services.host_windows import HostWindowTracker
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def test_dataset_feature_sidecar_replaces_feature_pipeline(model_adapter, tmp_path):
+    dataset = tmp_path / "upload.csv"
+    dataset.write_bytes(REFERENCE_CSV.read_bytes())
+    store = DatasetFeatureStore(tmp_path / "sidecars", chunk_rows=64)
+    try:
+        assert store.load(dataset, "conn") is None
+        store.schedule(dataset, "conn").result(timeout=30)
+        matrix = store.load(dataset, "conn")
+    finally:
+        store.close()
+    assert isinstance(matrix, np.memmap)
+    assert matrix.shape == (len(_reference_rows()), len(TOP_FEATURES))
+
+    plain = ZeekAdapter(dataset, model_adapter, batch_size=50)
+    cached = ZeekAdapter(dataset, model_adapter, batch_size=50, feature_matrix=matrix)
+    np.testing.assert_array_equal(np.vstack([block.copy() for block in plain.iter_feature_matrices()]), matrix)
+    for attack_type in (None, AttackTypeEnum.dos):
+        expected = [alert.model_dump() for alert in plain.iterate_alerts(limit=40, attack_type=attack_type)]
+        got = [alert.model_dump() for alert in cached.iterate_alerts(limit=40, attack_type=attack_type)]
+        assert got == expected
+
+
+def test_dataset_class_index_seeks_to_matching_rows(model_adapter, tmp_path):
+    dataset = tmp_path / "upload.csv"
+    dataset.write_bytes(REFERENCE_CSV.read_bytes())
+    archive = tmp_path / "upload.csv.gz"
+    archive.write_bytes(gzip.compress(REFERENCE_CSV.read_bytes()))
+    store = DatasetFeatureStore(tmp_path / "sidecars", chunk_rows=64)
+    try:
+        assert store.load_index(dataset, "conn", model_adapter, host_windows_factory=HostWindowTracker) is None
+        store.schedule_index(dataset, "conn", lambda: model_adapter, host_windows_factory=HostWindowTracker).result(
+            timeout=30
+        )
+        index = store.load_index(dataset, "conn", model_adapter, host_windows_factory=HostWindowTracker)
+        store.schedule_index(archive, "conn", lambda: model_adapter).result(timeout=30)
+        archive_index = store.load_index(archive, "conn", model_adapter)
+    finally:
+        store.close()
+    rows = _reference_rows()
+    summary = index.summary()
+    assert summary["rows"] == len(rows) and summary["seekable"]
+    assert sum(summary["predicted"].values()) == len(rows)
+    assert summary["labels"]["PortScan"] == sum(row["Label"] == "PortScan" for row in rows)
+    assert [rows[idx]["Label"] for idx in index.rows_for_label("PortScan", limit=3)] == ["PortScan"] * 3
+    assert archive_index.offsets is None and archive_index.windows is None
+
+    for attack_type in (AttackTypeEnum.benign, AttackTypeEnum.portscan, AttackTypeEnum.dos):
+        expected = [
+            alert.model_dump()
+            for alert in ZeekAdapter(dataset, model_adapter, batch_size=50, host_windows=HostWindowTracker())
+            .iterate_alerts(limit=4, attack_type=attack_type)
+        ]
+        seeked = ZeekAdapter(
+            dataset,
+            model_adapter,
+            batch_size=50,
+            host_windows=HostWindowTracker(),
+            row_offsets=index.offsets,
+            window_matrix=index.windows,
+        )
+        selected = index.rows_for_class(attack_type, limit=4)
+        got = [alert.model_dump() for alert in seeked.iterate_alerts(limit=4, attack_type=attack_type, rows=selected)]
+        assert got == expected
+        streamed = ZeekAdapter(archive, model_adapter, batch_size=50).iterate_alerts(
+            limit=4, attack_type=attack_type, rows=archive_index.rows_for_class(attack_type, limit=4)
+        )
+        assert [alert.rule_id for alert in streamed] == [alert["rule_id"] for alert in expected]
+
+
+
+def test_dataset_class_index_scores_through_the_inference_pool(model_adapter, tmp_path):
+    dataset = tmp_path / "upload.csv"
+    dataset.write_bytes(REFERENCE_CSV.read_bytes())
+    indexes = []
+    for workers, directory in ((1, "single"), (2, "pooled")):
+        store = DatasetFeatureStore(tmp_path / directory, chunk_rows=64, workers=workers, pool_min_rows=40)
+        try:
+            store.schedule_index(dataset, "conn", lambda: model_adapter, host_windows_factory=HostWindowTracker).result(
+                timeout=60
+            )
+            indexes.append(store.load_index(dataset, "conn", model_adapter, host_windows_factory=HostWindowTracker))
+        finally:
+            store.close()
+    single, pooled = indexes
+    assert pooled.summary() == single.summary()
+    np.testing.assert_array_equal(pooled.class_rows, single.class_rows)
+    np.testing.assert_array_equal(pooled.windows, single.windows)
+
+
+def test_seeked_rows_fall_back_to_a_filtered_scan_when_rescoring_disagrees(model_adapter, tmp_path):
+    dataset = tmp_path / "upload.csv"
+    dataset.write_bytes(REFERENCE_CSV.read_bytes())
+    features = tmp_path / "features.csv"
+    matrix = np.abs(np.random.default_rng(8).standard_cauchy((120, len(TOP_FEATURES)))) * 50
+    features.write_text(
+        ",".join(TOP_FEATURES) + "\n" + "".join(",".join(f"{value:.6f}" for value in row) + "\n" for row in matrix),
+        encoding="utf-8",
+    )
+    store = DatasetFeatureStore(tmp_path / "sidecars", chunk_rows=64)
+    try:
+        store.schedule_index(dataset, "conn", lambda: model_adapter, host_windows_factory=HostWindowTracker).result(
+            timeout=30
+        )
+        index = store.load_index(dataset, "conn", model_adapter, host_windows_factory=HostWindowTracker)
+        store.schedule_index(features, "features", lambda: model_adapter).result(timeout=30)
+        features_index = store.load_index(features, "features", model_adapter)
+    finally:
+        store.close()
+
+    # Filas de cualquier clase, como un índice construido con otro modelo.
+    stale = np.arange(4)
+    for attack_type in (AttackTypeEnum.benign, AttackTypeEnum.portscan, AttackTypeEnum.dos):
+        expected = ZeekAdapter(dataset, model_adapter, batch_size=50, host_windows=HostWindowTracker())
+        seeked = ZeekAdapter(
+            dataset,
+            model_adapter,
+            batch_size=50,
+            host_windows=HostWindowTracker(),
+            row_offsets=index.offsets,
+            window_matrix=index.windows,
+        )
+        got = [alert.model_dump() for alert in seeked.iterate_alerts(limit=4, attack_type=attack_type, rows=stale)]
+        assert got == [alert.model_dump() for alert in expected.iterate_alerts(limit=4, attack_type=attack_type)]
+
+        plain = FeatureCSVAdapter(features, model_adapter, batch_size=50)
+        indexed = FeatureCSVAdapter(features, model_adapter, batch_size=50, row_offsets=features_index.offsets)
+        got = [alert.model_score for alert in indexed.iterate_alerts(limit=4, attack_type=attack_type, rows=stale)]
+        assert got == [alert.model_score for alert in plain.iterate_alerts(limit=4, attack_type=attack_type)]
+
+def test_float32_sidecar_matches_float64_features(tmp_path):
+    matrix = np.vstack([block.copy() for block in ZeekAdapter(REFERENCE_CSV, None).iter_feature_matrices()])
+    store = DatasetFeatureStore(tmp_path, chunk_rows=100)
+    try:
+        store.schedule(REFERENCE_CSV, "conn", np.float32).result(timeout=30)
+        sidecar = store.load(REFERENCE_CSV, "conn", np.float32)
+    finally:
+        store.close()
+    assert sidecar.dtype == np.float32
+    np.testing.assert_array_equal(sidecar, matrix.astype(np.float32))
+
+
+def test_feature_store_hashes_in_the_background_and_writes_the_sidecar_once(model_adapter, tmp_path, monkeypatch):
+    dataset = tmp_path / "upload.csv"
+    dataset.write_bytes(REFERENCE_CSV.read_bytes() + b"1499,Ccorta\n")
+    threads = []
+    real_hash = dataset_features.content_hash
+
+    def tracked_hash(path):
+        threads.append(threading.current_thread().name)
+        return real_hash(path)
+
+    monkeypatch.setattr(dataset_features, "content_hash", tracked_hash)
+    store = DatasetFeatureStore(tmp_path / "sidecars", chunk_rows=64)
+    try:
+        # Sin hash conocido las lecturas no leen el archivo: programan el trabajo y vuelven.
+        assert store.load(dataset, "conn") is None
+        assert store.load_index(dataset, "conn", model_adapter) is None
+        store.schedule(dataset, "conn").result(timeout=30)
+        store.schedule_index(dataset, "conn", lambda: model_adapter).result(timeout=30)
+        matrix = store.load(dataset, "conn")
+        index = store.load_index(dataset, "conn", model_adapter)
+    finally:
+        store.close()
+    assert threads and all(name.startswith("dataset-features") for name in threads)
+    assert matrix.shape == (len(_reference_rows()), len(TOP_FEATURES)) and index.rows == matrix.shape[0]
+    # La cabecera se ajustó a las filas válidas y no quedan bytes de más ni archivos intermedios.
+    assert os.path.getsize(matrix.filename) == matrix.offset + matrix.nbytes
+    assert sorted(path.suffix for path in (tmp_path / "sidecars").iterdir()) == [".index", ".npy"]
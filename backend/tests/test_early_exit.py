@@ -0,0 +1,22 @@
+import numpy as np
+
+from app.adapters.early_exit import EarlyExitEvaluator
+from app.adapters.model_adapter import TOP_FEATURES, ModelAdapter
+
+
+def test_early_exit_keeps_leading_class(model_adapter, artifact_path):
+    forest = ModelAdapter(artifact_path, engine="compiled").compiled
+    rng = np.random.default_rng(11)
+    matrix = np.abs(rng.standard_cauchy((400, len(TOP_FEATURES)))) * 50
+    full = forest.predict_proba(matrix)
+    evaluator = EarlyExitEvaluator(chunk_trees=4, audit_every=1)
+    fast = evaluator.predict_proba(forest, matrix)
+    np.testing.assert_array_equal(np.argmax(fast, axis=1), np.argmax(full, axis=1))
+    stats = evaluator.stats()
+    assert stats["margin_exit_rows"] > 0
+    assert stats["trees_evaluated_fraction"] < 1.0
+    assert stats["audit_agreement_rate"] == 1.0
+
+    adapter = ModelAdapter(artifact_path)
+    assert adapter.enable_early_exit(EarlyExitEvaluator(chunk_trees=forest.n_trees))
+    np.testing.assert_array_equal(adapter.predict_batch(matrix).probabilities, full)
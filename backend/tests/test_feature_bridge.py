@@ -0,0 +1,109 @@
+import csv
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from app.services import feature_bridge
+from app.services.feature_bridge import (
+    CONN_FEATURE_COLUMNS,
+    TOP20_FEATURES,
+    ModelArtifacts,
+    build_cicids_full_feature_matrix,
+    build_cicids_full_feature_vector,
+    build_conn_feature_matrix,
+    build_conn_feature_vector,
+    cicids_feature_names,
+    iter_cicflow_log,
+    map_cicflow_frame_to_features,
+    map_cicflow_row_to_features,
+    predict_from_cicflow_row,
+)
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _expected(rows):
+    return np.array([list(build_conn_feature_vector(row).values()) for row in rows], dtype=float)
+
+
+def test_conn_feature_matrix_matches_row_version():
+    rows = _reference_rows()
+    expected = _expected(rows)
+    np.testing.assert_array_equal(build_conn_feature_matrix(pd.DataFrame(rows, dtype=object)), expected)
+    columns = {name: [row.get(name) for row in rows] for name in CONN_FEATURE_COLUMNS}
+    np.testing.assert_array_equal(build_conn_feature_matrix(columns), expected)
+
+
+def test_conn_feature_matrix_handles_missing_and_fallback_columns():
+    rows = [
+        {"duration": "-", "orig_bytes": "", "orig_ip_bytes": "1,200", "resp_bytes": "abc", "proto": " udp "},
+        {"duration": " 2.5 ", "orig_bytes": "-3", "resp_ip_bytes": "7", "service": "SSH", "resp_p": "8080"},
+        {"proto": None, "service": "-", "id.resp_p": "22.9", "resp_p": "80"},
+    ]
+    frame = pd.DataFrame(rows, dtype=object)
+    np.testing.assert_array_equal(build_conn_feature_matrix(frame), _expected(rows))
+
+
+def test_cicids_full_feature_matrix_matches_row_version():
+    rows = _reference_rows()[:100] + [
+        {"duration": "0", "orig_pkts": "3", "resp_pkts": "-", "history": "ShADadFfRrUuPpEe"},
+        {"orig_bytes": "12", "orig_ip_bytes": "1,200", "resp_bytes": "nan", "history": None},
+        {"duration": "2.5", "orig_pkts": "4", "resp_pkts": "0", "id.resp_p": "22", "history": "SSñPp"},
+    ]
+    names = cicids_feature_names()
+    expected = np.array(
+        [[build_cicids_full_feature_vector(row)[name] for name in names] for row in rows],
+        dtype=np.float32,
+    )
+    matrix = build_cicids_full_feature_matrix(pd.DataFrame(rows, dtype=object))
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (len(rows), len(names))
+    np.testing.assert_array_equal(matrix, expected)
+
+
+def test_model_artifacts_load_once_and_score_batches(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    features = rng.random((60, len(TOP20_FEATURES))) * 100
+    labels = np.array(["BENIGN", "DoS", "PortScan"])[rng.integers(0, 3, size=60)]
+    scaler = StandardScaler().fit(features)
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(scaler.transform(features), labels)
+    joblib.dump(scaler, tmp_path / "scaler.pkl")
+    joblib.dump(model, tmp_path / "model.pkl")
+
+    loads = []
+    original_load = joblib.load
+    monkeypatch.setattr(feature_bridge.joblib, "load", lambda path: loads.append(path) or original_load(path))
+    artifacts = ModelArtifacts(scaler_path=tmp_path / "scaler.pkl", model_path=tmp_path / "model.pkl")
+    rows = [{"bwd_pkt_len_max": str(value), "total_fwd_pkts": "3", "id_resp_p": "80"} for value in range(10)]
+    batch = artifacts.predict_rows(rows)
+    singles = [predict_from_cicflow_row(row, artifacts) for row in rows]
+    assert batch == singles
+    assert len(loads) == 2
+    assert artifacts.predict_rows([]) == []
+
+
+def test_cicflow_log_chunks_map_like_row_version(tmp_path):
+    log = tmp_path / "cicflow.log"
+    lines = ["uid\tbwd_pkt_len_max\ttotal_fwd_pkts\tsubflow_fwd_pkts\tdst_port"]
+    for idx in range(25):
+        subflow = "-" if idx % 4 == 0 else str(idx * 2)
+        lines.append(f"C{idx}\t{idx * 1.5}\t{idx}\t{subflow}\t{443 if idx % 2 else 80}")
+    log.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    chunks = list(iter_cicflow_log(log, chunksize=10))
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    for chunk in chunks:
+        expected = [
+            [map_cicflow_row_to_features(row)[name] for name in TOP20_FEATURES]
+            for row in chunk.to_dict("records")
+        ]
+        np.testing.assert_array_equal(map_cicflow_frame_to_features(chunk), np.array(expected))
@@ -0,0 +1,79 @@
+import numpy as np
+
+from app.services.host_windows import HostWindowTracker
+
+
+def _brute_force(flows, windows):
+    expected = []
+    clock = 0.0
+    for position, (ts, src, _, _) in enumerate(flows):
+        clock = max(clock, ts)
+        row = []
+        for seconds in windows:
+            live = [
+                flow
+                for flow in flows[: position + 1]
+                if flow[1] == src and flow[0] > clock - seconds
+            ]
+            row.extend(
+                [len(live) / seconds, len({flow[3] for flow in live}), len({flow[2] for flow in live})]
+            )
+        expected.append(row)
+    return np.array(expected)
+
+
+def test_window_features_match_brute_force():
+    rng = np.random.default_rng(3)
+    ts = np.cumsum(rng.exponential(0.5, size=400)) + 1_700_000_000
+    flows = [
+        (
+            float(ts[idx]),
+            f"10.0.0.{rng.integers(0, 5)}",
+            f"192.168.1.{rng.integers(0, 20)}",
+            int(rng.integers(1, 60)),
+        )
+        for idx in range(len(ts))
+    ]
+    tracker = HostWindowTracker(windows=(10, 60), idle_seconds=3600)
+    columns = list(zip(*flows))
+    halves = [slice(0, 150), slice(150, None)]
+    got = np.vstack(
+        [tracker.observe_batch(*[[str(value) for value in column[part]] for column in columns]) for part in halves]
+    )
+    np.testing.assert_allclose(got, _brute_force(flows, (10, 60)))
+    assert tracker.snapshot(flows[-1][1])["host_distinct_dst_ports_10s"] == got[-1, 1]
+    assert tracker.snapshot("203.0.113.9") == dict.fromkeys(tracker.feature_names, 0.0)
+
+
+def test_tracker_evicts_idle_hosts_and_respects_caps():
+    tracker = HostWindowTracker(windows=(10,), max_hosts=3, max_events=4, idle_seconds=30)
+    tracker.observe_batch([0, 1, 2, 3], ["a", "b", "c", "d"], ["x"] * 4, [80, 81, 82, 83])
+    assert tracker.stats()["hosts"] == 3
+    assert tracker.stats()["evicted_capacity"] == 1
+
+    scan = tracker.observe_batch([4] * 6, ["d"] * 6, ["x"] * 6, list(range(1000, 1006)))
+    assert scan[-1].tolist() == [0.4, 4.0, 1.0]
+    assert tracker.stats()["truncated_events"] == 3
+
+    tracker.observe_batch([100], ["e"], ["y"], [22])
+    stats = tracker.stats()
+    assert stats["hosts"] == 1
+    assert stats["evicted_idle"] == 3
+    assert stats["events"] == 1
+
+
+def test_tracker_caps_total_events_across_hosts():
+    tracker = HostWindowTracker(windows=(10, 60), max_hosts=1000, max_events=8, idle_seconds=3600, max_total_events=40)
+    sources = [f"10.0.0.{idx % 12}" for idx in range(240)]
+    tracker.observe_batch([idx / 10 for idx in range(240)], sources, ["x"] * 240, list(range(240)))
+    stats = tracker.stats()
+    live = sum(len(window.events) for state in tracker._hosts.values() for window in state.windows)
+    assert stats["events"] == live <= 40
+    assert stats["evicted_memory"] > 0 and stats["evicted_capacity"] == 0
+    # El host más reciente conserva su estado: la expulsión empieza por el menos reciente.
+    assert tracker.snapshot(sources[-1])["host_distinct_dst_ports_60s"] > 0
+    assert stats["approx_bytes"] > 0
+
+    tracker.observe_batch([10_000], ["10.0.0.99"], ["y"], [22])
+    stats = tracker.stats()
+    assert stats["hosts"] == 1 and stats["events"] == 2
@@ -0,0 +1,61 @@
+import threading
+
+import numpy as np
+
+from app.adapters.early_exit import EarlyExitEvaluator
+from app.adapters.model_adapter import TOP_FEATURES, ModelAdapter
+from app.services.inference_pool import InferencePool, pool_context
+
+
+def test_inference_pool_merges_shards_in_order(model_adapter):
+    rng = np.random.default_rng(3)
+    matrix = np.abs(rng.standard_cauchy((900, len(TOP_FEATURES)))) * 50
+    with InferencePool(model_adapter, workers=3, min_rows=200) as pool:
+        pooled = pool.predict_batch(matrix)
+        small = pool.predict_batch(matrix[:10])
+    expected = model_adapter.predict_batch(matrix)
+    np.testing.assert_array_equal(pooled.probabilities, expected.probabilities)
+    assert pooled.class_names == expected.class_names
+    assert len(small) == 10
+
+
+def test_inference_pool_avoids_fork_while_other_threads_run(model_adapter):
+    matrix = np.abs(np.random.default_rng(4).standard_cauchy((600, len(TOP_FEATURES)))) * 50
+    release = threading.Event()
+    watcher = threading.Thread(target=release.wait, daemon=True)
+    watcher.start()
+    try:
+        assert pool_context().get_start_method() != "fork"
+        with InferencePool(model_adapter, workers=2, min_rows=200) as pool:
+            pooled = pool.predict_batch(matrix)
+            probabilities = pool.predict_proba(matrix)
+            start_method = pool._executor._mp_context.get_start_method()
+    finally:
+        release.set()
+        watcher.join()
+    expected = model_adapter.predict_batch(matrix).probabilities
+    assert start_method in ("forkserver", "spawn")
+    np.testing.assert_array_equal(pooled.probabilities, expected)
+    np.testing.assert_array_equal(probabilities, expected)
+
+
+def test_spawned_workers_repeat_the_parent_model_setup(artifact_path, tmp_path):
+    local_artifact = tmp_path / "rf.pkl"
+    local_artifact.write_bytes(artifact_path.read_bytes())
+    adapter = ModelAdapter(local_artifact)
+    adapter.feature_dtype = np.float32
+    assert adapter.enable_early_exit(EarlyExitEvaluator(chunk_trees=2))
+    matrix = np.abs(np.random.default_rng(6).standard_cauchy((600, len(TOP_FEATURES)))) * 50
+    release = threading.Event()
+    watcher = threading.Thread(target=release.wait, daemon=True)
+    watcher.start()
+    try:
+        with InferencePool(adapter, workers=2, min_rows=200) as pool:
+            pooled = pool.predict_batch(matrix)
+    finally:
+        release.set()
+        watcher.join()
+    # Los workers sin fork aplican float32 y salida temprana como el padre, y no escriben sidecars.
+    np.testing.assert_array_equal(pooled.probabilities, adapter.predict_batch(matrix).probabilities)
+    assert adapter.early_exit.margin_exit_rows > 0
+    assert not adapter.mmap_sidecar_path.exists()
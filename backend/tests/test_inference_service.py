@@ -0,0 +1,93 @@
+import asyncio
+import csv
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.adapters.model_adapter import TOP_FEATURES
+from app.services.feature_bridge import build_conn_feature_vector
+from app.services.inference_service import InferenceService
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def test_inference_service_groups_concurrent_requests(model_adapter):
+    feature_rows = [build_conn_feature_vector(row) for row in _reference_rows()[:20]]
+
+    async def scenario():
+        service = InferenceService(lambda: model_adapter, max_batch_size=8, max_wait_ms=50.0)
+        await service.start()
+        try:
+            results = await asyncio.gather(*(service.predict(features) for features in feature_rows))
+        finally:
+            await service.stop()
+        return results, service.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [model_adapter.predict(features) for features in feature_rows]
+    assert stats["requests"] == 20
+    assert stats["rows"] == 20
+    assert stats["batches"] < 20
+    assert stats["max_batch_rows"] <= 8
+
+
+class _PassThroughAdapter:
+    """No valida el ancho, como un adaptador recargado entre dos peticiones encoladas."""
+
+    def __init__(self, adapter, delay: float = 0.0):
+        self.adapter = adapter
+        self.delay = delay
+
+    def to_matrix(self, matrix):
+        return np.asarray(matrix, dtype=np.float64)
+
+    def predict_batch(self, matrix):
+        time.sleep(self.delay)
+        return self.adapter.predict_batch(matrix)
+
+
+def test_inference_service_survives_mixed_width_batches(model_adapter):
+    adapter = _PassThroughAdapter(model_adapter)
+    rows = np.ones((1, len(TOP_FEATURES)))
+
+    async def scenario():
+        service = InferenceService(lambda: adapter, max_batch_size=8, max_wait_ms=50.0)
+        await service.start()
+        try:
+            failed = await asyncio.gather(
+                service.predict_batch(rows),
+                service.predict_batch(rows[:, :-1]),
+                return_exceptions=True,
+            )
+            recovered = await service.predict_batch(rows)
+        finally:
+            await service.stop()
+        return failed, recovered, service.stats()
+
+    failed, recovered, stats = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in failed)
+    assert len(recovered) == 1
+    assert stats["errors"] == 1
+    assert stats["requests"] == 3 and stats["batches"] == 1
+
+
+def test_batching_client_waits_a_bounded_time(model_adapter):
+    adapter = _PassThroughAdapter(model_adapter, delay=0.5)
+
+    async def scenario():
+        service = InferenceService(lambda: adapter, max_wait_ms=0.0, result_timeout=0.05)
+        await service.start()
+        try:
+            with pytest.raises(TimeoutError):
+                await asyncio.to_thread(service.client().predict_batch, np.ones((1, len(TOP_FEATURES))))
+        finally:
+            await service.stop()
+
+    asyncio.run(scenario())
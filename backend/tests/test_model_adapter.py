@@ -0,0 +1,103 @@
+import csv
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.adapters.feature_schema import FeatureSchema
+from app.adapters.model_adapter import CLASS_ID_TO_NAME, TOP_FEATURES, ModelAdapter
+from app.adapters.zeek_adapter import ZeekAdapter
+from app.services.feature_bridge import build_conn_feature_vector
+from app.services.host_windows import HostWindowTracker
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def test_predict_batch_matches_predict(model_adapter):
+    feature_rows = [build_conn_feature_vector(row) for row in _reference_rows()[:40]]
+    batch = model_adapter.predict_batch(model_adapter.vectorize_batch(feature_rows))
+    assert len(batch) == 40
+    assert batch.probabilities.shape == (40, 6)
+    for idx, features in enumerate(feature_rows):
+        single = model_adapter.predict(features)
+        assert batch.prediction(idx) == single
+
+
+def test_predict_batch_accepts_ndarray_and_empty(model_adapter):
+    feature_rows = [build_conn_feature_vector(row) for row in _reference_rows()[:5]]
+    frame = model_adapter.vectorize_batch(feature_rows)
+    from_array = model_adapter.predict_batch(frame.to_numpy())
+    from_frame = model_adapter.predict_batch(frame[list(reversed(TOP_FEATURES))])
+    np.testing.assert_array_equal(from_array.probabilities, from_frame.probabilities)
+    assert len(model_adapter.predict_batch(np.zeros((0, len(TOP_FEATURES))))) == 0
+
+
+def test_prediction_builds_probability_map_lazily(model_adapter):
+    feature_rows = [build_conn_feature_vector(row) for row in _reference_rows()[:3]]
+    batch = model_adapter.predict_batch(model_adapter.vectorize_batch(feature_rows))
+    prediction = batch.prediction(1)
+    assert not hasattr(prediction, "__dict__")
+    assert np.shares_memory(prediction.probability_row, batch.probabilities)
+    assert prediction.probabilities == {
+        name: float(prob) for name, prob in zip(CLASS_ID_TO_NAME.values(), batch.probabilities[1])
+    }
+    assert batch.attack_type(1) == prediction.attack_type
+
+
+def test_feature_schema_fills_preallocated_buffer():
+    header = ["ts", "proto", "duration", "proto"]
+    schema = FeatureSchema(header, ["duration", "proto", "missing"])
+    assert schema.columns == ["duration", "proto"]
+    buffer = schema.allocate(4)
+    columns = schema.fill([["1", "tcp", "0.5", "udp"], ["2", "icmp", "-", "tcp"]], buffer)
+    assert columns["duration"].tolist() == ["0.5", "-"]
+    assert columns["proto"].tolist() == ["udp", "tcp"]
+    assert np.shares_memory(columns["proto"], buffer)
+    assert schema.record(["1", "tcp", "0.5", "udp"]) == {"ts": "1", "proto": "udp", "duration": "0.5"}
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 256])
+def test_zeek_adapter_chunking_is_transparent(model_adapter, batch_size):
+    adapter = ZeekAdapter(REFERENCE_CSV, model_adapter, batch_size=batch_size)
+    alerts = list(adapter.iterate_alerts(limit=30))
+    expected = [
+        model_adapter.predict(build_conn_feature_vector(row)).class_name for row in _reference_rows()[:30]
+    ]
+    assert [alert.rule_name for alert in alerts] == [f"Zeek {name}" for name in expected]
+
+
+def test_zeek_adapter_attaches_host_windows(model_adapter):
+    tracker = HostWindowTracker()
+    plain = list(ZeekAdapter(REFERENCE_CSV, model_adapter, batch_size=64).iterate_alerts(limit=80))
+    enriched = list(
+        ZeekAdapter(REFERENCE_CSV, model_adapter, batch_size=40, host_windows=tracker).iterate_alerts(limit=80)
+    )
+    assert [alert.rule_name for alert in enriched] == [alert.rule_name for alert in plain]
+    assert tracker.stats()["flows"] == 80
+    last = enriched[-1].meta["host_window"]
+    assert list(last) == tracker.feature_names
+    assert last == tracker.snapshot(enriched[-1].src_ip)
+
+
+def test_float32_features_validate_and_match_float64(artifact_path, model_adapter):
+    adapter = ModelAdapter(artifact_path)
+    matrix = np.vstack([block.copy() for block in ZeekAdapter(REFERENCE_CSV, None).iter_feature_matrices()])
+    report = adapter.validate_feature_dtype(matrix, np.float32)
+    assert report["ok"] and report["max_abs_diff"] == 0.0
+    assert not adapter.validate_feature_dtype(np.full((2, len(TOP_FEATURES)), 1e39), np.float32)["ok"]
+
+    adapter.feature_dtype = np.float32
+    zeek = ZeekAdapter(REFERENCE_CSV, adapter, batch_size=64)
+    assert zeek.feature_dtype == np.float32
+    assert next(zeek.iter_feature_matrices()).dtype == np.float32
+    got = [(alert.rule_name, alert.model_score) for alert in zeek.iterate_alerts()]
+    expected = [
+        (alert.rule_name, alert.model_score)
+        for alert in ZeekAdapter(REFERENCE_CSV, model_adapter, batch_size=64).iterate_alerts()
+    ]
+    assert got == expected
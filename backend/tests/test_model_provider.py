@@ -0,0 +1,66 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+from app import main
+from app.services import model_provider
+from app.services.model_provider import get_model_readiness, start_model_preload
+
+
+def test_model_preload_reports_cold_loading_ready_and_error(monkeypatch, model_adapter):
+    release = threading.Event()
+
+    def slow_load(path):
+        if path == "missing.pkl":
+            raise FileNotFoundError(path)
+        release.wait(5)
+        return model_adapter
+
+    monkeypatch.setattr(model_provider, "get_model_adapter", slow_load)
+
+    async def scenario():
+        app = SimpleNamespace(state=SimpleNamespace())
+        assert get_model_readiness(app)["status"] == "cold"
+        future = start_model_preload(app, "model.pkl")
+        assert start_model_preload(app, "model.pkl") is future
+        loading = get_model_readiness(app)
+        release.set()
+        await future
+        ready = get_model_readiness(app)
+
+        broken = SimpleNamespace(state=SimpleNamespace())
+        try:
+            await start_model_preload(broken, "missing.pkl")
+        except FileNotFoundError:
+            pass
+        return loading, ready, get_model_readiness(broken)
+
+    loading, ready, error = asyncio.run(scenario())
+    assert loading == {"status": "loading", "model_version": None, "detail": None}
+    assert ready == {"status": "ready", "model_version": model_adapter.version, "detail": None}
+    assert error["status"] == "error" and "missing.pkl" in error["detail"]
+
+
+def test_readiness_endpoint_returns_503_until_the_model_is_ready(monkeypatch, model_adapter):
+    loop = asyncio.new_event_loop()
+    try:
+        pending = loop.create_future()
+        monkeypatch.setattr(main.app.state, "model_preload", pending, raising=False)
+        assert main.readiness().status_code == 503
+
+        failed = loop.create_future()
+        failed.set_exception(RuntimeError("artefacto corrupto"))
+        monkeypatch.setattr(main.app.state, "model_preload", failed)
+        response = main.readiness()
+        assert response.status_code == 503
+        assert json.loads(response.body)["detail"] == "artefacto corrupto"
+
+        done = loop.create_future()
+        done.set_result(model_adapter)
+        monkeypatch.setattr(main.app.state, "model_preload", done)
+        response = main.readiness()
+        assert response.status_code == 200
+        assert json.loads(response.body)["model_version"] == model_adapter.version
+    finally:
+        loop.close()
@@ -0,0 +1,38 @@
+import os
+
+import joblib
+import numpy as np
+
+from app.adapters.model_adapter import ModelAdapter
+from app.adapters.prediction_cache import PredictionCache
+from app.services.model_registry import ModelRegistry
+
+
+def test_model_registry_hot_swaps_changed_artifact(artifact_path, tmp_path):
+    local_artifact = tmp_path / "model.pkl"
+    local_artifact.write_bytes(artifact_path.read_bytes())
+    cache = PredictionCache(maxsize=100)
+
+    def prepare(adapter):
+        adapter.cache = cache
+
+    registry = ModelRegistry(lambda path, engine, mmap: ModelAdapter(path, engine=engine, mmap=mmap), prepare=prepare)
+    active = registry.get(str(local_artifact), "sklearn", False)
+    active.predict_batch(np.ones((4, len(active.feature_names))))
+    assert len(cache) == 1
+    assert registry.check_for_updates() == 0
+
+    payload = joblib.load(local_artifact)
+    payload["version"] = "v2"
+    joblib.dump(payload, local_artifact)
+    os.utime(local_artifact, ns=(1, 1))
+    # La primera detección solo marca el cambio; se recarga cuando la huella es estable.
+    assert registry.check_for_updates() == 0
+    assert registry.check_for_updates() == 1
+    swapped = registry.get(str(local_artifact), "sklearn", False)
+    assert swapped is not active
+    assert swapped.version != active.version
+    assert registry.peek(str(local_artifact)).adapter is swapped
+    # La sustitución vacía la cache y solo la versión nueva guarda entradas.
+    assert len(cache) == 0 and cache.invalidations == 1
+    assert cache.stats()["model_version"] == swapped.version
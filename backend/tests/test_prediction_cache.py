@@ -0,0 +1,64 @@
+import csv
+from pathlib import Path
+
+import numpy as np
+
+from app.adapters.early_exit import EarlyExitEvaluator
+from app.adapters.model_adapter import COMPILED_MAX_ROWS, TOP_FEATURES, ModelAdapter
+from app.adapters.prediction_cache import PredictionCache
+from app.services.feature_bridge import build_conn_feature_vector
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def test_prediction_cache_hits_and_keeps_only_the_current_version(model_adapter):
+    feature_rows = [build_conn_feature_vector(row) for row in _reference_rows()[:50]]
+    matrix = model_adapter.to_matrix(model_adapter.vectorize_batch(feature_rows))
+    expected = model_adapter.predict_batch(matrix).probabilities
+    cache = PredictionCache(maxsize=1000)
+    calls = []
+
+    def compute(rows):
+        calls.append(len(rows))
+        return model_adapter.predict_proba(rows)
+
+    np.testing.assert_array_equal(cache.get_or_compute("v1", matrix, compute), expected)
+    np.testing.assert_array_equal(cache.get_or_compute("v1", matrix, compute), expected)
+    assert len(calls) == 1
+    assert calls[0] == len(np.unique(matrix, axis=0))
+    assert cache.hits == 50
+
+    # Tras sustituir el modelo solo se guarda la versión nueva; la anterior puntúa sin cache.
+    unique_head = len(np.unique(matrix[:5], axis=0))
+    cache.clear("v2")
+    assert cache.invalidations == 1 and len(cache) == 0
+    np.testing.assert_array_equal(cache.get_or_compute("v1", matrix, compute), expected)
+    cache.get_or_compute("v2", matrix[:5], compute)
+    cache.get_or_compute("v2", matrix[:5], compute)
+    assert calls == [calls[0], 50, unique_head]
+    assert len(cache) == unique_head
+    assert cache.invalidations == 1
+
+
+def test_large_batches_skip_the_cache(artifact_path):
+    matrix = np.abs(np.random.default_rng(3).standard_normal((COMPILED_MAX_ROWS + 1, len(TOP_FEATURES))))
+    adapter = ModelAdapter(artifact_path)
+    adapter.cache = PredictionCache(maxsize=1000)
+    adapter.predict_batch(matrix)
+    assert adapter.cache.misses == 0
+    adapter.predict_batch(matrix[:COMPILED_MAX_ROWS])
+    assert adapter.cache.misses == COMPILED_MAX_ROWS
+
+
+def test_early_exit_predictions_bypass_the_cache(model_adapter, artifact_path):
+    matrix = np.abs(np.random.default_rng(5).standard_cauchy((200, len(TOP_FEATURES)))) * 50
+    adapter = ModelAdapter(artifact_path)
+    adapter.cache = PredictionCache(maxsize=1000)
+    assert adapter.enable_early_exit(EarlyExitEvaluator(chunk_trees=2))
+    adapter.predict_batch(matrix)
+    assert len(adapter.cache) == 0 and adapter.cache.misses == 0
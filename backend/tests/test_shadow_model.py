@@ -0,0 +1,70 @@
+import csv
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from app.adapters.model_adapter import TOP_FEATURES, ModelAdapter
+from app.services.feature_bridge import build_conn_feature_vector
+from app.services.shadow_model import ShadowEvaluator
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def test_shadow_evaluator_aggregates_agreement_and_drops_when_behind(artifact_path, model_adapter):
+    feature_rows = [build_conn_feature_vector(row) for row in _reference_rows()[:40]]
+    matrix = model_adapter.to_matrix(model_adapter.vectorize_batch(feature_rows))
+    primary = model_adapter.predict_batch(matrix)
+
+    # Sin hilo consumidor la cola se llena: simula una sombra atrasada.
+    evaluator = ShadowEvaluator(lambda: ModelAdapter(artifact_path), max_pending=1)
+    assert evaluator.submit(matrix, model_adapter.feature_names, primary, "v1") is True
+    assert evaluator.submit(matrix, model_adapter.feature_names, primary, "v1") is False
+    stats = evaluator.stats()
+    assert stats["dropped_batches"] == 1
+    assert stats["dropped_rows"] == 40
+
+    evaluator.start()
+    deadline = time.monotonic() + 10
+    while evaluator.stats()["rows_compared"] < 40 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    evaluator.stop()
+    stats = evaluator.stats()
+    assert stats["rows_compared"] == 40
+    assert stats["agreement_rate"] == 1.0
+    assert sum(entry["primary_count"] for entry in stats["per_class"]) == 40
+
+
+def test_shadow_evaluator_aligns_a_reordered_feature_list(model_adapter, tmp_path):
+    feature_rows = [build_conn_feature_vector(row) for row in _reference_rows()]
+    matrix = model_adapter.to_matrix(model_adapter.vectorize_batch(feature_rows))
+    primary = model_adapter.predict_batch(matrix)
+    reordered = list(reversed(TOP_FEATURES))
+    labels = np.random.default_rng(1).integers(0, 6, size=len(matrix))
+    frame = pd.DataFrame(matrix[:, ::-1], columns=reordered)
+    model = RandomForestClassifier(n_estimators=5, random_state=1).fit(frame, labels)
+    shadow_path = tmp_path / "shadow.pkl"
+    joblib.dump({"model": model, "features": reordered}, shadow_path)
+    shadow_adapter = ModelAdapter(shadow_path)
+    expected = shadow_adapter.predict_batch(matrix[:, ::-1]).class_indices
+
+    evaluator = ShadowEvaluator(lambda: shadow_adapter)
+    assert evaluator.submit(matrix, model_adapter.feature_names, primary, "v1")
+    evaluator.start()
+    deadline = time.monotonic() + 10
+    while evaluator.stats()["rows_compared"] < len(matrix) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    evaluator.stop()
+    stats = evaluator.stats()
+    confusion = np.zeros_like(np.array(stats["confusion_matrix"]))
+    np.add.at(confusion, (primary.class_indices, expected), 1)
+    assert stats["errors"] == 0 and stats["missing_features"] == []
+    assert stats["confusion_matrix"] == confusion.tolist()
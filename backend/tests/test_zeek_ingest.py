@@ -0,0 +1,94 @@
+import csv
+import os
+from pathlib import Path
+
+import pytest
+from sqlmodel import select
+
+from app.adapters.zeek_adapter import ZeekAdapter
+from app.models import Alert, IngestCheckpoint
+from app.services.zeek_ingest import MSG_ROWS, ZeekIngestJob, expand_dataset_paths
+from app.services.zeek_seed import seed_source
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+FIELDS = ["ts", "uid", "id.orig_h", "id.orig_p", "id.resp_h", "id.resp_p", "proto", "service", "duration",
+          "orig_bytes", "resp_bytes", "conn_state"]
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _tsv_header():
+    return "#separator \\x09\n#path\tconn\n#fields\t" + "\t".join(FIELDS) + "\n"
+
+
+def _tsv_lines(rows):
+    return "".join("\t".join(row.get(name) or "-" for name in FIELDS) + "\n" for row in rows)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_ingest_job_scores_a_directory_with_a_single_writer(tmp_path, model_adapter, session_factory, workers):
+    rows = _reference_rows()
+    lines = REFERENCE_CSV.read_text(encoding="utf-8").splitlines(keepends=True)
+    (tmp_path / "conn_a.csv").write_text("".join(lines[:81]), encoding="utf-8")
+    (tmp_path / "conn_b.csv").write_text("".join(lines[:1] + lines[81:151]), encoding="utf-8")
+    (tmp_path / "conn.log").write_text(_tsv_header() + _tsv_lines(rows[150:200]), encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("no es un dataset", encoding="utf-8")
+    for offset, name in enumerate(["conn_a.csv", "conn_b.csv", "conn.log"]):
+        os.utime(tmp_path / name, ns=(1_700_000_000_000_000_000 + offset, 1_700_000_000_000_000_000 + offset))
+    paths = expand_dataset_paths(str(tmp_path))
+    assert [path.name for path in paths] == ["conn_a.csv", "conn_b.csv", "conn.log"]
+    assert expand_dataset_paths(str(tmp_path / "conn_*.csv")) == paths[:2]
+
+    def run():
+        job = ZeekIngestJob(paths, model_adapter, session_factory, workers=workers, batch_size=16, write_rows=40)
+        return job.run(), job.stats()
+
+    written, stats = run()
+    assert written == 200
+    assert stats["files_done"] == 3 and stats["files_failed"] == 0
+    assert [item["rows_written"] for item in stats["files"]] == [80, 70, 50]
+    assert stats["flushes"] >= 5
+    with session_factory() as session:
+        stored = session.exec(select(Alert)).all()
+    expected = [
+        alert.rule_id for path in paths for alert in ZeekAdapter(path, model_adapter).iterate_alerts()
+    ]
+    assert sorted(alert.rule_id for alert in stored) == sorted(expected)
+
+    written, stats = run()
+    assert written == 0 and stats["files_skipped"] == 3
+    with (tmp_path / "conn.log").open("a", encoding="utf-8") as handle:
+        handle.write(_tsv_lines(rows[200:210]))
+    written, stats = run()
+    assert written == 10
+    assert [item["status"] for item in stats["files"]] == ["skipped", "skipped", "done"]
+    assert stats["files"][2]["start_row"] == 50
+
+
+def test_stopped_ingest_marks_the_file_cancelled_and_resumes_later(tmp_path, model_adapter, session_factory):
+    lines = REFERENCE_CSV.read_text(encoding="utf-8").splitlines(keepends=True)
+    dataset = tmp_path / "conn.csv"
+    dataset.write_text("".join(lines[:81]), encoding="utf-8")
+    job = ZeekIngestJob([dataset], model_adapter, session_factory, workers=1, batch_size=16, write_rows=1000)
+    handle = job._handle
+
+    def handle_and_stop(message):
+        handle(message)
+        if message[0] == MSG_ROWS:
+            job.stop()
+
+    job._handle = handle_and_stop
+    assert job.run() == 16
+    stats = job.stats()
+    assert stats["files_cancelled"] == 1 and stats["files_done"] == 0
+    assert stats["files"][0]["status"] == "cancelled" and not stats["files"][0]["complete"]
+    with session_factory() as session:
+        checkpoint = session.get(IngestCheckpoint, seed_source(dataset))
+    assert checkpoint.rows == 16 and not checkpoint.complete
+
+    resumed = ZeekIngestJob([dataset], model_adapter, session_factory, workers=1, batch_size=16)
+    assert resumed.run() == 64
+    assert resumed.stats()["files"][0]["status"] == "done"
@@ -0,0 +1,107 @@
+import csv
+import gzip
+import json
+from pathlib import Path
+
+from app.adapters.zeek_adapter import ZeekAdapter
+from app.adapters.zeek_log_reader import CONN_LOG_TYPES, ZeekLogReader
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _write_conn_log(path, rows, fields):
+    types = [CONN_LOG_TYPES.get(name, "string") for name in fields]
+    lines = [
+        "#separator \\x09",
+        "#set_separator\t,",
+        "#empty_field\t(empty)",
+        "#unset_field\t-",
+        "#path\tconn",
+        "#fields\t" + "\t".join(fields),
+        "#types\t" + "\t".join(types),
+    ]
+    lines += ["\t".join(row.get(name) or "-" for name in fields) for row in rows]
+    lines.append("#close\t2017-07-07-12-00-00")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_reader_parses_tsv_directives_into_typed_values(tmp_path):
+    log = tmp_path / "conn.log"
+    log.write_text(
+        "#separator \\x7c\n"
+        "#set_separator|;\n"
+        "#empty_field|EMPTY\n"
+        "#unset_field|NONE\n"
+        "#fields|ts|uid|id.resp_p|duration|orig_bytes|local_orig|service|tunnel_parents\n"
+        "#types|time|string|port|interval|count|bool|string|set[string]\n"
+        "1499343996.5|C1|80|0.25|1200|T|http|a;b\n"
+        "1499343997|C2|53|NONE|NONE|F|EMPTY|EMPTY\n"
+        "1499343998|C3|443\n"
+        "#close|2017-07-07-12-00-00\n",
+        encoding="utf-8",
+    )
+    with ZeekLogReader(log, block_rows=1) as reader:
+        rows = list(reader.rows())
+        assert reader.format == "tsv"
+        assert reader.numeric_columns == {"ts", "id.resp_p", "duration", "orig_bytes"}
+    assert rows == [
+        (1499343996.5, "C1", 80, 0.25, 1200, True, "http", ["a", "b"]),
+        (1499343997.0, "C2", 53, None, None, False, "", []),
+    ]
+
+    compressed = tmp_path / "conn.01:00:00-02:00:00.log.gz"
+    compressed.write_bytes(gzip.compress(log.read_bytes()))
+    with ZeekLogReader(compressed) as reader:
+        assert list(reader.rows()) == rows
+
+
+def test_adapter_scores_native_logs_like_the_csv_export(tmp_path, model_adapter):
+    rows = _reference_rows()
+    fields = list(rows[0])
+    log = tmp_path / "conn.log"
+    _write_conn_log(log, rows, fields)
+    archive = tmp_path / "conn.00:00:00-01:00:00.log.gz"
+    archive.write_bytes(gzip.compress(log.read_bytes()))
+    json_log = tmp_path / "conn.json"
+    with ZeekLogReader(log) as reader, json_log.open("w", encoding="utf-8") as handle:
+        for row in reader.rows():
+            # Zeek omite en JSON los campos sin valor.
+            record = {name: value for name, value in zip(reader.header, row) if value is not None}
+            handle.write(json.dumps(record) + "\n")
+
+    expected = list(ZeekAdapter(REFERENCE_CSV, model_adapter, batch_size=64).iterate_alerts())
+    for path in (log, archive, json_log):
+        alerts = list(ZeekAdapter(path, model_adapter, batch_size=64).iterate_alerts())
+        assert [alert.rule_id for alert in alerts] == [alert.rule_id for alert in expected]
+        assert [alert.model_score for alert in alerts] == [alert.model_score for alert in expected]
+        assert [alert.timestamp for alert in alerts] == [alert.timestamp for alert in expected]
+        assert alerts[0].meta["features"] == expected[0].meta["features"]
+        assert alerts[0].meta["zeek_conn"]["id.resp_p"] == int(rows[0]["id.resp_p"])
+
+
+def test_json_header_unions_keys_of_the_first_block(tmp_path, model_adapter):
+    rows = _reference_rows()[:3]
+    json_log = tmp_path / "conn.json"
+    records = [
+        {name: value for name, value in row.items() if name in CONN_LOG_TYPES and value not in ("", "-")}
+        for row in rows
+    ]
+    # Un campo ajeno a conn.log que falta en la primera línea y un uid omitido o nulo.
+    del records[0]["uid"]
+    records[1].update(uid=None, community_id="1:abc1")
+    records[2]["community_id"] = "1:abc2"
+    json_log.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+    with ZeekLogReader(json_log) as reader:
+        assert "community_id" in reader.header
+        values = [dict(zip(reader.header, row)) for row in reader.rows()]
+    assert [value["community_id"] for value in values] == [None, "1:abc1", "1:abc2"]
+
+    alerts = list(ZeekAdapter(json_log, model_adapter, batch_size=64).iterate_alerts())
+    assert [alert.rule_id for alert in alerts[:2]] == ["ZEEK-NA", "ZEEK-NA"]
+    assert alerts[2].rule_id == f"ZEEK-{rows[2]['uid']}"
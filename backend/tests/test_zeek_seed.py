@@ -0,0 +1,59 @@
+import asyncio
+from pathlib import Path
+
+from sqlmodel import select
+
+from app.adapters.zeek_adapter import ZeekAdapter
+from app.models import Alert
+from app.services.alerts_service import AlertsService, AlertStreamManager
+from app.services.zeek_seed import seed_zeek_csv
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+
+
+def test_zeek_csv_seed_resumes_and_skips_ingested_files(tmp_path, model_adapter, session_factory):
+    dataset = tmp_path / "conn.csv"
+    lines = REFERENCE_CSV.read_text(encoding="utf-8").splitlines(keepends=True)
+    dataset.write_text("".join(lines[:101]), encoding="utf-8")
+
+    def seed(limit=None):
+        return seed_zeek_csv(ZeekAdapter(dataset, model_adapter, batch_size=32), session_factory, limit)
+
+    assert seed(limit=60) == 60
+    assert seed(limit=60) == 40
+    assert seed() == 0
+    with dataset.open("a", encoding="utf-8") as handle:
+        handle.write("".join(lines[101:131]))
+    assert seed() == 30
+
+    with session_factory() as session:
+        rule_ids = [alert.rule_id for alert in session.exec(select(Alert)).all()]
+    assert len(rule_ids) == 130
+    assert len(set(rule_ids)) == len({line.split(",")[1] for line in lines[1:131]})
+
+    dataset.write_text("".join(lines[:1] + lines[200:210]), encoding="utf-8")
+    assert seed() == 10
+
+
+def test_zeek_csv_seed_invalidates_caches_and_publishes_each_committed_batch(
+    tmp_path, model_adapter, session_factory, monkeypatch
+):
+    dataset = tmp_path / "conn.csv"
+    lines = REFERENCE_CSV.read_text(encoding="utf-8").splitlines(keepends=True)
+    dataset.write_text("".join(lines[:41]), encoding="utf-8")
+    invalidations = []
+    monkeypatch.setattr(AlertsService, "_invalidate_caches", lambda self: invalidations.append(self))
+
+    async def scenario():
+        stream_manager = AlertStreamManager()
+        queue = await stream_manager.subscribe()
+        adapter = ZeekAdapter(dataset, model_adapter, batch_size=16)
+        created = seed_zeek_csv(adapter, session_factory, None, stream_manager)
+        await asyncio.sleep(0.05)
+        return created, [queue.get_nowait() for _ in range(queue.qsize())]
+
+    created, published = asyncio.run(scenario())
+    assert created == 40
+    assert len(invalidations) == 3
+    assert len(published) == 40
+    assert {alert["meta"]["source"] for alert in published} == {"zeek_csv"}
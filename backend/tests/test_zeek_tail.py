@@ -0,0 +1,177 @@
+import csv
+import os
+from pathlib import Path
+
+import pytest
+from sqlmodel import select
+
+from app.adapters.zeek_log_reader import ZeekLogReader
+from app.models import Alert, IngestCheckpoint
+from app.repositories.checkpoint_repo import CheckpointRepository
+from app.services.alerts_service import AlertsService
+from app.services.host_windows import HostWindowTracker
+from app.services.zeek_tail import ZeekLogFollower, ZeekTailer
+
+REFERENCE_CSV = Path(__file__).resolve().parents[1] / "data" / "default_csv" / "attacks_reference.csv"
+FIELDS = ["ts", "uid", "id.orig_h", "id.orig_p", "id.resp_h", "id.resp_p", "proto", "service", "duration",
+          "orig_bytes", "resp_bytes", "conn_state"]
+
+
+def _reference_rows():
+    with REFERENCE_CSV.open(newline="", encoding="utf-8") as handle:
+        return list(csv.DictReader(handle))
+
+
+def _tsv_header():
+    return "#separator \\x09\n#path\tconn\n#fields\t" + "\t".join(FIELDS) + "\n"
+
+
+def _tsv_lines(rows):
+    return "".join("\t".join(row.get(name) or "-" for name in FIELDS) + "\n" for row in rows)
+
+
+def test_follower_reads_complete_lines_and_handles_truncation_and_rotation(tmp_path):
+    log = tmp_path / "conn.log"
+    rows = _reference_rows()
+    log.write_text(_tsv_header() + _tsv_lines(rows[:3]) + "1499\tCpartial", encoding="utf-8")
+    follower = ZeekLogFollower(log)
+    first = follower.read_rows(max_rows=2)
+    assert [row[1] for row in first] == [rows[0]["uid"], rows[1]["uid"]]
+    assert follower.header == FIELDS and follower.has_more
+    assert [row[1] for row in follower.read_rows(max_rows=10)] == [rows[2]["uid"]]
+    assert follower.read_rows(max_rows=10) == []
+
+    with log.open("a", encoding="utf-8") as handle:
+        handle.write("\t".join(["-"] * (len(FIELDS) - 2)) + "\n" + "\t".join(["-"] * len(FIELDS)) + "\n")
+    # Como en el seed: filas cortas descartadas y `#unset_field` convertido a None.
+    assert follower.read_rows(max_rows=10) == [(None,) * len(FIELDS)]
+
+    log.write_text(_tsv_header() + _tsv_lines(rows[3:4]), encoding="utf-8")
+    assert [row[1] for row in follower.read_rows(max_rows=10)] == [rows[3]["uid"]]
+    assert follower.truncations == 1
+
+    log.rename(tmp_path / "conn.old.log")
+    with (tmp_path / "conn.old.log").open("a", encoding="utf-8") as handle:
+        handle.write(_tsv_lines(rows[4:5]))
+    log.write_text(_tsv_header() + _tsv_lines(rows[5:6]), encoding="utf-8")
+    assert [row[1] for row in follower.read_rows(max_rows=10)] == [rows[4]["uid"]]
+    assert follower.read_rows(max_rows=10) == []
+    assert [row[1] for row in follower.read_rows(max_rows=10)] == [rows[5]["uid"]]
+    assert follower.rotations == 1
+
+
+def test_tailer_persists_alerts_with_checkpoint_and_resumes(tmp_path, model_adapter, session_factory):
+    log = tmp_path / "conn.log"
+    rows = _reference_rows()
+    log.write_text(_tsv_header() + _tsv_lines(rows[:40]), encoding="utf-8")
+    tailer = ZeekTailer(log, lambda: model_adapter, session_factory, batch_rows=25)
+    tailer.restore()
+    assert len(tailer.poll()) == 25
+    assert len(tailer.poll()) == 15
+    assert tailer.poll() == []
+    tailer.close()
+
+    with log.open("a", encoding="utf-8") as handle:
+        handle.write(_tsv_lines(rows[40:50]))
+    resumed = ZeekTailer(log, lambda: model_adapter, session_factory, batch_rows=25)
+    resumed.restore()
+    assert [alert.rule_id for alert in resumed.poll()] == [f"ZEEK-{row['uid']}" for row in rows[40:50]]
+    resumed.close()
+
+    with session_factory() as session:
+        stored = session.exec(select(Alert)).all()
+        checkpoint = session.get(IngestCheckpoint, resumed.source)
+    assert len(stored) == 50
+    assert {alert.meta["source"] for alert in stored} == {"zeek_tail"}
+    assert checkpoint.offset == os.path.getsize(log)
+    assert checkpoint.rows == 50
+
+
+def test_tailer_keeps_rows_across_rename_and_failed_batches(tmp_path, model_adapter, session_factory):
+    log = tmp_path / "conn.log"
+    rows = _reference_rows()
+    log.write_text(_tsv_header() + _tsv_lines(rows[:12]), encoding="utf-8")
+    calls = []
+
+    def provider():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("modelo no disponible")
+        return model_adapter
+
+    tailer = ZeekTailer(log, provider, session_factory, batch_rows=5)
+    tailer.restore()
+    assert len(tailer.poll()) == 5
+    with pytest.raises(RuntimeError):
+        tailer.poll()
+    # Rotación: el log se renombra y el nuevo aún no existe; el handle abierto sigue sirviendo filas.
+    log.rename(tmp_path / "conn.1.log")
+    assert len(tailer.poll()) == 5
+    assert len(tailer.poll()) == 2
+    assert tailer.poll() == []
+    log.write_text(_tsv_header() + _tsv_lines(rows[12:15]), encoding="utf-8")
+    assert tailer.poll() == []
+    assert len(tailer.poll()) == 3
+    tailer.close()
+
+    with session_factory() as session:
+        stored = session.exec(select(Alert)).all()
+    assert sorted(alert.rule_id for alert in stored) == sorted(f"ZEEK-{row['uid']}" for row in rows[:15])
+
+
+def test_follower_parses_directives_like_the_log_reader(tmp_path):
+    log = tmp_path / "conn.log"
+    rows = _reference_rows()[:6]
+    header = (
+        "#separator \\x09\n#set_separator\t,\n#empty_field\t(vacío)\n#unset_field\tNA\n"
+        "#fields\t" + "\t".join(FIELDS) + "\n"
+        "#types\ttime\tstring\taddr\tport\taddr\tport\tenum\tstring\tinterval\tcount\tcount\tstring\n"
+    )
+    body = "".join(
+        "\t".join(row.get(name) or ("NA" if name != "service" else "(vacío)") for name in FIELDS) + "\n"
+        for row in rows
+    )
+    log.write_text(header + body, encoding="utf-8")
+
+    follower = ZeekLogFollower(log)
+    tailed = follower.read_rows(max_rows=10)
+    with ZeekLogReader(log) as reader:
+        assert tailed == list(reader.rows())
+        assert follower.reader.numeric_columns == reader.numeric_columns
+    assert isinstance(tailed[0][3], int)
+
+
+def test_tailer_retries_failed_commits_without_recounting_host_windows(
+    tmp_path, model_adapter, session_factory, monkeypatch
+):
+    log = tmp_path / "conn.log"
+    rows = _reference_rows()
+    log.write_text(_tsv_header() + _tsv_lines(rows[:8]), encoding="utf-8")
+    tracker = HostWindowTracker(windows=(60.0,))
+    invalidations = []
+    monkeypatch.setattr(AlertsService, "_invalidate_caches", lambda self: invalidations.append(self))
+    stage = CheckpointRepository.stage
+    failures = []
+
+    def flaky_stage(self, *args, **kwargs):
+        if not failures:
+            failures.append(1)
+            raise RuntimeError("BD no disponible")
+        return stage(self, *args, **kwargs)
+
+    monkeypatch.setattr(CheckpointRepository, "stage", flaky_stage)
+    tailer = ZeekTailer(log, lambda: model_adapter, session_factory, batch_rows=5, host_windows=tracker)
+    tailer.restore()
+    with pytest.raises(RuntimeError):
+        tailer.poll()
+    assert tracker.flows == 5
+    assert len(tailer.poll()) == 5
+    assert len(tailer.poll()) == 3
+    tailer.close()
+
+    # Cada flujo cuenta una vez en las ventanas, y cada lote confirmado invalida las cachés.
+    assert tracker.flows == 8
+    assert len(invalidations) == 2
+    with session_factory() as session:
+        stored = session.exec(select(Alert)).all()
+    assert sorted(alert.rule_id for alert in stored) == sorted(f"ZEEK-{row['uid']}" for row in rows[:8])
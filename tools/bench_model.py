@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inferencia del ModelAdapter.
+
+Reproduce attacks_reference.csv (o una matriz sintética) contra el artefacto
+configurado y compara la predicción fila a fila (`predict`), la predicción por
+lotes con varios tamaños de batch y los motores alternativos. Para cada caso
+informa latencia p50/p95/p99, filas/segundo y pico de RSS en JSON, de modo que
+los resultados se puedan comparar entre commits:
+
+    python tools/bench_model.py --engines sklearn,compiled --output bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.app.adapters.early_exit import EarlyExitEvaluator
+from backend.app.adapters.model_adapter import ENGINE_COMPILED, ENGINE_SKLEARN, FEATURE_DTYPES, ModelAdapter
+from backend.app.config import Settings
+from backend.app.services.feature_bridge import build_conn_feature_vector
+
+REFERENCE_CSV = ROOT / "backend" / "data" / "default_csv" / "attacks_reference.csv"
+ENGINE_MMAP = "mmap"
+ENGINE_EARLY_EXIT = "early-exit"
+ENGINES = (ENGINE_SKLEARN, ENGINE_COMPILED, ENGINE_MMAP, ENGINE_EARLY_EXIT)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Mide la latencia y el throughput del modelo ML")
+    parser.add_argument(
+        "--model-path",
+        default=None,
+        help="Ruta al artefacto ML (.pkl). Por defecto usa backend/app config.",
+    )
+    parser.add_argument(
+        "--source",
+        choices=("reference", "synthetic"),
+        default="reference",
+        help="reference = attacks_reference.csv repetido; synthetic = matriz aleatoria",
+    )
+    parser.add_argument(
+        "--csv",
+        default=str(REFERENCE_CSV),
+        help="CSV estilo conn.log a reproducir con --source reference",
+    )
+    parser.add_argument("--rows", type=int, default=20000, help="Filas a puntuar en modo batch")
+    parser.add_argument(
+        "--per-row-rows",
+        type=int,
+        default=500,
+        help="Filas a puntuar con predict() fila a fila (0 = omitir)",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        default="1,16,64,256,1024,4096",
+        help="Tamaños de batch separados por comas",
+    )
+    parser.add_argument(
+        "--engines",
+        default=f"{ENGINE_SKLEARN},{ENGINE_COMPILED}",
+        help=f"Motores a comparar, separados por comas ({', '.join(ENGINES)})",
+    )
+    parser.add_argument(
+        "--feature-dtype",
+        choices=tuple(FEATURE_DTYPES),
+        default="float64",
+        help="Tipo de la matriz de features; float32 se valida antes contra float64",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Pasadas completas por caso")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de la matriz sintética")
+    parser.add_argument("--output", default=None, help="Archivo JSON de salida (por defecto stdout)")
+    return parser.parse_args()
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux y en bytes en macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def _load_feature_rows(csv_path: Path, rows: int) -> List[Dict[str, float]]:
+    with csv_path.open(newline="", encoding="utf-8") as handle:
+        base = [build_conn_feature_vector(row) for row in csv.DictReader(handle)]
+    if not base:
+        raise ValueError(f"El CSV {csv_path} no contiene filas")
+    return [base[idx % len(base)] for idx in range(rows)]
+
+
+def _synthetic_rows(n_features: int, rows: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.abs(rng.standard_cauchy((rows, n_features))) * 50
+
+
+def _load_adapter(model_path: str, engine: str) -> ModelAdapter:
+    if engine == ENGINE_MMAP:
+        return ModelAdapter(model_path, mmap=True)
+    if engine == ENGINE_EARLY_EXIT:
+        adapter = ModelAdapter(model_path)
+        if not adapter.enable_early_exit(EarlyExitEvaluator(audit_every=0)):
+            raise ValueError("El artefacto no admite salida temprana")
+        return adapter
+    return ModelAdapter(model_path, engine=engine)
+
+
+def _summarize(latencies: List[float], rows: int, total: float) -> Dict[str, Any]:
+    latencies_ms = np.asarray(latencies) * 1000.0
+    return {
+        "calls": len(latencies),
+        "rows": rows,
+        "total_s": round(total, 6),
+        "rows_per_sec": round(rows / total, 1) if total > 0 else None,
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies_ms, 50)), 4),
+            "p95": round(float(np.percentile(latencies_ms, 95)), 4),
+            "p99": round(float(np.percentile(latencies_ms, 99)), 4),
+            "mean": round(float(latencies_ms.mean()), 4),
+        },
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _time_calls(calls: List[Callable[[], Any]], rows_per_pass: int, repeat: int) -> Dict[str, Any]:
+    # Primera llamada fuera de la medición: asigna buffers y calienta el motor.
+    calls[0]()
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for call in calls:
+            t0 = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - t0)
+    return _summarize(latencies, rows_per_pass * repeat, time.perf_counter() - started)
+
+
+def bench_engine(
+    adapter: ModelAdapter,
+    engine: str,
+    matrix: np.ndarray,
+    feature_rows: List[Dict[str, float]],
+    batch_sizes: List[int],
+    repeat: int,
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    if feature_rows:
+        calls = [lambda features=features: adapter.predict(features) for features in feature_rows]
+        results.append(
+            {"engine": engine, "mode": "per_row", "batch_size": 1, **_time_calls(calls, len(calls), repeat)}
+        )
+        print(f"  {engine} per_row: {results[-1]['rows_per_sec']} filas/s", file=sys.stderr)
+    for batch_size in batch_sizes:
+        blocks = [matrix[start : start + batch_size] for start in range(0, matrix.shape[0], batch_size)]
+        calls = [lambda block=block: adapter.predict_batch(block) for block in blocks]
+        results.append(
+            {
+                "engine": engine,
+                "mode": "batch",
+                "batch_size": batch_size,
+                **_time_calls(calls, matrix.shape[0], repeat),
+            }
+        )
+        print(f"  {engine} batch={batch_size}: {results[-1]['rows_per_sec']} filas/s", file=sys.stderr)
+    return results
+
+
+def main() -> int:
+    args = parse_args()
+    settings = Settings()
+    model_path = args.model_path or settings.model_path
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        print(f"Motores desconocidos: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    batch_sizes = sorted({int(size) for size in args.batch_sizes.split(",") if size.strip()})
+    rows = max(1, args.rows)
+    repeat = max(1, args.repeat)
+
+    results: List[Dict[str, Any]] = []
+    for engine in engines:
+        print(f"Midiendo motor {engine}...", file=sys.stderr)
+        load_started = time.perf_counter()
+        adapter = _load_adapter(model_path, engine)
+        load_seconds = time.perf_counter() - load_started
+        if args.source == "reference":
+            base_rows = _load_feature_rows(Path(args.csv), rows)
+            matrix = adapter.to_matrix(adapter.vectorize_batch(base_rows))
+        else:
+            matrix = _synthetic_rows(len(adapter.feature_names), rows, args.seed)
+            base_rows = [dict(zip(adapter.feature_names, row)) for row in matrix[: args.per_row_rows].tolist()]
+        dtype_check = None
+        if args.feature_dtype != "float64":
+            dtype_check = adapter.validate_feature_dtype(matrix, FEATURE_DTYPES[args.feature_dtype])
+            if not dtype_check["ok"]:
+                print(f"  {engine}: {args.feature_dtype} no coincide con float64: {dtype_check}", file=sys.stderr)
+                return 1
+            adapter.feature_dtype = FEATURE_DTYPES[args.feature_dtype]
+            matrix = matrix.astype(adapter.feature_dtype)
+        per_row = base_rows[: max(0, args.per_row_rows)]
+        for result in bench_engine(adapter, engine, matrix, per_row, batch_sizes, repeat):
+            result["load_s"] = round(load_seconds, 4)
+            result["feature_dtype"] = args.feature_dtype
+            if dtype_check is not None:
+                result["dtype_check"] = dtype_check
+            results.append(result)
+        del adapter
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "model_path": str(model_path),
+            "source": args.source,
+            "rows": rows,
+            "per_row_rows": args.per_row_rows,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+        print(f"Resultados guardados en {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())